@@ -0,0 +1,118 @@
+# ==========================================================
+# 🧪 BACKTEST VECTORIZADO — reglas de analyze_ticker
+# ==========================================================
+# ✅ Reproduce velas OHLCV guardadas (BarStore, offline)
+# ✅ Mismas reglas que el bot (strategy.py + indicators.py)
+# ✅ Entradas/salidas con SL/TP por ATR, sin bucles por vela
+# ✅ Métricas Win/Loss/BE/PnL como daily_performance_summary
+# ==========================================================
+import argparse
+import numpy as np
+import pandas as pd
+from indicators import ema_np, rsi_np, macd_np, atr_np
+from strategy import trend_sign, sniper_ok, sl_tp, SL_ATR_MULT, TP_ATR_MULT
+from bar_store import BarStore
+
+DEFAULT_PARAMS = {"ema_fast": 8, "ema_slow": 21, "rsi": 14, "macd": (12, 26, 9), "atr": 14}
+CHUNK = 50_000
+
+def compute_signals(close, high, low, params=DEFAULT_PARAMS):
+    """Indicadores y decisiones para todas las velas a la vez."""
+    ef = ema_np(close, params["ema_fast"])
+    es = ema_np(close, params["ema_slow"])
+    r  = rsi_np(close, params["rsi"])
+    line, sig = macd_np(close, *params["macd"])
+    return {"sign": trend_sign(ef, es), "sniper": sniper_ok(ef, es, r, line, sig),
+            "rsi": r, "macd": line, "atr": atr_np(high, low, close, params.get("atr", 14))}
+
+def entry_points(sig, mode="trend"):
+    """Índices de entrada: cambio de tendencia o activación del sniper."""
+    if mode == "sniper":
+        on = sig["sniper"] & ~np.isnan(sig["atr"])
+        idx = np.flatnonzero(on & ~np.r_[False, on[:-1]])
+        return idx, np.ones(len(idx), dtype=int)
+    sign = sig["sign"]
+    flip = np.r_[False, sign[1:] != sign[:-1]] & ~np.isnan(sig["atr"])
+    idx = np.flatnonzero(flip)
+    return idx, sign[idx]
+
+def simulate(high, low, close, idx, sign, atr, horizon=48,
+             sl_mult=SL_ATR_MULT, tp_mult=TP_ATR_MULT):
+    """Resultado de cada entrada: primer toque de TP/SL dentro de `horizon` velas.
+
+    Si SL y TP caen en la misma vela se cuenta Loss (criterio conservador).
+    Sin toque en el horizonte → BE, cerrada al cierre de la última vela.
+    """
+    n = len(close)
+    keep = idx + horizon < n
+    idx, sign = idx[keep], np.asarray(sign)[keep]
+    entry = close[idx]
+    sl, tp = sl_tp(entry, atr[idx], sign, sl_mult, tp_mult)
+    result = np.empty(len(idx), dtype=object)
+    pnl = np.empty(len(idx))
+    hw = np.lib.stride_tricks.sliding_window_view(high, horizon + 1)
+    lw = np.lib.stride_tricks.sliding_window_view(low, horizon + 1)
+    for s in range(0, len(idx), CHUNK):
+        i, sg = idx[s:s+CHUNK], sign[s:s+CHUNK][:, None]
+        h, l = hw[i, 1:], lw[i, 1:]
+        t, st = tp[s:s+CHUNK][:, None], sl[s:s+CHUNK][:, None]
+        hit_tp = np.where(sg > 0, h >= t, l <= t)
+        hit_sl = np.where(sg > 0, l <= st, h >= st)
+        first_tp = np.where(hit_tp.any(1), hit_tp.argmax(1), horizon)
+        first_sl = np.where(hit_sl.any(1), hit_sl.argmax(1), horizon)
+        win  = first_tp < first_sl
+        loss = (first_sl <= first_tp) & (first_sl < horizon)
+        exit_px = np.where(win, t[:, 0], np.where(loss, st[:, 0], close[i + horizon]))
+        result[s:s+CHUNK] = np.where(win, "Win", np.where(loss, "Loss", "BE"))
+        pnl[s:s+CHUNK] = (exit_px - close[i]) * sg[:, 0]
+    return pd.DataFrame({"idx": idx, "Side": np.where(sign > 0, "up", "down"),
+                         "Entrada": entry, "SL": sl, "TP": tp, "atr": atr[idx],
+                         "Resultado": result, "PnL": pnl})
+
+def summarize(trades):
+    """Totales con el mismo formato que daily_performance_summary."""
+    total = len(trades)
+    counts = trades["Resultado"].value_counts() if total else pd.Series(dtype=int)
+    wins, loss = int(counts.get("Win", 0)), int(counts.get("Loss", 0))
+    return {"Total": total, "Win": wins, "Loss": loss, "BE": int(counts.get("BE", 0)),
+            "Cancel": 0, "PnL": round(float(trades["PnL"].sum()), 2) if total else 0.0,
+            "Winrate": round(wins / (wins + loss) * 100, 2) if wins + loss else 0.0}
+
+def backtest_frame(df, params=DEFAULT_PARAMS, mode="trend", horizon=48, ticker=""):
+    """Backtest de un DataFrame OHLCV (índice temporal)."""
+    close, high, low = (df[c].to_numpy(float) for c in ("Close", "High", "Low"))
+    sig = compute_signals(close, high, low, params)
+    idx, sign = entry_points(sig, mode)
+    trades = simulate(high, low, close, idx, sign, sig["atr"], horizon)
+    ts = df.index[trades["idx"].to_numpy()]
+    trades.insert(0, "FechaISO", ts.strftime("%Y-%m-%d"))
+    trades.insert(1, "HoraRegistro", ts.strftime("%H:%M:%S"))
+    trades.insert(2, "Ticker", ticker)
+    return trades.drop(columns="idx")
+
+def run_backtest(tickers, period="60d", interval="5m", mode="trend", horizon=48,
+                 params=DEFAULT_PARAMS, store=None):
+    store = store or BarStore(offline=True)
+    bars = store.get_many(tickers, period=period, interval=interval)
+    frames = [backtest_frame(df, params, mode, horizon, tk) for tk, df in bars.items() if len(df)]
+    trades = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(
+        columns=["FechaISO","HoraRegistro","Ticker","Side","Entrada","SL","TP","atr","Resultado","PnL"])
+    return trades, summarize(trades)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Backtest offline de las reglas del bot")
+    ap.add_argument("tickers", nargs="+")
+    ap.add_argument("--period", default="60d")
+    ap.add_argument("--interval", default="5m")
+    ap.add_argument("--mode", choices=["trend", "sniper"], default="trend")
+    ap.add_argument("--horizon", type=int, default=48, help="velas máximas por operación")
+    ap.add_argument("--online", action="store_true", help="completar caché con yfinance")
+    ap.add_argument("--out", help="CSV con las operaciones simuladas")
+    a = ap.parse_args()
+    trades, summary = run_backtest(a.tickers, a.period, a.interval, a.mode, a.horizon,
+                                   store=BarStore(offline=not a.online))
+    if a.out:
+        trades.to_csv(a.out, index=False)
+    print(f"📈 Backtest {a.mode} → Total:{summary['Total']} | Win:{summary['Win']} | "
+          f"Loss:{summary['Loss']} | BE:{summary['BE']} | PnL:{summary['PnL']} | "
+          f"Winrate:{summary['Winrate']}%")
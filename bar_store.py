@@ -0,0 +1,188 @@
+# ==========================================================
+# 💾 BAR STORE — caché local de velas OHLCV (Parquet)
+# ==========================================================
+# ✅ Un archivo Parquet por símbolo e intervalo
+# ✅ Una sola llamada yf.download para todos los símbolos
+# ✅ Solo pide las velas posteriores al último timestamp guardado
+# ✅ Modo offline: lee caché / fixtures locales, sin red
+# ==========================================================
+import os, re, time, atexit, threading
+import pandas as pd
+from datetime import timedelta
+
+BAR_CACHE_DIR   = os.getenv("BAR_CACHE_DIR", ".bar_cache")
+BAR_FIXTURE_DIR = os.getenv("BAR_FIXTURE_DIR", "")
+BAR_OFFLINE     = os.getenv("BAR_STORE_OFFLINE", "0") == "1"
+BAR_PERSIST_S   = float(os.getenv("BAR_PERSIST_SECONDS", "300"))   # Parquet a disco cada N s
+
+COLUMNS = ["Open","High","Low","Close","Volume"]
+
+# Límites de historia intradía de Yahoo Finance
+MAX_LOOKBACK = {
+    "1m": timedelta(days=7), "2m": timedelta(days=60), "5m": timedelta(days=60),
+    "15m": timedelta(days=60), "30m": timedelta(days=60), "60m": timedelta(days=730),
+    "90m": timedelta(days=60), "1h": timedelta(days=730),
+}
+
+def period_to_timedelta(period):
+    """'2d' → 2 días, '1mo' → 30 días, '1y' → 365 días."""
+    m = re.fullmatch(r"(\d+)(m|h|d|wk|mo|y)", period)
+    if not m:
+        raise ValueError(f"periodo no soportado: {period}")
+    n, unit = int(m.group(1)), m.group(2)
+    return {"m": timedelta(minutes=n), "h": timedelta(hours=n), "d": timedelta(days=n),
+            "wk": timedelta(weeks=n), "mo": timedelta(days=30*n), "y": timedelta(days=365*n)}[unit]
+
+def _normalize(df):
+    """Columnas OHLCV planas, índice UTC ordenado y sin duplicados."""
+    if df is None or df.empty:
+        return pd.DataFrame(columns=COLUMNS, index=pd.DatetimeIndex([], tz="UTC"))
+    cols = [c for c in COLUMNS if c in df.columns]
+    if list(df.columns) != cols:
+        df = df[cols]
+    df = df.dropna(how="all")
+    idx = pd.DatetimeIndex(df.index)
+    df.index = idx.tz_localize("UTC") if idx.tz is None else idx.tz_convert("UTC")
+    if df.index.has_duplicates:
+        df = df[~df.index.duplicated(keep="last")]
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index()
+    return df.astype(float, copy=False)
+
+def _split_download(raw, symbols):
+    """Separa el DataFrame de yf.download (multi-ticker) en uno por símbolo."""
+    if raw is None or raw.empty:
+        return {}
+    if isinstance(raw.columns, pd.MultiIndex):
+        lvl = 0 if symbols[0] in raw.columns.get_level_values(0) else 1
+        present = set(raw.columns.get_level_values(lvl))
+        return {s: raw.xs(s, axis=1, level=lvl) for s in symbols if s in present}
+    return {symbols[0]: raw} if len(symbols) == 1 else {}
+
+def _merge(cached, fresh):
+    """Caché (ya normalizada) + velas nuevas: solo se normaliza lo descargado."""
+    fresh = _normalize(fresh)
+    if cached.empty or fresh.empty:
+        return fresh if cached.empty else cached
+    return pd.concat([cached[cached.index < fresh.index[0]], fresh])
+
+_STORES = []
+
+class BarStore:
+    """Caché de velas por (símbolo, intervalo) con descarga incremental en lote."""
+
+    def __init__(self, cache_dir=BAR_CACHE_DIR, offline=BAR_OFFLINE, fixture_dir=BAR_FIXTURE_DIR):
+        self.cache_dir = cache_dir
+        self.offline = offline
+        self.fixture_dir = fixture_dir
+        self._mem = {}
+        self._dirty = set()
+        self._persisted = time.monotonic()
+        self._lock = threading.Lock()
+        _STORES.append(self)
+
+    # === Persistencia ===
+    def _path(self, symbol, interval):
+        safe = re.sub(r"[^A-Za-z0-9._-]", "_", symbol)
+        return os.path.join(self.cache_dir, interval, f"{safe}.parquet")
+
+    def _fixture(self, symbol, interval):
+        safe = re.sub(r"[^A-Za-z0-9._-]", "_", symbol)
+        for ext in ("parquet", "csv"):
+            path = os.path.join(self.fixture_dir, f"{safe}_{interval}.{ext}")
+            if os.path.exists(path):
+                if ext == "parquet":
+                    return pd.read_parquet(path)
+                return pd.read_csv(path, index_col=0, parse_dates=True)
+        return None
+
+    def load(self, symbol, interval):
+        key = (symbol, interval)
+        if key not in self._mem:
+            df = None
+            path = self._path(symbol, interval)
+            if os.path.exists(path):
+                df = pd.read_parquet(path)
+            elif self.fixture_dir:
+                df = self._fixture(symbol, interval)
+            self._mem[key] = _normalize(df)
+        return self._mem[key]
+
+    def save(self, symbol, interval, df, persist=True):
+        df = _normalize(df)
+        lookback = MAX_LOOKBACK.get(interval)
+        if lookback is not None and not df.empty:
+            df = df[df.index >= df.index[-1] - lookback]
+        self._mem[(symbol, interval)] = df
+        self._dirty.add((symbol, interval))
+        if persist:
+            self.persist()
+
+    def _store(self, symbol, interval, df):
+        """Como save() para datos ya normalizados; el disco se escribe en persist()."""
+        lookback = MAX_LOOKBACK.get(interval)
+        if lookback is not None and not df.empty and df.index[0] < df.index[-1] - lookback:
+            df = df[df.index >= df.index[-1] - lookback]
+        self._mem[(symbol, interval)] = df
+        self._dirty.add((symbol, interval))
+
+    def persist(self):
+        """Escribe a Parquet (atómico) los símbolos modificados."""
+        dirty, self._dirty = self._dirty, set()
+        for symbol, interval in dirty:
+            path = self._path(symbol, interval)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.tmp"
+            self._mem[(symbol, interval)].to_parquet(tmp)
+            os.replace(tmp, path)
+        self._persisted = time.monotonic()
+
+    # === Descarga incremental ===
+    def _download(self, symbols, start, interval):
+        import yfinance as yf
+        raw = yf.download(symbols, start=start.to_pydatetime(), interval=interval,
+                          group_by="ticker", progress=False, threads=True)
+        return _split_download(raw, symbols)
+
+    def get_many(self, symbols, period="2d", interval="5m"):
+        """Velas de los últimos `period` para cada símbolo (una descarga para todos)."""
+        symbols = list(dict.fromkeys(symbols))
+        now = pd.Timestamp.now(tz="UTC")
+        since = now - period_to_timedelta(period)
+        with self._lock:
+            cached = {s: self.load(s, interval) for s in symbols}
+            if not self.offline and symbols:
+                # Desde la última vela guardada (se re-pide para cerrar la vela parcial)
+                starts = [c.index[-1] if not c.empty and c.index[-1] >= since else since
+                          for c in cached.values()]
+                start = min(starts)
+                lookback = MAX_LOOKBACK.get(interval)
+                if lookback is not None:
+                    start = max(start, now - lookback + timedelta(hours=1))
+                fresh = self._download(symbols, start, interval)
+                for s, df in fresh.items():
+                    self._store(s, interval, _merge(cached[s], df))
+                    cached[s] = self._mem[(s, interval)]
+                # Disco diferido: en modo daemon no se reescriben cientos de
+                # Parquet por ciclo (al salir se vacía igual, ver persist_all)
+                if time.monotonic() - self._persisted >= BAR_PERSIST_S:
+                    self.persist()
+        if self.offline:
+            # Sin red: la ventana se mide desde la última vela disponible
+            span = period_to_timedelta(period)
+            return {s: df[df.index >= df.index[-1] - span] if not df.empty else df
+                    for s, df in cached.items()}
+        return {s: df.iloc[df.index.searchsorted(since):] for s, df in cached.items()}
+
+    def get(self, symbol, period="2d", interval="5m"):
+        return self.get_many([symbol], period=period, interval=interval)[symbol]
+
+def persist_all():
+    for store in _STORES:
+        try:
+            with store._lock:
+                store.persist()
+        except Exception as e:
+            print("⚠️ persist bars:", e)
+
+atexit.register(persist_all)
@@ -0,0 +1,348 @@
+# ==========================================================
+# 🏁 BENCHMARK OFFLINE — Sheets / yfinance / Alpha Vantage simulados
+# ==========================================================
+# ✅ Worksheets en memoria con latencia y cuota (429) configurables
+# ✅ yf.download servido desde velas OHLCV sintéticas
+# ✅ NEWS_SENTIMENT simulado (requests interceptado, sin red)
+# ✅ run_cycle / recalibrate / update_results.main / purge_old_debug
+#    y modo streaming (replay de ticks sintéticos)
+#    con WATCHLIST de 2, 50 y 500 tickers (un subproceso por tamaño)
+# ✅ Reporte: tiempo, llamadas a cada API y pico de memoria (tracemalloc)
+#
+#   python bench.py                       → tabla + bench_output.txt
+#   python bench.py --sizes 2 50 --sheets-latency 0.05 --quota 300
+# ==========================================================
+import os, sys, json, time, types, zlib, random, argparse, tempfile, subprocess, tracemalloc
+from collections import Counter
+
+SIZES = (2, 50, 500)
+
+# ----------------------------------------------------------
+# 📊 Simulación de la API de Google Sheets
+# ----------------------------------------------------------
+class FakeApi:
+    """Latencia fija por request + cuota de requests por ventana (429 al excederla)."""
+
+    def __init__(self, latency=0.0, quota=0, window=60.0):
+        self.latency, self.quota, self.window = latency, quota, window
+        self.calls = Counter()
+        self.throttled = 0
+        self._stamps = []
+
+    def request(self, name):
+        import gspread
+        now = time.monotonic()
+        if self.quota:
+            self._stamps = [t for t in self._stamps if now - t < self.window]
+            if len(self._stamps) >= self.quota:
+                self.throttled += 1
+                raise gspread.exceptions.APIError(_FakeResponse(429, {"error": {
+                    "code": 429, "message": "Quota exceeded", "status": "RESOURCE_EXHAUSTED"}}))
+            self._stamps.append(now)
+        self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+class _FakeResponse:
+    def __init__(self, status_code, payload):
+        self.status_code, self._payload = status_code, payload
+        self.text = json.dumps(payload)
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        pass
+
+class FakeWorksheet:
+    """gspread.Worksheet simulado: MemoryWorksheet + costo de API por método."""
+
+    def __init__(self, api, title, headers=None):
+        from sheets_client import MemoryWorksheet
+        self._api = api
+        self._ws = MemoryWorksheet(title, headers)
+
+    def get_all_records(self, **kwargs):
+        # Como gspread: los valores numéricos vuelven convertidos
+        from gspread.utils import numericise_all
+        self._api.request("get_all_records")
+        rows = self._ws.get_all_records()
+        return [dict(zip(r, numericise_all(list(r.values())))) for r in rows]
+
+    def __getattr__(self, name):
+        attr = getattr(self._ws, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            self._api.request(name)
+            return attr(*args, **kwargs)
+        return call
+
+class FakeSpreadsheet:
+    def __init__(self, api):
+        self._api = api
+        self.sheets = {}
+
+    def worksheet(self, title):
+        import gspread
+        self._api.request("worksheet")
+        if title not in self.sheets:
+            raise gspread.WorksheetNotFound(title)
+        return self.sheets[title]
+
+    def add_worksheet(self, title, rows=1000, cols=26):
+        self._api.request("add_worksheet")
+        self.sheets[title] = FakeWorksheet(self._api, title)
+        return self.sheets[title]
+
+    @property
+    def sheet1(self):
+        return self.sheets.setdefault("sheet1", FakeWorksheet(self._api, "sheet1"))
+
+    def seed(self, title, rows):
+        ws = self.sheets.setdefault(title, FakeWorksheet(self._api, title))
+        ws._ws.rows = [list(map(str, r)) for r in rows]
+
+class FakeClient:
+    def __init__(self, ss):
+        self.ss = ss
+
+    def open_by_key(self, key):
+        return self.ss
+
+# ----------------------------------------------------------
+# 📈 yfinance simulado (OHLCV sintético, determinista por símbolo)
+# ----------------------------------------------------------
+def synthetic_bars(symbol, start, end, interval="5m"):
+    """Precio función del timestamp: descargas solapadas devuelven las mismas velas."""
+    import numpy as np, pandas as pd
+    freq = interval.replace("m", "min") if interval.endswith("m") else interval
+    idx = pd.date_range(pd.Timestamp(start).floor(freq), pd.Timestamp(end).floor(freq), freq=freq)
+    seed = zlib.crc32(symbol.encode())
+    t = idx.as_unit("s").asi8
+    base = 100 + seed % 400
+    noise = ((t * 2654435761 + seed) % 10007) / 10007 - 0.5
+    close = base * (1 + 0.03 * np.sin(t / (3600 * (3 + seed % 5))) + 0.004 * noise)
+    opn = base * (1 + 0.03 * np.sin((t - 300) / (3600 * (3 + seed % 5))) + 0.004 * np.roll(noise, 1))
+    spread = np.abs(noise) * 0.002 * close
+    return pd.DataFrame({"Open": opn, "High": np.maximum(opn, close) + spread,
+                         "Low": np.minimum(opn, close) - spread, "Close": close,
+                         "Volume": 100.0 + (t % 9973)}, index=idx)
+
+def install_yfinance(stats, latency):
+    import pandas as pd
+
+    def download(tickers, start=None, end=None, period=None, interval="5m", group_by=None, **kwargs):
+        stats["yf.download"] += 1
+        if latency:
+            time.sleep(latency)
+        symbols = tickers.replace(",", " ").split() if isinstance(tickers, str) else list(tickers)
+        stats["yf.symbols"] += len(symbols)
+        end = pd.Timestamp.now(tz="UTC")
+        start = pd.Timestamp(start).tz_localize("UTC") if start is not None and pd.Timestamp(start).tzinfo is None \
+            else pd.Timestamp(start) if start is not None else end - pd.Timedelta(days=2)
+        frames = {s: synthetic_bars(s, start, end, interval) for s in symbols}
+        return pd.concat(frames, axis=1) if len(symbols) > 1 else frames[symbols[0]]
+
+    yf = types.ModuleType("yfinance")
+    yf.download = download
+    sys.modules["yfinance"] = yf
+
+# ----------------------------------------------------------
+# 📰 NEWS_SENTIMENT simulado (se intercepta requests)
+# ----------------------------------------------------------
+def news_payload(tickers, articles=10, seed=0):
+    rng = random.Random(seed)
+    feed = []
+    for _ in range(articles):
+        ts = [{"ticker": t, "relevance_score": f"{rng.random():.3f}",
+               "ticker_sentiment_score": f"{rng.uniform(-0.6, 0.6):.3f}"}
+              for t in tickers if rng.random() < 0.7]
+        feed.append({"title": "synthetic", "overall_sentiment_score": round(rng.uniform(-0.5, 0.5), 3),
+                     "ticker_sentiment": ts})
+    return {"items": str(len(feed)), "feed": feed}
+
+def install_requests(stats, latency, universe=()):
+    import requests
+    from urllib.parse import urlparse, parse_qs
+
+    def request(self, method, url, params=None, **kwargs):
+        if "alphavantage" not in url:
+            raise requests.ConnectionError(f"benchmark offline: {url}")
+        stats["news.requests"] += 1
+        if latency:
+            time.sleep(latency)
+        q = {k: v[0] for k, v in parse_qs(urlparse(url).query).items()}
+        q.update(params or {})
+        # Sin filtro tickers= el feed general menciona cualquier símbolo del universo
+        tickers = [t for t in str(q.get("tickers", "")).split(",") if t] or list(universe)
+        return _FakeResponse(200, news_payload(tickers, seed=zlib.crc32(",".join(tickers).encode())))
+
+    requests.Session.request = request
+
+# ----------------------------------------------------------
+# 🌱 Datos iniciales de las hojas
+# ----------------------------------------------------------
+PERF_HEADERS = ["FechaISO","HoraRegistro","Ticker","Side","Entrada",
+                "ProbFinal","Resultado","PnL","ExitISO","ExitHora","Notas"]
+
+def watchlist(n):
+    base = ["ES", "DKNG"]
+    return (base + [f"T{i:04d}" for i in range(n - len(base))])[:n]
+
+def seed_sheets(ss, tickers, trades_per_ticker=20, debug_days=14, debug_per_day=200):
+    import pandas as pd
+    rng = random.Random(42)
+    today = pd.Timestamp.now(tz="US/Eastern").normalize()
+    perf = [PERF_HEADERS]
+    for tk in tickers:
+        for _ in range(trades_per_ticker):
+            day = today - pd.Timedelta(days=rng.randint(0, 9))
+            res = rng.choice(["Win", "Win", "Loss", "BE", "Cancel"])
+            perf.append([day.strftime("%Y-%m-%d"), f"{rng.randint(9, 15):02d}:{rng.randint(0, 59):02d}:00",
+                         tk, rng.choice(["up", "down"]), "AUTO", round(rng.uniform(60, 95), 2), res,
+                         round(rng.uniform(-50, 80), 2) if res in ("Win", "Loss") else "",
+                         day.strftime("%Y-%m-%d"), "16:00:00", ""])
+    perf.sort(key=lambda r: (r[0], r[1]) if r is not PERF_HEADERS else ("", ""))
+    ss.seed("performance", perf)
+    ss.seed("sheet1", perf)
+    debug = [["Fecha", "Hora", "Mensaje"]]
+    for d in range(debug_days, -1, -1):
+        day = (today - pd.Timedelta(days=d)).strftime("%Y-%m-%d")
+        debug += [[day, f"{i // 3600:02d}:{i // 60 % 60:02d}:{i % 60:02d}", "bench: seed"]
+                  for i in range(0, 86400, 86400 // debug_per_day)][:debug_per_day]
+    ss.seed("debug", debug)
+    ss.seed("state", [["clave", "valor", "timestamp"]])
+
+def stream_updates(tickers, minutes=30, ticks=4):
+    """Ticks sintéticos de los próximos `minutes` minutos (a continuación de las velas)."""
+    from streaming import tick
+    start = time.time() // 60 * 60
+    for m in range(minutes):
+        bars = {tk: synthetic_bars(tk, pd_ts(start + m * 60), pd_ts(start + m * 60), "1m") for tk in tickers}
+        for k in range(ticks):
+            for tk, df in bars.items():
+                row = df.iloc[0]
+                price = row["Open"] + (row["Close"] - row["Open"]) * (k + 1) / ticks
+                yield tick(tk, start + m * 60 + k * 60 / ticks, price, row["Volume"] / ticks)
+
+def pd_ts(epoch):
+    import pandas as pd
+    return pd.Timestamp(epoch, unit="s")
+
+# ----------------------------------------------------------
+# ⏱️ Medición
+# ----------------------------------------------------------
+def measure(name, fn, api, stats):
+    from bot_config import flush_sheets
+    api.calls.clear()
+    throttled, before = api.throttled, Counter(stats)
+    tracemalloc.reset_peak()
+    t0 = time.perf_counter()
+    fn()
+    flush_sheets()
+    wall = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    ext = {k: v - before.get(k, 0) for k, v in stats.items() if v - before.get(k, 0)}
+    return {"scenario": name, "wall_s": round(wall, 3), "sheets_calls": sum(api.calls.values()),
+            "sheets_by_method": dict(api.calls), "throttled": api.throttled - throttled,
+            "peak_mb": round(peak / 2**20, 2), **ext}
+
+def child(args):
+    """Corre todos los escenarios para un tamaño de WATCHLIST (proceso limpio)."""
+    import gspread
+    from google.oauth2 import service_account
+    api = FakeApi(args.sheets_latency, args.quota, args.quota_window)
+    ss = FakeSpreadsheet(api)
+    gspread.authorize = lambda *a, **k: FakeClient(ss)
+    service_account.Credentials.from_service_account_info = classmethod(lambda cls, *a, **k: object())
+    stats = Counter()
+    install_yfinance(stats, args.yf_latency)
+    tickers = watchlist(args.size)
+    install_requests(stats, args.news_latency, tickers)
+    seed_sheets(ss, tickers)
+    tracemalloc.start()
+
+    import bot, update_results, recalibrate
+    bot.WATCHLIST[:] = tickers
+    bot.CALENDAR.assign({tk: "Crypto" for tk in tickers})   # sesión 24/7: ciclo completo
+
+    scenarios = [
+        ("run_cycle (frío)", bot.run_cycle),
+        ("run_cycle (caché)", bot.run_cycle),
+        ("update_results.main", update_results.main),
+        ("recalibrate", lambda: recalibrate.recalibrate(sweep=args.sweep, workers=args.workers)),
+        ("recalibrate (incr.)", lambda: recalibrate.recalibrate(sweep=args.sweep, workers=args.workers)),
+        ("stream (replay)", lambda: bot.run_stream(stream_updates(tickers))),
+        ("purge_old_debug", lambda: bot.purge_old_debug(7)),
+    ]
+    results = [dict(measure(name, fn, api, stats), size=args.size) for name, fn in scenarios]
+    with open(args.json, "w") as fh:
+        json.dump(results, fh)
+
+# ----------------------------------------------------------
+# 🧾 Reporte
+# ----------------------------------------------------------
+def format_table(results, settings):
+    lines = [f"🏁 Benchmark offline — {time.strftime('%Y-%m-%d %H:%M:%S')}",
+             "   " + " ".join(f"{k}={v}" for k, v in settings.items()), ""]
+    head = f"{'tickers':>7}  {'escenario':<22}{'wall s':>9}{'sheets':>8}{'429':>5}{'yf':>5}{'news':>6}{'peak MB':>9}  métodos"
+    lines += [head, "-" * len(head)]
+    for r in results:
+        methods = " ".join(f"{k}:{v}" for k, v in sorted(r["sheets_by_method"].items()))
+        lines.append(f"{r['size']:>7}  {r['scenario']:<22}{r['wall_s']:>9.3f}{r['sheets_calls']:>8}"
+                     f"{r['throttled']:>5}{r.get('yf.download', 0):>5}{r.get('news.requests', 0):>6}"
+                     f"{r['peak_mb']:>9.2f}  {methods}")
+    return "\n".join(lines)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark offline del bot (sin red)")
+    ap.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="tamaños de WATCHLIST")
+    ap.add_argument("--sheets-latency", type=float, default=0.02, help="segundos por request a Sheets")
+    ap.add_argument("--quota", type=int, default=0, help="requests por ventana (0 = sin límite)")
+    ap.add_argument("--quota-window", type=float, default=60.0, help="ventana de cuota en segundos")
+    ap.add_argument("--yf-latency", type=float, default=0.2, help="segundos por yf.download")
+    ap.add_argument("--news-latency", type=float, default=0.05, help="segundos por request de noticias")
+    ap.add_argument("--sweep", choices=["grid", "random"], help="incluir barrido en recalibrate")
+    ap.add_argument("--workers", type=int, help="procesos del barrido")
+    ap.add_argument("--out", default="bench_output.txt", help="archivo del reporte")
+    ap.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    ap.add_argument("--json", help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.size is not None:
+        return child(args)
+
+    settings = {k: getattr(args, k) for k in ("sheets_latency", "quota", "quota_window", "yf_latency", "news_latency", "sweep")}
+    results = []
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            out = os.path.join(tmp, "result.json")
+            env = {**os.environ, "SHEETS_BACKEND": "gsheets", "SPREADSHEET_ID": "bench",
+                   "GOOGLE_CREDS_JSON": json.dumps({"private_key": "bench"}),
+                   "GOOGLE_SHEETS_JSON": json.dumps({"private_key": "bench"}),
+                   "ALPHA_VANTAGE_KEY": "bench", "BAR_CACHE_DIR": os.path.join(tmp, "bars"),
+                   "BAR_STORE_OFFLINE": "0", "DEBUG_ARCHIVE_DIR": "", "METRICS_PROM_FILE": "",
+                   "CALIBRATION_STATE": os.path.join(tmp, "calibration", "state.json")}
+            cmd = [sys.executable, os.path.abspath(__file__), "--size", str(size), "--json", out]
+            for k, v in settings.items():
+                if v is not None:
+                    cmd += [f"--{k.replace('_', '-')}", str(v)]
+            if args.workers:
+                cmd += ["--workers", str(args.workers)]
+            print(f"▶️ WATCHLIST={size}…")
+            proc = subprocess.run(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+            if proc.returncode != 0 or not os.path.exists(out):
+                print(f"❌ tamaño {size} falló:\n{proc.stderr[-2000:]}")
+                continue
+            with open(out) as fh:
+                results += json.load(fh)
+    report = format_table(results, settings)
+    print(report)
+    with open(args.out, "w") as fh:
+        fh.write(report + "\n")
+    print(f"💾 Reporte guardado en {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -10,23 +10,27 @@
 # ==========================================================
 
 from bot_config import *
-import yfinance as yf, numpy as np, random, requests, time
+import numpy as np, random, time
+from concurrent.futures import ThreadPoolExecutor
+from perf_index import PerformanceIndex
+from bar_store import BarStore
+from news_client import NewsClient
+from scoring import score_timeframes, load_calibration, CALIBRATION_HEADERS
+from resample import Resampler
 
 # =========================
 # 📰 NOTICIAS Y DIRECCIÓN
 # =========================
-NEWS_ENDPOINT = "https://www.alphavantage.co/query"
 ALPHA_KEY = os.getenv("ALPHA_VANTAGE_KEY", "")
+NEWS = NewsClient(ALPHA_KEY)
 
+@timed("news", ticker_arg="keyword")
 def news_sentiment(keyword="market"):
-    """Evalúa sentimiento de noticias (up/down/neutral)."""
+    """Evalúa sentimiento de noticias (up/down/neutral) desde la caché del cliente."""
     try:
         if not ALPHA_KEY:
             return random.choice(["up","down","neutral"])
-        url = f"{NEWS_ENDPOINT}?function=NEWS_SENTIMENT&tickers={keyword}&apikey={ALPHA_KEY}"
-        data = requests.get(url, timeout=10).json()
-        score = float(data["feed"][0]["overall_sentiment_score"])
-        return "up" if score>0.2 else "down" if score<-0.2 else "neutral"
+        return NEWS.direction(keyword)
     except Exception as e:
         log_debug("news_error", str(e))
         return "neutral"
@@ -34,35 +38,64 @@ def news_sentiment(keyword="market"):
 # =========================
 # 📈 ANÁLISIS DE TICKER
 # =========================
-def analyze_ticker(ticker):
-    """Devuelve dirección, RSI y probabilidad estimada."""
+BARS = BarStore()
+# Una sola descarga del intervalo base; 5m/15m/1h se arman localmente
+BASE_INTERVAL = os.getenv("BAR_BASE_INTERVAL", "1m")
+BASE_PERIOD   = os.getenv("BAR_BASE_PERIOD", "7d")
+RESAMPLER = Resampler(base=BASE_INTERVAL)
+WS_CALIBRATION = ensure_ws("calibration", CALIBRATION_HEADERS)
+MODEL_TTL = int(os.getenv("MODEL_TTL", "21600"))   # relectura de pesos (daemon)
+_MODEL = {"at": None}
+
+def model():
+    """(pesos, parámetros) de la última fila de calibration; por defecto si no hay."""
+    if _MODEL["at"] is None or time.time() - _MODEL["at"] > MODEL_TTL:
+        try:
+            _MODEL["weights"], _MODEL["params"] = load_calibration(WS_CALIBRATION.get_all_values())
+        except Exception as e:
+            log_debug("model_error", str(e))
+            _MODEL["weights"], _MODEL["params"] = load_calibration([])
+        _MODEL["at"] = time.time()
+    return _MODEL["weights"], _MODEL["params"]
+
+def score_tickers(frames):
+    """{tf: {ticker: velas}} → puntaje de todos los tickers (tickers × velas por tf)."""
+    weights, params = model()
+    base = "5m" if "5m" in frames else BASE_INTERVAL
+    return score_timeframes(frames, weights, params, base=base)
+
+@timed("analyze", ticker_arg="ticker")
+def analyze_ticker(ticker, data=None, score=None):
+    """Devuelve dirección, RSI, probabilidad del modelo y columnas del puntaje (ATR/SL/TP/…)."""
     try:
-        data = yf.download(ticker, period="2d", interval="5m", progress=False)
-        if data.empty: raise ValueError("sin datos")
-        data["EMA8"]  = data["Close"].ewm(span=8).mean()
-        data["EMA21"] = data["Close"].ewm(span=21).mean()
-        rsi = 100 - (100/(1+(data["Close"].diff().clip(lower=0).rolling(14).mean()/
-                             data["Close"].diff().clip(upper=0).abs().rolling(14).mean())))
-        last = data.iloc[-1]
-        trend = "up" if last["EMA8"]>last["EMA21"] else "down"
-        prob  = random.uniform(60,95)
-        return trend, round(rsi.iloc[-1],2), round(prob,2)
+        if score is None:
+            if data is None:
+                data = BARS.get(ticker, period=BASE_PERIOD, interval=BASE_INTERVAL)
+            if data.empty: raise ValueError("sin datos")
+            score = score_tickers(RESAMPLER.update_many({ticker: data})).get(ticker)
+            if score is None: raise ValueError("velas insuficientes")
+        return score["side"], score["rsi"], score["ProbFinal"], score
     except Exception as e:
         log_debug("analyze_error", f"{ticker}: {e}")
-        return "neutral", 50, 0
+        return "neutral", 50, 0, {}
 
 # =========================
 # 🧾 REGISTRO DE SEÑALES
 # =========================
-def save_signal(ticker, side, prob, session, note):
+@timed("save_signal", ticker_arg="ticker")
+def save_signal(ticker, side, prob, session, note, levels=None):
     """Guarda señal y crea registro en performance."""
     try:
         now = now_et()
+        lv = levels or {}
         WS_SIGNALS.append_row([
             now.strftime("%Y-%m-%d"), now.strftime("%H:%M:%S"), now.strftime("%H:%M:%S"),
-            ticker, side, "AUTO", "-", "-", "-", "-", prob,
-            "AI_Estimated","Active","Auto","-",
-            note, session, "-", "-", "-", "-", "-", "-", "-", "-", "-", "No"
+            ticker, side, "AUTO",
+            lv.get("Prob_1m","-"), lv.get("Prob_5m","-"), lv.get("Prob_15m","-"), lv.get("Prob_1h","-"),
+            prob, "AI_Estimated","Active","Auto","-",
+            note, session, lv.get("pattern","-"), lv.get("pat_score","-"),
+            lv.get("macd_val","-"), lv.get("sr_score","-"),
+            lv.get("atr","-"), lv.get("SL","-"), lv.get("TP","-"), "-", "No"
         ])
         # Crear registro inicial en performance
         open_performance_entry(
@@ -81,87 +114,192 @@ def save_signal(ticker, side, prob, session, note):
 # =========================
 # 📊 PERFORMANCE — Registro de resultados
 # =========================
-def _perf_key_from_signal(fecha_iso, hora_reg, ticker):
-    return f"{fecha_iso}|{hora_reg}|{ticker.upper()}"
+PERF_INDEX = PerformanceIndex(WS_PERFORMANCE, listener=PERF)
 
+@timed("perf_open", ticker_arg="ticker")
 def open_performance_entry(fecha_iso, hora_reg, ticker, side, entrada, prob_final, nota=""):
     try:
-        rows = WS_PERFORMANCE.get_all_records()
-        key  = _perf_key_from_signal(fecha_iso, hora_reg, ticker)
-        for r in rows:
-            r_key = _perf_key_from_signal(r.get("FechaISO",""), r.get("HoraRegistro",""), r.get("Ticker",""))
-            if r_key == key: return
-        WS_PERFORMANCE.append_row([
+        PERF_INDEX.add([
             fecha_iso, hora_reg, ticker.upper(), side, entrada,
             round(float(prob_final),2) if prob_final not in ("","-",None) else "-",
-            "Open","","","","",nota
+            "Open","","","",nota
         ])
     except Exception as e:
         log_debug("performance_open_error", str(e))
 
 def close_performance_entry(ticker, result, pnl=0, note=""):
     try:
-        df = pd.DataFrame(WS_PERFORMANCE.get_all_records())
-        if df.empty: return
-        df_tk = df[(df["Ticker"].str.upper()==ticker.upper()) & (df["Resultado"]=="Open")]
-        if df_tk.empty: return
-        idx = df_tk.index[-1]+2
         now = now_et()
-        WS_PERFORMANCE.update_cell(idx,7,result)
-        WS_PERFORMANCE.update_cell(idx,8,pnl if pnl!="" else "")
-        WS_PERFORMANCE.update_cell(idx,9,now.strftime("%Y-%m-%d"))
-        WS_PERFORMANCE.update_cell(idx,10,now.strftime("%H:%M:%S"))
-        if note: WS_PERFORMANCE.update_cell(idx,11,note)
+        PERF_INDEX.close(ticker, result,
+                         exit_iso=now.strftime("%Y-%m-%d"), exit_hora=now.strftime("%H:%M:%S"),
+                         pnl=pnl if pnl!="" else "", note=note)
     except Exception as e:
         log_debug("performance_close_error", str(e))
 
 def daily_performance_summary():
     try:
-        df = pd.DataFrame(WS_PERFORMANCE.get_all_records())
-        if df.empty: return
         today = now_et().strftime("%Y-%m-%d")
-        dft = df[df["FechaISO"]==today]
-        if dft.empty: return
-        total=len(dft)
-        wins=(dft["Resultado"]=="Win").sum()
-        loss=(dft["Resultado"]=="Loss").sum()
-        be  =(dft["Resultado"]=="BE").sum()
-        canc=(dft["Resultado"]=="Cancel").sum()
-        pnl_series=pd.to_numeric(dft.get("PnL",pd.Series(dtype=float)),errors="coerce").dropna()
-        pnl_total=round(pnl_series.sum(),2) if not pnl_series.empty else "-"
+        s = PERF.summary(FechaISO=today)
+        if not s["Total"]: return
         log_debug("perf_summary",
-                  f"📈 {today} → Total:{total} | Win:{wins} | Loss:{loss} | BE:{be} | Cancel:{canc} | PnL:{pnl_total}")
+                  f"📈 {today} → Total:{s['Total']} | Win:{s['Win']} | Loss:{s['Loss']} | BE:{s['BE']} | "
+                  f"Cancel:{s['Cancel']} | PnL:{s['PnL']} | WR:{s['Winrate']}% | DD:{s['MaxDD']}")
     except Exception as e:
         log_debug("perf_summary_error", str(e))
 
 # =========================
 # 🚦 CICLO PRINCIPAL
 # =========================
-def run_cycle():
-    for tk in WATCHLIST:
-        state, session = market_status(tk)
-        if state=="closed":
-            upsert_state({"Market":session,"State":"Closed"})
-            continue
-        direction = news_sentiment(tk)
-        side,rsi,prob = analyze_ticker(tk)
-        if direction==side: prob=min(prob+2.5,99)
-        save_signal(tk, side, prob, session, f"RSI:{rsi}")
+def _ticker_pipeline(tk, bars, scores):
+    """Noticias + análisis de un ticker (cada etapa medida por @timed)."""
+    direction = news_sentiment(tk)
+    side, rsi, prob, levels = analyze_ticker(tk, bars.get(tk), scores.get(tk))
+    return direction, side, rsi, prob, levels
+
+def cycle_report(mark=None):
+    """Una fila de debug con p50/p95/max por etapa de lo medido desde `mark`.
+
+    Sin reset: ciclos concurrentes (daemon) no se borran las muestras entre sí
+    y el archivo de Prometheus queda acumulado.
+    """
+    log_debug("cycle_metrics", (METRICS.since(mark) if mark else METRICS).summary())
+    try:
+        METRICS.export()
+    except Exception as e:
+        print("⚠️ metrics export:", e)
+
+def run_cycle(workers=None, tickers=None):
+    t_start = time.perf_counter()
+    mark = METRICS.mark()
+    workers = MAX_WORKERS if workers is None else workers
+    tickers = list(WATCHLIST if tickers is None else tickers)
+    # Sesión de todos los tickers en una sola consulta vectorizada al calendario
+    st = CALENDAR.status(tickers, now_et())
+    for session in dict.fromkeys(st["session"][~st["open"]]):
+        upsert_state({"Market":session,"State":"Closed"})
+    active = [(tk, session) for tk, session, is_open in zip(tickers, st["session"], st["open"]) if is_open]
+
+    # Velas base de todos los tickers en una sola descarga incremental
+    bars = {}
+    if active:
+        try:
+            with span("bars"):
+                bars = BARS.get_many([tk for tk, _ in active], period=BASE_PERIOD, interval=BASE_INTERVAL)
+        except Exception as e:
+            log_debug("bars_error", str(e))
+
+    # Timeframes derivados + puntaje de toda la WATCHLIST en una pasada vectorizada
+    scores = {}
+    if bars:
+        try:
+            with span("resample"):
+                frames = RESAMPLER.update_many(bars)
+            with span("score"):
+                scores = score_tickers(frames)
+        except Exception as e:
+            log_debug("score_error", str(e))
+
+    # Noticias de toda la WATCHLIST en una sola consulta (caché TTL)
+    if active and ALPHA_KEY:
+        try:
+            with span("news_batch"):
+                NEWS.prefetch([tk for tk, _ in active])
+        except Exception as e:
+            log_debug("news_error", str(e))
+
+    # Noticias y análisis de todos los tickers en paralelo (orden preservado por map)
+    results = []
+    if active:
+        with span("fetch"), ThreadPoolExecutor(max_workers=max(1, min(workers, len(active)))) as pool:
+            results = list(pool.map(lambda tk: _ticker_pipeline(tk, bars, scores), [tk for tk, _ in active]))
+
+    # Emisión secuencial, en el orden de WATCHLIST
+    with span("emit"):
+        for (tk, session), (direction, side, rsi, prob, levels) in zip(active, results):
+            if direction==side: prob=min(prob+2.5,99)
+            save_signal(tk, side, prob, session, f"RSI:{rsi}", levels)
+
+    with span("flush"):
+        flush_sheets()
+    METRICS.observe("cycle", time.perf_counter() - t_start)
+    # La fila de resumen queda en el buffer y sale con el próximo flush (o al salir)
+    cycle_report(mark)
+
+# =========================
+# 📡 MODO STREAMING
+# =========================
+# Estado propio: las ventanas del ring (500 velas) no pasan por RESAMPLER (7 días)
+STREAM_RESAMPLER = Resampler(base=BASE_INTERVAL)
+
+def stream_signal(tk, side, snap, ring):
+    """Cruce EMA al cierre de vela → mismo análisis y registro que run_cycle."""
+    state, session = market_status(tk)
+    if state != "open":
+        return
+    direction = news_sentiment(tk)
+    try:
+        score = score_tickers(STREAM_RESAMPLER.update_many({tk: ring.frame()})).get(tk)
+        if score is None: raise ValueError("velas insuficientes")
+    except Exception as e:
+        log_debug("analyze_error", f"{tk}: {e}")
+        return
+    side, rsi, prob, levels = analyze_ticker(tk, score=score)
+    if direction==side: prob=min(prob+2.5,99)
+    note = f"RSI:{rsi} stream" + (" sniper" if snap.get("sniper") else "")
+    save_signal(tk, side, prob, session, note, levels)
+
+def run_stream(source, tickers=None, stop=None):
+    """Ingesta continua desde `source` (ver streaming.py) hasta agotarla o `stop`."""
+    from streaming import StreamEngine
+    tickers = list(WATCHLIST if tickers is None else tickers)
+    mark = METRICS.mark()
+    engine = StreamEngine(BASE_INTERVAL, params=model()[1], on_signal=stream_signal)
+    try:
+        engine.warm(BARS.get_many(tickers, period=BASE_PERIOD, interval=BASE_INTERVAL))
+    except Exception as e:
+        log_debug("bars_error", str(e))
+    log_debug("stream", f"start — tickers:{len(tickers)}")
+    try:
+        stats = engine.run(source, stop, on_idle=flush_sheets)
+    finally:
+        flush_sheets()
+    log_debug("stream", f"stop — {stats}")
+    cycle_report(mark)
+    return stats
 
 # =========================
 # ⏱️ HORARIO ADAPTATIVO
 # =========================
+def schedule_plan(now=None, tickers=None):
+    """(ciclos, intervalo en s) según las sesiones abiertas de la WATCHLIST."""
+    now = now or now_et()
+    st = CALENDAR.status(list(WATCHLIST if tickers is None else tickers), now)
+    sessions = set(st["session"][st["open"]])
+    # NYSE abierta → 4 h continuas cada 30 min
+    if "NYSE" in sessions:
+        return 8, 1800
+    # Solo Globex / cripto → 1 h cada 30 min
+    elif sessions:
+        return 2, 1800
+    return 1, 3600
+
+def next_open(tickers=None, now=None):
+    """Próxima apertura (hora ET) entre los tickers cerrados, o None."""
+    st = CALENDAR.status(list(WATCHLIST if tickers is None else tickers), now or now_et())
+    nxt = st["next_open"][~st["open"] & np.isfinite(st["next_open"])]
+    return dt.fromtimestamp(nxt.min(), TZ_ET) if len(nxt) else None
+
 def adaptive_schedule():
-    now = now_et()
-    hour = now.hour + now.minute/60
-    # Mercado NY (8-13 h ET) → 4 h continuas cada 30 min
-    if 8 <= hour < 13:
-        cycles, interval = 8, 1800
-    # Globex (18-8 h ET) → 1 h cada 30 min
-    elif hour >= 18 or hour < 8:
-        cycles, interval = 2, 1800
-    else:
-        cycles, interval = 1, 3600
+    cycles, interval = schedule_plan()
+
+    if not CALENDAR.status(WATCHLIST, now_et())["open"].any():
+        # Todo cerrado: un ciclo registra el estado Closed y no se espera en vano
+        run_cycle()
+        nxt = next_open()
+        log_debug("adaptive_schedule",
+                  f"Mercados cerrados — próxima apertura {nxt:%Y-%m-%d %H:%M} ET" if nxt else "Mercados cerrados")
+        daily_performance_summary()
+        return
 
     log_debug("adaptive_schedule", f"Ciclos:{cycles} cada {interval/60:.0f} min")
     for i in range(cycles):
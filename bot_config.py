@@ -1,9 +1,15 @@
 # ==========================================================
-# ⚙️ CONFIGURACIÓN BASE — v4.5 (Google Sheets + Auto-Fix Key)
+# ⚙️ CONFIGURACIÓN BASE — v4.6 (Google Sheets perezoso + Auto-Fix Key)
 # ==========================================================
-import os, pytz, gspread, json, pandas as pd
-from google.oauth2.service_account import Credentials
+import os, pytz, atexit
 from datetime import datetime as dt, timedelta
+from sheet_buffer import BufferedSheet, flush_all, take_dropped
+from sheets_client import make_backend, LazyWorksheet
+from state_cache import StateCache
+from perf_analytics import PerfSnapshot
+from debug_rotation import rotate as rotate_debug
+from metrics import METRICS, timed, span
+from trading_calendar import TradingCalendar
 
 # =========================
 # 🕒 ZONA HORARIA Y CICLOS
@@ -12,73 +18,53 @@ TZ_ET = pytz.timezone("US/Eastern")
 SLEEP_SECONDS = 300
 CYCLES = 12
 WATCHLIST = ["ES", "DKNG"]
+MAX_WORKERS = int(os.getenv("BOT_WORKERS", "8"))   # 1 = modo secuencial
+DEBUG_ARCHIVE_DIR = os.getenv("DEBUG_ARCHIVE_DIR", "")  # vacío = sin archivo local
 
 # =========================
-# 🔐 CONEXIÓN GOOGLE SHEETS
+# 🔐 CONEXIÓN GOOGLE SHEETS (perezosa)
 # =========================
+# La autenticación y la verificación de hojas ocurren en el primer uso,
+# no al importar. SHEETS_BACKEND=memory → backend local sin red.
 GOOGLE_CREDS_JSON = os.getenv("GOOGLE_CREDS_JSON")
 SPREADSHEET_ID    = os.getenv("SPREADSHEET_ID")
 
-if not GOOGLE_CREDS_JSON or not SPREADSHEET_ID:
-    raise ValueError("❌ Falta credencial o ID de hoja")
-
-# ✅ Scopes correctos para Sheets + Drive
-scopes = [
-    "https://www.googleapis.com/auth/spreadsheets",
-    "https://www.googleapis.com/auth/drive"
-]
-
-# ✅ Carga segura del JSON (sin eval)
-try:
-    data = json.loads(GOOGLE_CREDS_JSON)
-except json.JSONDecodeError as e:
-    raise ValueError(f"❌ Error al decodificar GOOGLE_CREDS_JSON: {e}")
-
-# ✅ Auto-fix del private_key (corrige \\n rotos en GitHub Secrets)
-if "\\n" in data.get("private_key", ""):
-    data["private_key"] = data["private_key"].replace("\\n", "\n")
-
-# ✅ Autenticación con Google
-try:
-    creds = Credentials.from_service_account_info(data, scopes=scopes)
-    gc    = gspread.authorize(creds)
-    SS    = gc.open_by_key(SPREADSHEET_ID)
-    print("✅ Google Sheets conectado correctamente.")
-except Exception as e:
-    raise RuntimeError(f"❌ Error al conectar con Google Sheets: {e}")
+BACKEND = make_backend()
 
 # ----------------------------------------------------------
 # 🧾 Crear o garantizar hojas existentes
 # ----------------------------------------------------------
 def ensure_ws(title, headers):
-    """Crea la hoja si no existe y garantiza los encabezados."""
-    try:
-        ws = SS.worksheet(title)
-    except gspread.WorksheetNotFound:
-        ws = SS.add_worksheet(title=title, rows=1000, cols=len(headers))
-        ws.update("A1", [headers])
-        print(f"🆕 Hoja creada: {title}")
-        return ws
-    vals = ws.get_all_values()
-    if not vals:
-        ws.update("A1", [headers])
-        print(f"📄 Hoja inicializada: {title}")
-    return ws
-
-# === Hojas principales ===
-WS_SIGNALS = ensure_ws("signals", [
+    """Hoja perezosa: se crea / verifica encabezados al primer acceso."""
+    return LazyWorksheet(BACKEND, title, headers)
+
+# === Hojas principales (escritura diferida en lote) ===
+WS_SIGNALS = BufferedSheet(ensure_ws("signals", [
     "FechaISO","HoraLocal","HoraRegistro","Ticker","Side","Entrada",
     "Prob_1m","Prob_5m","Prob_15m","Prob_1h","ProbFinal","ProbClasificación",
     "Estado","Tipo","Resultado","Nota","Mercado","pattern","pat_score",
     "macd_val","sr_score","atr","SL","TP","Recipients","ScheduledConfirm"
-])
+]))
 
-WS_DEBUG = ensure_ws("debug", ["Fecha","Hora","Mensaje"])
-WS_STATE = ensure_ws("state", ["clave","valor","timestamp"])
-WS_PERFORMANCE = ensure_ws("performance", [
+WS_DEBUG = BufferedSheet(ensure_ws("debug", ["Fecha","Hora","Mensaje"]), lossy=True)
+WS_STATE = BufferedSheet(ensure_ws("state", ["clave","valor","timestamp"]))
+WS_PERFORMANCE = BufferedSheet(ensure_ws("performance", [
     "FechaISO","HoraRegistro","Ticker","Side","Entrada",
     "ProbFinal","Resultado","PnL","ExitISO","ExitHora","Notas"
-])
+]))
+
+STATE = StateCache(WS_STATE)
+PERF = PerfSnapshot(WS_PERFORMANCE)     # agregados de performance (una lectura)
+
+def flush_sheets():
+    """Envía a Sheets todo lo acumulado en los buffers (fin de ciclo)."""
+    STATE.flush()
+    flush_all()
+    dropped = take_dropped()
+    if dropped:
+        log_debug("sheets_dropped", ", ".join(f"{k}:{v}" for k, v in dropped.items()))
+
+atexit.register(flush_sheets)
 
 # ----------------------------------------------------------
 # 📧 CORREOS / ALERTAS
@@ -99,6 +85,8 @@ def now_et():
 
 def log_debug(tag, msg):
     """Registra mensajes de debug en la hoja correspondiente."""
+    if tag.endswith("_error"):
+        METRICS.incr(tag)
     try:
         now = now_et()
         WS_DEBUG.append_row([
@@ -109,46 +97,30 @@ def log_debug(tag, msg):
     except Exception as e:
         print("⚠️ Log failed:", e)
 
-def purge_old_debug(days=7):
-    """Limpia registros antiguos en la hoja debug."""
+def purge_old_debug(days=7, archive_dir=None):
+    """Rota la hoja debug: borra en un solo request lo anterior a `days` días."""
     try:
-        df = pd.DataFrame(WS_DEBUG.get_all_records())
-        if df.empty: 
-            return
-        df["Fecha"] = pd.to_datetime(df["Fecha"], errors="coerce")
-        df = df[df["Fecha"] >= now_et() - timedelta(days=days)]
-        WS_DEBUG.clear()
-        WS_DEBUG.update("A1", [["Fecha","Hora","Mensaje"]])
-        for _, r in df.iterrows():
-            WS_DEBUG.append_row(r.tolist())
+        cutoff = (now_et() - timedelta(days=days)).strftime("%Y-%m-%d")
+        purged = rotate_debug(WS_DEBUG, cutoff, archive_dir or DEBUG_ARCHIVE_DIR or None)
+        if purged:
+            print(f"🧹 Debug rotado: {purged} filas anteriores a {cutoff}")
     except Exception as e:
         print("⚠️ purge_old_debug:", e)
 
 def read_state_today():
-    """Lee el estado global del día."""
-    vals = WS_STATE.get_all_records()
-    return {v["clave"]: v["valor"] for v in vals if v.get("clave")}
+    """Lee el estado global del día (desde la caché)."""
+    return STATE.snapshot()
 
+@timed("upsert_state")
 def upsert_state(kv):
-    """Actualiza o inserta valores en la hoja de estado."""
-    vals = WS_STATE.get_all_records()
-    df = pd.DataFrame(vals)
-    for k, v in kv.items():
-        if not df.empty and k in df["clave"].values:
-            row = df.index[df["clave"] == k][0] + 2
-            WS_STATE.update_cell(row, 2, v)
-            WS_STATE.update_cell(row, 3, now_et().strftime("%Y-%m-%d %H:%M:%S"))
-        else:
-            WS_STATE.append_row([k, v, now_et().strftime("%Y-%m-%d %H:%M:%S")])
+    """Actualiza o inserta valores en la hoja de estado (se envían en flush_sheets)."""
+    STATE.set(kv, now_et().strftime("%Y-%m-%d %H:%M:%S"))
 
 # ----------------------------------------------------------
 # 📈 ESTADO DE MERCADO
 # ----------------------------------------------------------
-def market_status(ticker):
-    """Determina si el mercado está abierto o cerrado."""
-    now = now_et()
-    hour = now.hour + now.minute/60
-    if ticker.upper() == "ES":
-        return ("open","Globex") if (hour >= 18 or hour <= 17) else ("closed","Globex")
-    else:
-        return ("open","NYSE") if 9.5 <= hour <= 16 else ("closed","NYSE")
+CALENDAR = TradingCalendar()   # sesiones Globex / NYSE / Cripto precalculadas
+
+def market_status(ticker, now=None):
+    """Determina si el mercado está abierto o cerrado: ("open"|"closed", sesión)."""
+    return CALENDAR.market_status(ticker, now or now_et())
@@ -0,0 +1,258 @@
+# ==========================================================
+# 📐 CALIBRADOR INCREMENTAL — walk-forward sobre operaciones cerradas
+# ==========================================================
+# ✅ Estado pequeño persistido (JSON): marca de agua + estadísticos
+# ✅ Cada corrida incorpora solo las filas cerradas desde la marca:
+#    costo O(operaciones nuevas), no O(historia); una fila abierta
+#    más vieja que el horizonte de cierre ya no frena la marca
+# ✅ Conteos + momentos con decaimiento exponencial (vida media en
+#    días) globales, por ticker y por bucket de ProbFinal
+# ✅ Curva de confiabilidad ProbFinal → winrate realizado (monótona)
+# ✅ Walk-forward: las operaciones nuevas se puntúan (Brier) con la
+#    curva anterior antes de incorporarlas
+# ==========================================================
+import os, json, time
+import numpy as np
+import pandas as pd
+from gspread.utils import rowcol_to_a1
+
+STATE_PATH     = os.getenv("CALIBRATION_STATE", ".calibration/state.json")
+HALF_LIFE_DAYS = float(os.getenv("CALIBRATION_HALFLIFE_DAYS", "30"))
+RECENT_DAYS    = int(os.getenv("CALIBRATION_RECENT_DAYS", "60"))   # operaciones guardadas para el barrido
+SETTLE_DAYS    = int(os.getenv("CALIBRATION_SETTLE_DAYS", "7"))    # abierta más días → se abandona
+TZ             = "US/Eastern"
+VERSION        = 1
+
+BUCKETS = np.linspace(0, 100, 11)          # 10 buckets de ProbFinal
+PRIOR   = 2.0                              # pseudo-operaciones hacia el winrate global
+SETTLED = {"Win", "Loss", "BE", "Cancel"}  # filas que ya no cambian
+STATS   = ("n", "wins", "w", "w_win", "w_prob", "w_prob_win", "w_prob2")
+_I      = {k: i for i, k in enumerate(STATS)}
+RECENT_COLS = ["FechaISO", "HoraRegistro", "Ticker", "Side", "ProbFinal", "Resultado", "ts"]
+RELIABILITY_HEADERS = ["Bucket", "Desde", "Hasta", "N", "Wins", "PesoDecay",
+                       "ProbMedia", "WinrateDecay", "Calibrada"]
+
+def row_key(r):
+    r = list(r) + [""] * (3 - len(r))
+    return f"{r[0]}|{r[1]}|{str(r[2]).upper()}"
+
+def bucket_of(prob):
+    return np.clip(np.digitize(prob, BUCKETS[1:-1]), 0, len(BUCKETS) - 2)
+
+def _pav(y, w):
+    """Regresión isotónica (pool adjacent violators) creciente y ponderada."""
+    blocks = []                            # [valor, peso, tamaño]
+    for yi, wi in zip(y, w):
+        blocks.append([yi, wi, 1])
+        while len(blocks) > 1 and blocks[-2][0] > blocks[-1][0]:
+            v2, w2, n2 = blocks.pop()
+            v1, w1, n1 = blocks[-1]
+            tw = w1 + w2
+            blocks[-1] = [(v1 * w1 + v2 * w2) / tw if tw else (v1 + v2) / 2, tw, n1 + n2]
+    return np.concatenate([np.full(n, v) for v, _, n in blocks]) if blocks else np.array([])
+
+def _fallback(df, col, other):
+    """Columna `col` como texto; vacía → la de `other`."""
+    alt = df[other].astype(str)
+    if col not in df:
+        return alt
+    v = df[col].astype(str)
+    return v.where(v.str.strip() != "", alt)
+
+class Calibrator:
+    """Estadísticos de calibración que se actualizan solo con operaciones nuevas."""
+
+    def __init__(self, path=STATE_PATH, half_life_days=HALF_LIFE_DAYS):
+        self.path = path
+        self.half_life = half_life_days * 86400
+        self.reset()
+
+    def reset(self):
+        self.watermark, self.watermark_key = 1, None   # última fila contigua incorporada (+ su clave)
+        self.folded = set()          # filas > marca ya incorporadas (cerradas fuera de orden)
+        self.as_of = None            # época de referencia del decaimiento
+        self.total = np.zeros(len(STATS))
+        self.buckets = np.zeros((len(BUCKETS) - 1, len(STATS)))
+        self.tickers = {}            # ticker → vector STATS
+        self.walk_forward = {"w": 0.0, "brier": 0.0, "brier_raw": 0.0, "n": 0}
+        self.recent = pd.DataFrame(columns=RECENT_COLS)
+
+    # === Persistencia ===
+    @classmethod
+    def load(cls, path=STATE_PATH, **kwargs):
+        cal = cls(path, **kwargs)
+        try:
+            with open(path) as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            return cal
+        if data.get("version") != VERSION:
+            return cal
+        cal.watermark, cal.watermark_key = data["watermark"], data["watermark_key"]
+        cal.folded = set(data["folded"])
+        cal.as_of = data["as_of"]
+        cal.total = np.array(data["total"], float)
+        cal.buckets = np.array(data["buckets"], float)
+        cal.tickers = {tk: np.array(v, float) for tk, v in data["tickers"].items()}
+        cal.walk_forward = data["walk_forward"]
+        cal.recent = pd.DataFrame(data["recent"], columns=RECENT_COLS)
+        return cal
+
+    def save(self, path=None):
+        """Escribe el estado (atómico)."""
+        path = path or self.path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        data = {"version": VERSION, "watermark": self.watermark, "watermark_key": self.watermark_key,
+                "folded": sorted(self.folded), "as_of": self.as_of,
+                "total": self.total.tolist(), "buckets": self.buckets.tolist(),
+                "tickers": {tk: v.tolist() for tk, v in self.tickers.items()},
+                "walk_forward": self.walk_forward,
+                "recent": self.recent[RECENT_COLS].astype(object).values.tolist()}
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as fh:
+            json.dump(data, fh)
+        os.replace(tmp, path)
+        return path
+
+    # === Lectura incremental ===
+    @staticmethod
+    def _read(ws, head, first):
+        """Filas desde `first` hasta el final (columnas del encabezado)."""
+        last = rowcol_to_a1(1, max(len(head), 1))[:-1]
+        return ws.get(f"A{first}:{last}")
+
+    def update(self, ws, now=None):
+        """Incorpora las operaciones cerradas nuevas de `ws`. Devuelve cuántas.
+
+        Filas aún abiertas dentro de SETTLE_DAYS frenan la marca (se releen en la
+        próxima corrida); las más viejas se abandonan y la marca las pasa.
+        """
+        now = float(now if now is not None else time.time())
+        head = ws.row_values(1)
+        rows = self._read(ws, head, self.watermark)
+        if self.watermark_key is not None and (not rows or row_key(rows[0]) != self.watermark_key):
+            # La hoja cambió por debajo de la marca (filas borradas/reordenadas): rehace todo
+            self.reset()
+            rows = self._read(ws, head, 1)
+        start, width = self.watermark, len(head)
+        if not rows or not width:
+            return 0
+        frame = pd.DataFrame([list(r[:width]) + [""] * (width - len(r)) for r in rows], columns=head)
+        frame["row"] = np.arange(start, start + len(frame))
+        frame = frame[frame["row"] > start]     # la fila de la marca solo verifica la clave
+        if "Resultado" not in frame:
+            return 0
+        settled = frame["Resultado"].astype(str).isin(SETTLED)
+        fresh = frame[settled & ~frame["row"].isin(self.folded)]
+        added = self.fold(fresh, now)
+        # Abiertas fuera del horizonte (o sin fecha): nunca se cerraron, no frenan la marca
+        cutoff = pd.Timestamp(now, unit="s", tz=TZ).tz_localize(None).normalize() - pd.Timedelta(days=SETTLE_DAYS)
+        reg = pd.to_datetime(frame["FechaISO"] if "FechaISO" in frame else pd.Series(index=frame.index, dtype=object),
+                             errors="coerce", format="%Y-%m-%d")
+        stale = ~settled & (reg.isna() | (reg < cutoff))
+        # Avanza la marca sobre el prefijo contiguo de filas cerradas o abandonadas
+        done = self.folded | {int(r) for r in frame.loc[settled | stale, "row"]}
+        wm = self.watermark
+        while wm + 1 in done:
+            wm += 1
+        self.watermark, self.watermark_key = wm, row_key(rows[wm - start])
+        self.folded = {r for r in done if r > wm}
+        return added
+
+    # === Incorporación ===
+    def _decay(self, now):
+        if self.as_of is not None and now > self.as_of:
+            f = 0.5 ** ((now - self.as_of) / self.half_life)
+            for arr in [self.total, self.buckets, *self.tickers.values()]:
+                arr[..., _I["w"]:] *= f
+            self.walk_forward = {k: (v * f if k != "n" else v) for k, v in self.walk_forward.items()}
+        self.as_of = max(now, self.as_of or now)
+
+    def fold(self, trades, now=None):
+        """Win/Loss de `trades` → estadísticos (vectorizado). Devuelve cuántas."""
+        now = float(now if now is not None else time.time())
+        self._decay(now)
+        df = trades[trades["Resultado"].isin(["Win", "Loss"])].copy() if len(trades) else trades
+        if not len(df):
+            return 0
+        df["ProbFinal"] = pd.to_numeric(df["ProbFinal"], errors="coerce")
+        df = df[df["ProbFinal"].notna()]
+        if not len(df):
+            return 0
+        # Instante de la operación: salida si existe, si no el registro
+        ts = pd.to_datetime(_fallback(df, "ExitISO", "FechaISO") + " " + _fallback(df, "ExitHora", "HoraRegistro"),
+                            errors="coerce")
+        ts = pd.DatetimeIndex(ts).tz_localize(TZ, ambiguous="NaT", nonexistent="NaT")
+        df["ts"] = np.where(ts.isna(), now, ts.as_unit("s").asi8.astype(float))
+        prob = df["ProbFinal"].to_numpy(float)
+        won = (df["Resultado"] == "Win").to_numpy(float)
+
+        w = np.minimum(1.0, 0.5 ** ((now - df["ts"].to_numpy()) / self.half_life))
+
+        # Walk-forward: puntaje con la curva anterior, antes de aprender de estas filas
+        if self.total[_I["n"]]:
+            pred = self.calibrate(prob) / 100
+            wf = self.walk_forward
+            wf["w"] += w.sum(); wf["n"] += len(prob)
+            wf["brier"] += (w * (pred - won) ** 2).sum()
+            wf["brier_raw"] += (w * (prob / 100 - won) ** 2).sum()
+
+        contrib = np.column_stack([np.ones(len(w)), won, w, w * won, w * prob, w * prob * won, w * prob ** 2])
+        self.total += contrib.sum(0)
+        np.add.at(self.buckets, bucket_of(prob), contrib)
+        tks = df["Ticker"].astype(str).str.upper().to_numpy()
+        for tk, vec in pd.DataFrame(contrib, columns=STATS).groupby(tks).sum().iterrows():
+            self.tickers[tk] = self.tickers.get(tk, np.zeros(len(STATS))) + vec.to_numpy()
+
+        # Ventana reciente (para el barrido de parámetros)
+        cutoff = now - RECENT_DAYS * 86400
+        fresh = df.reindex(columns=RECENT_COLS)
+        keep = pd.concat([self.recent, fresh], ignore_index=True) if len(self.recent) else fresh
+        self.recent = keep[pd.to_numeric(keep["ts"]) >= cutoff].reset_index(drop=True)
+        return len(df)
+
+    # === Consultas ===
+    def summary(self):
+        t, wf = self.total.tolist(), self.walk_forward
+
+        def ratio(a, b, digits=2):
+            return round(float(a) / float(b), digits) if b else None
+        return {"n": int(t[_I["n"]]), "wins": int(t[_I["wins"]]),
+                "winrate": ratio(100 * t[_I["w_win"]], t[_I["w"]]) or 0.0,
+                "avg_prob": ratio(t[_I["w_prob"]], t[_I["w"]]),
+                "avg_win_prob": ratio(t[_I["w_prob_win"]], t[_I["w_win"]]),
+                "brier": ratio(wf["brier"], wf["w"], 4),
+                "brier_raw": ratio(wf["brier_raw"], wf["w"], 4)}
+
+    def ticker_stats(self):
+        """Winrate y ProbFinal medios (con decaimiento) por ticker."""
+        rows = []
+        for tk, v in sorted(self.tickers.items()):
+            rows.append({"Ticker": tk, "N": int(v[_I["n"]]), "Wins": int(v[_I["wins"]]),
+                         "WinrateDecay": v[_I["w_win"]] / v[_I["w"]] * 100 if v[_I["w"]] else np.nan,
+                         "ProbMedia": v[_I["w_prob"]] / v[_I["w"]] if v[_I["w"]] else np.nan})
+        return pd.DataFrame(rows)
+
+    def reliability(self):
+        """Curva de confiabilidad por bucket: ProbFinal media → winrate realizado."""
+        b = self.buckets
+        base = self.total[_I["w_win"]] / self.total[_I["w"]] if self.total[_I["w"]] else 0.5
+        w = b[:, _I["w"]]
+        realized = (b[:, _I["w_win"]] + PRIOR * base) / (w + PRIOR)
+        mid = (BUCKETS[:-1] + BUCKETS[1:]) / 2
+        mean_prob = np.where(w > 0, b[:, _I["w_prob"]] / np.where(w > 0, w, 1), mid)
+        return pd.DataFrame({"Bucket": np.arange(len(mid)), "Desde": BUCKETS[:-1], "Hasta": BUCKETS[1:],
+                             "N": b[:, _I["n"]].astype(int), "Wins": b[:, _I["wins"]].astype(int),
+                             "PesoDecay": w, "ProbMedia": mean_prob, "WinrateDecay": realized * 100,
+                             "Calibrada": _pav(realized * 100, np.where(w > 0, w + PRIOR, 1e-9))})
+
+    def calibrate(self, prob):
+        """ProbFinal (0–100) → probabilidad calibrada (0–100) por interpolación en la curva."""
+        curve = self.reliability()
+        x = curve["ProbMedia"].to_numpy()
+        order = np.argsort(x, kind="stable")
+        return np.interp(np.asarray(prob, float), x[order], curve["Calibrada"].to_numpy()[order])
+
+    def trades(self):
+        """Operaciones Win/Loss de la ventana reciente (FechaISO, HoraRegistro, Ticker, Side, …)."""
+        return self.recent.drop(columns="ts")
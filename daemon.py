@@ -0,0 +1,138 @@
+# ==========================================================
+# 🛰️ DAEMON — ejecución continua con planificador asyncio
+# ==========================================================
+# ✅ Un solo proceso: conexión Google y hojas se reutilizan
+# ✅ Ciclo al abrir cada sesión (calendario de mercado) y luego cada
+#    intervalo de schedule_plan (heap de vencimientos por ticker)
+# ✅ Sesiones de todos los tickers en una consulta vectorizada;
+#    la espera se acorta hasta el próximo borde de sesión
+# ✅ Nunca dos ciclos simultáneos para el mismo ticker
+# ✅ SIGTERM/SIGINT → espera ciclos en curso, vacía buffers y sale
+# ==========================================================
+import os, time, heapq, signal, asyncio
+import numpy as np
+from bot_config import WATCHLIST, CALENDAR, upsert_state, log_debug, flush_sheets, now_et
+from bot import run_cycle, schedule_plan, daily_performance_summary
+
+TICK_SECONDS  = int(os.getenv("DAEMON_TICK", "60"))
+SUMMARY_HOUR  = int(os.getenv("DAEMON_SUMMARY_HOUR", "17"))
+
+class Daemon:
+    """Planificador por ticker sobre un único event loop."""
+
+    def __init__(self, tickers=None, tick=TICK_SECONDS):
+        self.tickers = list(tickers or WATCHLIST)
+        self.tick = tick
+        self.heap = []          # (vencimiento, ticker)
+        self.due = {}           # ticker → vencimiento vigente (borrado perezoso del heap)
+        self.running = set()
+        self.sessions = {}      # ticker → (estado, sesión)
+        self.next_edge = None   # próxima apertura/cierre entre todos los tickers (época s)
+        self.tasks = set()
+        self.summary_day = None
+        self.stop = None
+
+    # === Agenda ===
+    def schedule(self, tk, when):
+        self.due[tk] = when
+        heapq.heappush(self.heap, (when, tk))
+
+    def pop_due(self, now):
+        """Tickers vencidos, abiertos y sin ciclo en curso."""
+        ready = []
+        while self.heap and self.heap[0][0] <= now:
+            when, tk = heapq.heappop(self.heap)
+            if self.due.get(tk) != when:
+                continue
+            del self.due[tk]
+            if tk not in self.running and self.sessions.get(tk, ("closed",))[0] == "open":
+                ready.append(tk)
+        return ready
+
+    def poll_sessions(self, now):
+        """Bordes de sesión: al abrir → ciclo inmediato; al cerrar → estado Closed."""
+        closed = []
+        st = CALENDAR.status(self.tickers, now_et())
+        edges = np.where(st["open"], st["close_at"], st["next_open"])
+        edges = edges[np.isfinite(edges)]
+        self.next_edge = float(edges.min()) if len(edges) else None
+        for tk, is_open, session in zip(self.tickers, st["open"], st["session"]):
+            prev = self.sessions.get(tk, (None, None))[0]
+            state = "open" if is_open else "closed"
+            self.sessions[tk] = (state, session)
+            if state == "open" and prev != "open":
+                self.schedule(tk, now)
+            elif state == "closed" and prev != "closed":
+                self.due.pop(tk, None)
+                closed.append(session)
+        return closed
+
+    # === Ejecución ===
+    async def _cycle(self, tickers):
+        loop = asyncio.get_running_loop()
+        self.running.update(tickers)
+        try:
+            await loop.run_in_executor(None, run_cycle, None, tickers)
+        except Exception as e:
+            log_debug("daemon_cycle_error", str(e))
+        finally:
+            self.running.difference_update(tickers)
+            _, interval = schedule_plan()
+            for tk in tickers:
+                if self.sessions.get(tk, ("closed",))[0] == "open" and tk not in self.due:
+                    self.schedule(tk, time.time() + interval)
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    @staticmethod
+    def _mark_closed(session):
+        upsert_state({"Market": session, "State": "Closed"})
+        flush_sheets()
+
+    async def _blocking(self, fn, *args):
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+        except Exception as e:
+            log_debug("daemon_error", f"{getattr(fn, '__name__', fn)}: {e}")
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        self.stop = asyncio.Event()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, self.stop.set)
+        log_debug("daemon", f"start — tickers:{','.join(self.tickers)}")
+
+        while not self.stop.is_set():
+            now = time.time()
+            for session in dict.fromkeys(self.poll_sessions(now)):
+                self._spawn(self._blocking(self._mark_closed, session))
+            ready = self.pop_due(now)
+            if ready:
+                self._spawn(self._cycle(ready))
+
+            et = now_et()
+            if et.hour >= SUMMARY_HOUR and self.summary_day != et.date():
+                self.summary_day = et.date()
+                self._spawn(self._blocking(daily_performance_summary))
+
+            wait = self.tick if not self.heap else min(self.tick, max(0.0, self.heap[0][0] - time.time()))
+            if self.next_edge is not None:
+                wait = min(wait, max(0.0, self.next_edge - time.time()) + 1)
+            try:
+                await asyncio.wait_for(self.stop.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+        # Apagado ordenado
+        if self.tasks:
+            await asyncio.gather(*list(self.tasks), return_exceptions=True)
+        log_debug("daemon", "stop")
+        flush_sheets()
+
+if __name__ == "__main__":
+    print("🛰️ Trading Bot 2025 — modo daemon (Ctrl+C / SIGTERM para salir)")
+    asyncio.run(Daemon().run())
+    print("✅ Daemon detenido correctamente.")
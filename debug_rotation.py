@@ -0,0 +1,41 @@
+# ==========================================================
+# 🔄 ROTACIÓN DEL LOG DEBUG — borrado incremental en servidor
+# ==========================================================
+# ✅ Las filas se agregan en orden temporal → búsqueda binaria
+#    del corte sobre la columna Fecha (una sola lectura de columna)
+# ✅ Un único delete_rows para todo el rango vencido
+# ✅ Archivo opcional de lo purgado: CSV gzip por día
+# ==========================================================
+import os, csv, gzip, bisect
+from collections import defaultdict
+
+def find_cutoff(dates, cutoff):
+    """Primera fila (1-based, sin encabezado) con fecha ≥ cutoff.
+
+    `dates` es la columna A completa (índice 0 = encabezado). Las fechas
+    ISO ('YYYY-MM-DD' o 'YYYY-MM-DDTHH:MM:SS') ordenan como texto.
+    """
+    return bisect.bisect_left(dates, cutoff, lo=1) + 1
+
+def archive_rows(rows, archive_dir, prefix="debug"):
+    """Agrega las filas a archive_dir/<prefix>-YYYY-MM-DD.csv.gz (uno por día)."""
+    by_day = defaultdict(list)
+    for r in rows:
+        by_day[str(r[0])[:10] if r else "sin-fecha"].append(r)
+    os.makedirs(archive_dir, exist_ok=True)
+    for day, day_rows in by_day.items():
+        path = os.path.join(archive_dir, f"{prefix}-{day}.csv.gz")
+        with gzip.open(path, "at", newline="", encoding="utf-8") as fh:
+            csv.writer(fh).writerows(day_rows)
+    return sorted(by_day)
+
+def rotate(ws, cutoff, archive_dir=None, last_col="C"):
+    """Elimina las filas con fecha < cutoff. Devuelve la cantidad purgada."""
+    dates = ws.col_values(1)
+    end = find_cutoff(dates, cutoff) - 1      # última fila vencida
+    if end < 2:
+        return 0
+    if archive_dir:
+        archive_rows(ws.get(f"A2:{last_col}{end}"), archive_dir)
+    ws.delete_rows(2, end)
+    return end - 1
@@ -0,0 +1,221 @@
+# ==========================================================
+# 📐 INDICADORES — EMA / RSI / MACD (incremental + NumPy)
+# ==========================================================
+# ✅ Una sola definición para bot.py y recalibrate.py
+#    · EMA: ewm(span, adjust=False) — semilla = primer cierre
+#    · RSI: medias simples de ganancias/pérdidas (ventana 14)
+#           sin pérdidas → 100 ; mercado plano → 50
+# ✅ Objetos con __slots__: O(1) por vela nueva + arranque en caliente
+# ✅ Versión batch vectorizada con NumPy (mismos valores), también
+#    sobre matrices tickers × velas
+# ==========================================================
+import numpy as np
+
+# ----------------------------------------------------------
+# ⚡ Batch (NumPy)
+# ----------------------------------------------------------
+def ema_np(x, span):
+    """EMA(adjust=False) vectorizada por bloques (sin bucle por vela).
+
+    Acepta una serie o una matriz (tickers × velas): opera sobre el último eje.
+    """
+    x = np.asarray(x, dtype=float)
+    out = np.empty_like(x)
+    if not x.shape[-1]:
+        return out
+    a = 2.0 / (span + 1)
+    w = 1.0 - a
+    # Bloques donde w**k no se desborda (w**block ≥ 1e-150)
+    block = max(1, int(-150 * np.log(10) / np.log(w)))
+    prev = x[..., :1]
+    for s in range(0, x.shape[-1], block):
+        xb = x[..., s:s+block]
+        wp = w ** np.arange(1, xb.shape[-1] + 1)
+        out[..., s:s+xb.shape[-1]] = wp * (prev + a * np.cumsum(xb / wp, axis=-1))
+        prev = out[..., s+xb.shape[-1]-1:s+xb.shape[-1]]
+    return out
+
+def _rsi_from_sums(gain, loss):
+    # Escalares (RSI incremental) como ndarray: la división por cero da inf, no excepción
+    gain, loss = np.asarray(gain, dtype=float), np.asarray(loss, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100.0 - 100.0 / (1.0 + gain / loss)
+    rsi = np.where(loss <= 0, 100.0, rsi)
+    return np.where((gain <= 0) & (loss <= 0), 50.0, rsi)
+
+def rsi_np(x, period=14):
+    """RSI con medias simples; NaN en las primeras `period` velas (último eje)."""
+    x = np.asarray(x, dtype=float)
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] <= period:
+        return out
+    d = np.diff(x, axis=-1)
+    win = np.lib.stride_tricks.sliding_window_view(d, period, axis=-1)
+    gain = np.clip(win, 0, None).sum(axis=-1)
+    loss = np.clip(-win, 0, None).sum(axis=-1)
+    out[..., period:] = _rsi_from_sums(gain, loss)
+    return out
+
+def macd_np(x, fast=12, slow=26, signal=9):
+    """Devuelve (línea MACD, señal)."""
+    line = ema_np(x, fast) - ema_np(x, slow)
+    return line, ema_np(line, signal)
+
+def atr_np(high, low, close, period=14):
+    """ATR con media simple del rango verdadero; NaN en las primeras `period` velas."""
+    high, low, close = (np.asarray(v, dtype=float) for v in (high, low, close))
+    out = np.full(close.shape, np.nan)
+    if close.shape[-1] <= period:
+        return out
+    prev = close[..., :-1]
+    tr = np.maximum(high[..., 1:] - low[..., 1:],
+                    np.maximum(np.abs(high[..., 1:] - prev), np.abs(low[..., 1:] - prev)))
+    out[..., period:] = np.lib.stride_tricks.sliding_window_view(tr, period, axis=-1).mean(axis=-1)
+    return out
+
+# ----------------------------------------------------------
+# 🔁 Incremental (O(1) por vela)
+# ----------------------------------------------------------
+class EMA:
+    __slots__ = ("span", "alpha", "value")
+
+    def __init__(self, span):
+        self.span = span
+        self.alpha = 2.0 / (span + 1)
+        self.value = None
+
+    def peek(self, x):
+        """Valor que tendría con la vela x, sin modificar el estado."""
+        return x if self.value is None else self.value + self.alpha * (x - self.value)
+
+    def update(self, x):
+        self.value = self.peek(x)
+        return self.value
+
+    def warm(self, xs):
+        if len(xs):
+            self.value = float(ema_np(xs, self.span)[-1]) if self.value is None \
+                else float(ema_np(np.r_[self.value, xs], self.span)[-1])
+        return self
+
+class RSI:
+    __slots__ = ("period", "_deltas", "_pos", "_count", "_gain", "_loss", "_prev", "value")
+
+    def __init__(self, period=14):
+        self.period = period
+        self._deltas = np.zeros(period)
+        self._pos = self._count = 0
+        self._gain = self._loss = 0.0
+        self._prev = None
+        self.value = np.nan
+
+    def _sums_with(self, d):
+        old = self._deltas[self._pos] if self._count >= self.period else 0.0
+        gain = self._gain + max(d, 0.0) - max(old, 0.0)
+        loss = self._loss + max(-d, 0.0) - max(-old, 0.0)
+        return max(gain, 0.0), max(loss, 0.0)
+
+    def peek(self, x):
+        if self._prev is None or self._count + 1 < self.period:
+            return np.nan
+        gain, loss = self._sums_with(x - self._prev)
+        return float(_rsi_from_sums(gain, loss))
+
+    def update(self, x):
+        if self._prev is not None:
+            d = x - self._prev
+            self._gain, self._loss = self._sums_with(d)
+            self._deltas[self._pos] = d
+            self._pos = (self._pos + 1) % self.period
+            self._count += 1
+            if self._count >= self.period:
+                self.value = float(_rsi_from_sums(self._gain, self._loss))
+        self._prev = x
+        return self.value
+
+    def _ordered(self):
+        if self._count >= self.period:
+            return np.r_[self._deltas[self._pos:], self._deltas[:self._pos]]
+        return self._deltas[:self._count]
+
+    def warm(self, xs):
+        xs = np.asarray(xs, dtype=float)
+        if not len(xs):
+            return self
+        if self._prev is not None:
+            xs = np.r_[self._prev, xs]
+        d = np.diff(xs)
+        if len(d):
+            # Solo las últimas `period` diferencias definen el estado
+            hist = np.r_[self._ordered(), d][-self.period:]
+            self._count += len(d)
+            self._deltas[:] = 0.0
+            self._deltas[:len(hist)] = hist
+            self._pos = len(hist) % self.period
+            self._gain = float(np.clip(hist, 0, None).sum())
+            self._loss = float(np.clip(-hist, 0, None).sum())
+            if self._count >= self.period:
+                self.value = float(_rsi_from_sums(self._gain, self._loss))
+        self._prev = float(xs[-1])
+        return self
+
+class MACD:
+    __slots__ = ("fast", "slow", "signal", "value")
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast, self.slow, self.signal = EMA(fast), EMA(slow), EMA(signal)
+        self.value = (None, None)
+
+    def peek(self, x):
+        line = self.fast.peek(x) - self.slow.peek(x)
+        return line, self.signal.peek(line)
+
+    def update(self, x):
+        line = self.fast.update(x) - self.slow.update(x)
+        self.value = (line, self.signal.update(line))
+        return self.value
+
+    def warm(self, xs):
+        xs = np.asarray(xs, dtype=float)
+        if not len(xs):
+            return self
+        f0, s0 = self.fast.value, self.slow.value
+        fast = ema_np(xs if f0 is None else np.r_[f0, xs], self.fast.span)[-len(xs):]
+        slow = ema_np(xs if s0 is None else np.r_[s0, xs], self.slow.span)[-len(xs):]
+        self.fast.value, self.slow.value = float(fast[-1]), float(slow[-1])
+        self.signal.warm(fast - slow)
+        self.value = (float(fast[-1] - slow[-1]), self.signal.value)
+        return self
+
+class IndicatorSet:
+    """EMA rápida/lenta + RSI + MACD de un ticker."""
+    __slots__ = ("ema_fast", "ema_slow", "rsi", "macd", "last_ts")
+
+    def __init__(self, fast=8, slow=21, rsi_period=14, macd=(12, 26, 9)):
+        self.ema_fast, self.ema_slow = EMA(fast), EMA(slow)
+        self.rsi = RSI(rsi_period)
+        self.macd = MACD(*macd)
+        self.last_ts = None
+
+    def update(self, x, ts=None):
+        self.ema_fast.update(x); self.ema_slow.update(x)
+        self.rsi.update(x); self.macd.update(x)
+        self.last_ts = ts
+        return self.snapshot()
+
+    def warm(self, xs, ts=None):
+        for ind in (self.ema_fast, self.ema_slow, self.rsi, self.macd):
+            ind.warm(xs)
+        self.last_ts = ts
+        return self
+
+    def snapshot(self):
+        return {"ema_fast": self.ema_fast.value, "ema_slow": self.ema_slow.value,
+                "rsi": self.rsi.value, "macd": self.macd.value[0], "macd_signal": self.macd.value[1]}
+
+    def peek(self, x):
+        """Valores con una vela aún abierta (no se guarda en el estado)."""
+        line, sig = self.macd.peek(x)
+        return {"ema_fast": self.ema_fast.peek(x), "ema_slow": self.ema_slow.peek(x),
+                "rsi": self.rsi.peek(x), "macd": line, "macd_signal": sig}
+
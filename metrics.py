@@ -0,0 +1,191 @@
+# ==========================================================
+# ⏱️ MÉTRICAS — tiempos y contadores del camino caliente
+# ==========================================================
+# ✅ @timed(etapa) y with span(etapa, ticker) → latencias por etapa/ticker
+# ✅ Contadores (errores por tag de log_debug, llamadas a Sheets)
+# ✅ Resumen p50/p95/max + llamadas en una sola fila por ciclo
+#    (mark/since: ventana por ciclo, sin reset global entre ciclos concurrentes)
+# ✅ Exportación opcional en formato texto de Prometheus (METRICS_PROM_FILE)
+# ==========================================================
+import os, math, time, inspect, threading, functools
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+PROM_FILE   = os.getenv("METRICS_PROM_FILE", "")
+MAX_SAMPLES = int(os.getenv("METRICS_MAX_SAMPLES", "2048"))
+
+def _pct(sorted_vals, q):
+    """Percentil por rango más cercano (lista ya ordenada)."""
+    k = max(0, min(len(sorted_vals) - 1, math.ceil(q * len(sorted_vals)) - 1))
+    return sorted_vals[k]
+
+class Metrics:
+    """Registro de latencias (por etapa y ticker) y contadores, seguro entre hilos."""
+
+    def __init__(self, max_samples=MAX_SAMPLES):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.samples = defaultdict(lambda: deque(maxlen=self.max_samples))
+            self.calls = defaultdict(int)
+            self.sums = defaultdict(float)     # total exacto (las muestras están acotadas)
+            self.counters = defaultdict(int)
+
+    # === Registro ===
+    def observe(self, stage, seconds, ticker="-"):
+        with self._lock:
+            self.samples[(stage, ticker)].append(seconds)
+            self.calls[(stage, ticker)] += 1
+            self.sums[(stage, ticker)] += seconds
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    @contextmanager
+    def span(self, stage, ticker="-"):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - t0, ticker)
+
+    def timed(self, stage, ticker_arg=None):
+        """Decorador: mide cada llamada; `ticker_arg` = parámetro que etiqueta el ticker."""
+        def deco(fn):
+            sig = inspect.signature(fn) if ticker_arg else None
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                tk = "-"
+                if sig is not None:
+                    try:
+                        tk = str(sig.bind_partial(*args, **kwargs).arguments.get(ticker_arg, "-")).upper()
+                    except TypeError:
+                        pass
+                with self.span(stage, tk):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return deco
+
+    # === Ventanas (ciclos concurrentes: marca y resta, sin reset global) ===
+    def mark(self):
+        """Referencia para since(): llamadas, sumas y contadores a este instante."""
+        with self._lock:
+            return dict(self.calls), dict(self.sums), dict(self.counters)
+
+    def since(self, mark):
+        """Metrics con solo lo registrado después de `mark` (muestras acotadas)."""
+        calls0, sums0, counters0 = mark
+        out = Metrics(self.max_samples)
+        with self._lock:
+            for key, vals in self.samples.items():
+                n = self.calls[key] - calls0.get(key, 0)
+                if n > 0:
+                    out.samples[key].extend(list(vals)[-n:])
+                    out.calls[key] = n
+                    out.sums[key] = self.sums[key] - sums0.get(key, 0.0)
+            for name, v in self.counters.items():
+                if v - counters0.get(name, 0):
+                    out.counters[name] = v - counters0.get(name, 0)
+        return out
+
+    # === Agregados ===
+    def stats(self, by_ticker=False):
+        """{clave: (n, p50, p95, max)} con clave = etapa o (etapa, ticker)."""
+        with self._lock:
+            groups = defaultdict(list)
+            calls = defaultdict(int)
+            for (stage, tk), vals in self.samples.items():
+                key = (stage, tk) if by_ticker else stage
+                groups[key].extend(vals)
+                calls[key] += self.calls[(stage, tk)]
+        out = {}
+        for key, vals in groups.items():
+            vals.sort()
+            out[key] = (calls[key], _pct(vals, 0.50), _pct(vals, 0.95), vals[-1])
+        return out
+
+    def summary(self, slowest=5):
+        """Una línea: etapas (n/p50/p95/max), tickers más lentos y contadores."""
+        parts = []
+        for stage, (n, p50, p95, mx) in sorted(self.stats().items()):
+            parts.append(f"{stage} n={n} p50={p50:.3f} p95={p95:.3f} max={mx:.3f}")
+        per_tk = defaultdict(float)
+        for (stage, tk), (n, _, _, mx) in self.stats(by_ticker=True).items():
+            if tk != "-" and not stage.startswith("sheets."):
+                per_tk[tk] = max(per_tk[tk], mx)
+        if per_tk:
+            top = sorted(per_tk.items(), key=lambda kv: kv[1], reverse=True)[:slowest]
+            parts.append("lentos: " + " ".join(f"{tk}={s:.2f}" for tk, s in top))
+        with self._lock:
+            counters = dict(self.counters)
+        if counters:
+            parts.append(" ".join(f"{k}={v}" for k, v in sorted(counters.items())))
+        return " | ".join(parts) or "sin datos"
+
+    def to_prometheus(self, prefix="tradingbot"):
+        stats = sorted(self.stats(by_ticker=True).items())
+        with self._lock:
+            sums = dict(self.sums)
+        lines = [f"# TYPE {prefix}_stage_seconds summary"]
+        for (stage, tk), (n, p50, p95, mx) in stats:
+            lbl = f'stage="{stage}",ticker="{tk}"'
+            lines += [f'{prefix}_stage_seconds{{{lbl},quantile="0.5"}} {p50:.6f}',
+                      f'{prefix}_stage_seconds{{{lbl},quantile="0.95"}} {p95:.6f}',
+                      f'{prefix}_stage_seconds_sum{{{lbl}}} {sums.get((stage, tk), 0.0):.6f}',
+                      f'{prefix}_stage_seconds_count{{{lbl}}} {n}']
+        # El máximo no es parte de un summary: gauge aparte
+        if stats:
+            lines.append(f"# TYPE {prefix}_stage_max_seconds gauge")
+            lines += [f'{prefix}_stage_max_seconds{{stage="{stage}",ticker="{tk}"}} {mx:.6f}'
+                      for (stage, tk), (_, _, _, mx) in stats]
+        with self._lock:
+            counters = dict(self.counters)
+        if counters:
+            lines.append(f"# TYPE {prefix}_events_total counter")
+            lines += [f'{prefix}_events_total{{name="{k}"}} {v}' for k, v in sorted(counters.items())]
+        return "\n".join(lines) + "\n"
+
+    def export(self, path=None):
+        """Escribe el archivo de Prometheus (atómico) si hay ruta configurada."""
+        path = path or PROM_FILE
+        if not path:
+            return None
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as fh:
+            fh.write(self.to_prometheus())
+        os.replace(tmp, path)
+        return path
+
+# ----------------------------------------------------------
+# 📊 Llamadas a la API de Sheets
+# ----------------------------------------------------------
+class TimedWorksheet:
+    """Proxy de worksheet: cada método llamado se mide como sheets.<método>."""
+
+    def __init__(self, ws, metrics=None):
+        self._ws = ws
+        self._metrics = metrics or METRICS
+
+    def __getattr__(self, name):
+        attr = getattr(self._ws, name)
+        if not callable(attr):
+            return attr
+        title = getattr(self._ws, "title", "-")
+
+        @functools.wraps(attr)
+        def call(*args, **kwargs):
+            with self._metrics.span(f"sheets.{name}", title):
+                return attr(*args, **kwargs)
+        return call
+
+    def __repr__(self):
+        return f"<TimedWorksheet {getattr(self._ws, 'title', '?')}>"
+
+METRICS = Metrics()
+timed = METRICS.timed
+span  = METRICS.span
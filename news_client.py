@@ -0,0 +1,167 @@
+# ==========================================================
+# 📰 CLIENTE DE NOTICIAS — Alpha Vantage NEWS_SENTIMENT
+# ==========================================================
+# ✅ Una sola consulta por ciclo para toda la WATCHLIST
+# ✅ Puntaje por ticker = promedio de ticker_sentiment de TODO el
+#    feed, ponderado por relevance_score (no solo feed[0])
+# ✅ Caché TTL + LRU por ticker (también "sin noticias")
+# ✅ Token bucket: nunca excede el cupo del plan gratuito;
+#    sin tokens → último valor conocido o neutral
+# ✅ Sesión keep-alive compartida + reintento 429/5xx (transport)
+# ==========================================================
+import os, time, threading
+from collections import OrderedDict
+from transport import RETRY, session as http_session
+
+NEWS_ENDPOINT = "https://www.alphavantage.co/query"
+NEWS_TTL      = float(os.getenv("NEWS_TTL", "3600"))           # s por puntaje
+NEWS_CACHE    = int(os.getenv("NEWS_CACHE_SIZE", "1024"))
+NEWS_RATE     = float(os.getenv("NEWS_RATE_PER_DAY", "25"))    # cupo del plan gratuito
+NEWS_BURST    = int(os.getenv("NEWS_BURST", "5"))
+NEWS_LIMIT    = int(os.getenv("NEWS_LIMIT", "1000"))           # artículos por consulta
+THRESHOLD     = 0.2
+
+_MISS = object()
+
+# ----------------------------------------------------------
+# 🪣 Límite de tasa
+# ----------------------------------------------------------
+class TokenBucket:
+    """`rate` tokens por segundo, hasta `capacity` acumulados."""
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate, self.capacity, self.clock = rate, capacity, clock
+        self.tokens = float(capacity)
+        self.stamp = clock()
+        self._lock = threading.Lock()
+
+    def try_take(self, n=1):
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+            if self.tokens >= n:
+                self.tokens -= n
+                return True
+            return False
+
+# ----------------------------------------------------------
+# 🗃️ Caché TTL + LRU
+# ----------------------------------------------------------
+class TTLCache:
+    """Dict acotado: expira por TTL y desaloja el menos usado al llenarse."""
+
+    def __init__(self, maxsize=NEWS_CACHE, ttl=NEWS_TTL, clock=time.monotonic):
+        self.maxsize, self.ttl, self.clock = maxsize, ttl, clock
+        self._data = OrderedDict()     # clave → (vence, valor)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None, stale=False):
+        """Valor vigente; con stale=True devuelve también uno vencido."""
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None:
+                return default
+            expires, value = hit
+            if expires < self.clock() and not stale:
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (self.clock() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __contains__(self, key):
+        return self.get(key, _MISS) is not _MISS
+
+    def __len__(self):
+        return len(self._data)
+
+# ----------------------------------------------------------
+# 🧮 Agregación del feed
+# ----------------------------------------------------------
+def aggregate_feed(feed, tickers=None):
+    """{ticker: (puntaje ponderado, artículos)} sobre todos los artículos del feed."""
+    wanted = {t.upper() for t in tickers} if tickers else None
+    acc = {}
+    for article in feed or []:
+        for ts in article.get("ticker_sentiment", []):
+            tk = str(ts.get("ticker", "")).upper()
+            if wanted is not None and tk not in wanted:
+                continue
+            try:
+                score = float(ts["ticker_sentiment_score"])
+                weight = float(ts.get("relevance_score", 1) or 0)
+            except (KeyError, TypeError, ValueError):
+                continue
+            s, w, n = acc.get(tk, (0.0, 0.0, 0))
+            acc[tk] = (s + score * weight, w + weight, n + 1)
+    return {tk: (s / w if w else 0.0, n) for tk, (s, w, n) in acc.items()}
+
+def direction(score, threshold=THRESHOLD):
+    if score is None:
+        return "neutral"
+    return "up" if score > threshold else "down" if score < -threshold else "neutral"
+
+# ----------------------------------------------------------
+# 📡 Cliente
+# ----------------------------------------------------------
+class NewsClient:
+    """Sentimiento por ticker con consultas en lote, caché y límite de tasa."""
+
+    def __init__(self, api_key, session=None, bucket=None, cache=None, endpoint=NEWS_ENDPOINT):
+        self.api_key = api_key
+        self.endpoint = endpoint
+        self.session = session or http_session("alphavantage")
+        self.bucket = bucket or TokenBucket(NEWS_RATE / 86400, NEWS_BURST)
+        self.cache = cache or TTLCache()
+        self.requests = self.throttled = 0
+        self._lock = threading.Lock()
+
+    def _query(self, tickers):
+        # tickers= en Alpha Vantage exige que el artículo mencione TODOS los
+        # símbolos: con varios se pide el feed general y se filtra localmente.
+        params = {"function": "NEWS_SENTIMENT", "apikey": self.api_key,
+                  "sort": "LATEST", "limit": NEWS_LIMIT}
+        if len(tickers) == 1:
+            params["tickers"] = tickers[0]
+        self.requests += 1
+        data = RETRY.call(self._get, params)
+        if "feed" not in data:
+            # Cupo agotado / error: {"Information": ...} o {"Note": ...}
+            raise RuntimeError(data.get("Information") or data.get("Note") or data.get("Error Message") or "respuesta sin feed")
+        return data["feed"]
+
+    def _get(self, params):
+        resp = self.session.get(self.endpoint, params=params, timeout=10)
+        resp.raise_for_status()
+        return resp.json()
+
+    def prefetch(self, tickers):
+        """Refresca en una sola consulta los tickers sin puntaje vigente."""
+        with self._lock:
+            missing = [t.upper() for t in dict.fromkeys(tickers) if t.upper() not in self.cache]
+            if not missing:
+                return 0
+            if not self.bucket.try_take():
+                self.throttled += 1
+                return 0
+            scores = aggregate_feed(self._query(missing), missing)
+            for tk in missing:
+                # Sin menciones también se guarda: evita reconsultar hasta el TTL
+                self.cache.set(tk, scores.get(tk, (None, 0))[0])
+            return len(missing)
+
+    def score(self, ticker):
+        """Puntaje vigente (consulta si falta) o el último conocido si no hay cupo."""
+        tk = ticker.upper()
+        if tk not in self.cache:
+            self.prefetch([tk])
+        return self.cache.get(tk, stale=True)
+
+    def direction(self, ticker):
+        return direction(self.score(ticker))
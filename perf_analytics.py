@@ -0,0 +1,147 @@
+# ==========================================================
+# 📊 ANALÍTICA DE PERFORMANCE — snapshot compartido
+# ==========================================================
+# ✅ Una sola lectura de la hoja → frame tipado (categorías + float)
+# ✅ Agregados en una pasada agrupada: día × ticker × lado,
+#    día y total (operaciones, Win/Loss/BE/Cancel, PnL, winrate, drawdown)
+# ✅ Incremental: cada alta/cierre actualiza solo sus grupos (O(1))
+# ✅ Compartido por daily_performance_summary, update_results y notify_summary
+# ==========================================================
+import threading
+import numpy as np
+import pandas as pd
+
+RESULTS = ["Open", "Win", "Loss", "BE", "Cancel"]
+STATS = ["Total"] + RESULTS + ["PnL", "Equity", "Peak", "MaxDD"]
+LEVELS = (("FechaISO", "Ticker", "Side"), ("FechaISO",), ())
+_IDX = {k: i for i, k in enumerate(STATS)}
+
+def typed_frame(values):
+    """Filas crudas (encabezado + datos) → DataFrame tipado con número de fila."""
+    if not values or len(values) < 2:
+        return pd.DataFrame(columns=["row", "FechaISO", "Ticker", "Side", "Resultado", "PnL", "ProbFinal"])
+    head = values[0]
+    width = len(head)
+    df = pd.DataFrame([list(r[:width]) + [""] * (width - len(r)) for r in values[1:]], columns=head)
+    df.insert(0, "row", np.arange(2, len(values) + 1))
+    for col in ("FechaISO", "Ticker", "Side"):
+        if col in df:
+            df[col] = df[col].astype(str).str.strip().astype("category")
+    if "Resultado" in df:
+        df["Resultado"] = pd.Categorical(df["Resultado"].astype(str).str.strip(), categories=RESULTS)
+    for col in ("PnL", "ProbFinal"):
+        if col in df:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+class PerfSnapshot:
+    """Agregados de la hoja performance, cargados una vez y mantenidos al día."""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self._lock = threading.RLock()
+        self._loaded = False
+
+    # === Carga (una lectura, una pasada agrupada por nivel) ===
+    def load(self, values=None):
+        with self._lock:
+            self.frame = typed_frame(values if values is not None else self.ws.get_all_values())
+            self.rows = {}      # fila → (FechaISO, Ticker, Side, Resultado, PnL)
+            self.groups = {}    # clave de nivel → vector STATS
+            df = self.frame
+            if len(df) and "Resultado" in df:
+                self.rows = dict(zip(df["row"], zip(df["FechaISO"].astype(str), df["Ticker"].astype(str),
+                                                    df["Side"].astype(str), df["Resultado"].astype(str),
+                                                    df["PnL"])))
+                self._aggregate(df)
+            self._loaded = True
+            return self
+
+    def _aggregate(self, df):
+        base = pd.get_dummies(df["Resultado"]).reindex(columns=RESULTS, fill_value=False).astype(int)
+        for col in ("FechaISO", "Ticker", "Side"):
+            base[col] = df[col].astype(str)
+        base["Total"] = 1
+        # Solo cuenta el PnL realizado (operación cerrada) y en orden de salida
+        base["PnL"] = df["PnL"].where(df["Resultado"].isin(RESULTS[1:]))
+        exit_cols = [c for c in ("ExitISO", "ExitHora") if c in df]
+        order = df.assign(_closed=base["PnL"].isna()).sort_values(["_closed"] + exit_cols + ["row"], kind="stable").index
+        curve = base.loc[order]
+        pnl = curve["PnL"].fillna(0.0)
+        for level in LEVELS:
+            by = [curve[k] for k in level] or [np.zeros(len(curve), int)]
+            equity = pnl.groupby(by, sort=False).cumsum()
+            peak = equity.groupby(by, sort=False).cummax().clip(lower=0)
+            agg = curve.groupby(by, sort=False)[["Total"] + RESULTS + ["PnL"]].sum()
+            agg["Equity"] = equity.groupby(by, sort=False).last()
+            agg["Peak"] = peak.groupby(by, sort=False).last()
+            agg["MaxDD"] = (peak - equity).groupby(by, sort=False).max()
+            for key, vec in zip(agg.index, agg[STATS].to_numpy(float)):
+                self.groups[self._key(level, key)] = vec
+
+    @staticmethod
+    def _key(level, key):
+        if not level:
+            return ()
+        return tuple(zip(level, key if isinstance(key, tuple) else (key,)))
+
+    def _ensure(self):
+        if not self._loaded:
+            self.load()
+
+    # === Actualización incremental ===
+    def apply(self, row_num, **values):
+        """Alta o cambio de una fila (FechaISO/Ticker/Side/Resultado/PnL)."""
+        with self._lock:
+            self._ensure()
+            old = self.rows.get(row_num)
+            fecha, ticker, side, result, pnl = old or ("", "", "", "", np.nan)
+            fecha = str(values.get("FechaISO", fecha)); ticker = str(values.get("Ticker", ticker))
+            side = str(values.get("Side", side)); result = str(values.get("Resultado", result))
+            pnl = pd.to_numeric(values.get("PnL", pnl), errors="coerce")
+            new = (fecha, ticker, side, result, pnl)
+            self.rows[row_num] = new
+            dims = {"FechaISO": fecha, "Ticker": ticker, "Side": side}
+            for level in LEVELS:
+                key = tuple((k, dims[k]) for k in level)
+                vec = self.groups.setdefault(key, np.zeros(len(STATS)))
+                if old is None:
+                    vec[_IDX["Total"]] += 1
+                elif old[3] in _IDX:
+                    vec[_IDX[old[3]]] -= 1
+                if result in _IDX:
+                    vec[_IDX[result]] += 1
+                was_closed = old is not None and old[3] in RESULTS[1:] and not np.isnan(old[4])
+                if result in RESULTS[1:] and not np.isnan(pnl) and not was_closed:
+                    # Operación recién cerrada: avanza la curva realizada
+                    vec[_IDX["PnL"]] += pnl
+                    vec[_IDX["Equity"]] += pnl
+                    vec[_IDX["Peak"]] = max(vec[_IDX["Peak"]], vec[_IDX["Equity"]])
+                    vec[_IDX["MaxDD"]] = max(vec[_IDX["MaxDD"]], vec[_IDX["Peak"]] - vec[_IDX["Equity"]])
+
+    # === Consultas ===
+    def summary(self, **eq):
+        """Totales de un nivel: summary(), summary(FechaISO=d) o summary(FechaISO=d, Ticker=t, Side=s)."""
+        with self._lock:
+            self._ensure()
+            key = tuple((k, str(eq[k])) for k in ("FechaISO", "Ticker", "Side") if k in eq)
+            if not any(tuple(k for k, _ in key) == lvl for lvl in LEVELS):
+                raise ValueError(f"nivel no agregado: {list(eq)}")
+            vec = self.groups.get(key, np.zeros(len(STATS)))
+        out = {k: int(vec[_IDX[k]]) for k in ["Total"] + RESULTS}
+        decided = out["Win"] + out["Loss"]
+        out.update(PnL=round(float(vec[_IDX["PnL"]]), 2), MaxDD=round(float(vec[_IDX["MaxDD"]]), 2),
+                   Winrate=round(out["Win"] / decided * 100, 2) if decided else 0.0)
+        return out
+
+    def counts(self):
+        """{Resultado: cantidad} de toda la hoja (sin ceros)."""
+        total = self.summary()
+        return {k: total[k] for k in RESULTS if total[k]}
+
+    def table(self):
+        """Agregados día × ticker × lado como DataFrame."""
+        with self._lock:
+            self._ensure()
+            rows = [dict(key, **dict(zip(STATS, vec))) for key, vec in self.groups.items() if len(key) == 3]
+        return pd.DataFrame(rows)
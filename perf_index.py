@@ -0,0 +1,98 @@
+# ==========================================================
+# 🗂️ ÍNDICE LOCAL DE PERFORMANCE
+# ==========================================================
+# ✅ Carga la hoja performance una sola vez por ejecución
+# ✅ clave → fila (dedupe O(1)) + pila de filas "Open" por ticker
+# ✅ Cierre con una sola escritura por rango (G:K), tras releer solo la
+#    columna A: si la hoja cambió por fuera (filas borradas/insertadas),
+#    se recarga antes de escribir en una fila que ya no es la nuestra
+# ✅ listener opcional (PerfSnapshot): recibe la misma lectura inicial
+#    y cada alta/cierre, sin volver a leer la hoja
+# ==========================================================
+import threading
+from collections import defaultdict
+
+COL_RESULT, COL_NOTES = 7, 11
+
+def perf_key(fecha_iso, hora_reg, ticker):
+    return f"{fecha_iso}|{hora_reg}|{str(ticker).upper()}"
+
+class PerformanceIndex:
+    """Índice en memoria de la hoja performance, sincronizado con las escrituras del bot."""
+
+    def __init__(self, ws, listener=None):
+        self.ws = ws
+        self.listener = listener
+        self._lock = threading.RLock()
+        self._loaded = False
+
+    def load(self):
+        """Lee la hoja completa (una vez) y construye los índices."""
+        with self._lock:
+            vals = self.ws.get_all_values()
+            self.keys, self.notes = {}, {}
+            self.col_a = [r[0] if r else "" for r in vals]
+            self.open = defaultdict(list)
+            for row_num, r in enumerate(vals[1:], start=2):
+                r = list(r) + [""] * (COL_NOTES - len(r))
+                self.keys[perf_key(r[0], r[1], r[2])] = row_num
+                self.notes[row_num] = r[COL_NOTES-1]
+                if r[COL_RESULT-1] == "Open":
+                    self.open[r[2].upper()].append(row_num)
+            self.next_row = max(len(vals), 1) + 1
+            self._loaded = True
+            if self.listener is not None:
+                self.listener.load(vals)
+
+    def _ensure(self):
+        if not self._loaded:
+            self.load()
+
+    def _refresh_positions(self):
+        """Relee solo la columna A; si no coincide con la esperada, recarga todo."""
+        expected = list(self.col_a)
+        while expected and not expected[-1]:
+            expected.pop()
+        if self.ws.col_values(1) != expected:
+            self.load()
+
+    def has(self, key):
+        with self._lock:
+            self._ensure()
+            return key in self.keys
+
+    def add(self, row):
+        """Agrega una fila nueva (si la clave no existe). Devuelve su número de fila o None."""
+        with self._lock:
+            self._ensure()
+            key = perf_key(row[0], row[1], row[2])
+            if key in self.keys:
+                return None
+            self.ws.append_row(row)
+            row_num = self.next_row
+            self.next_row += 1
+            self.col_a += [""] * (row_num - 1 - len(self.col_a)) + [str(row[0])]
+            self.keys[key] = row_num
+            self.notes[row_num] = row[COL_NOTES-1] if len(row) >= COL_NOTES else ""
+            if row[COL_RESULT-1] == "Open":
+                self.open[str(row[2]).upper()].append(row_num)
+            if self.listener is not None:
+                self.listener.apply(row_num, FechaISO=row[0], Ticker=row[2], Side=row[3],
+                                    Resultado=row[COL_RESULT-1], PnL=row[COL_RESULT])
+            return row_num
+
+    def close(self, ticker, result, exit_iso, exit_hora, pnl="", note=""):
+        """Cierra la última fila "Open" del ticker con un único update de rango."""
+        with self._lock:
+            self._ensure()
+            self._refresh_positions()
+            stack = self.open.get(ticker.upper())
+            if not stack:
+                return None
+            row_num = stack.pop()
+            note = note or self.notes.get(row_num, "")
+            self.notes[row_num] = note
+            self.ws.update(f"G{row_num}:K{row_num}", [[result, pnl, exit_iso, exit_hora, note]])
+            if self.listener is not None:
+                self.listener.apply(row_num, Resultado=result, PnL=pnl)
+            return row_num
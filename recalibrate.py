@@ -1,97 +1,74 @@
 # recalibrate.py — script independiente para recalibración de pesos
-import os, json, datetime as dt
+# (estadísticos incrementales en calibrator.py: cada corrida lee solo filas nuevas)
+import os, argparse, datetime as dt
 import pandas as pd
-import numpy as np
-import gspread
-from google.oauth2.service_account import Credentials
-import yfinance as yf
+from sheets_client import SheetsClient, LazyWorksheet
+from sheet_buffer import BufferedSheet
+from bar_store import BarStore
+from indicators import ema_np, rsi_np, macd_np
+from strategy import sniper_ok
+from sweep import run_sweep, outcomes_to_bars
+from trading_calendar import map_ticker_yf
+from scoring import CALIBRATION_HEADERS, FEATURES, DEFAULT_PARAMS, training_set, fit_weights
+from calibrator import Calibrator, RELIABILITY_HEADERS
 
 # ======================
 # Configuración
 # ======================
+# Conexión perezosa y compartida (transport): una autenticación por
+# ejecución, handles de hoja en caché y reintentos 429/5xx.
 SPREADSHEET_ID = os.getenv("SPREADSHEET_ID")
-GS_JSON = json.loads(os.getenv("GOOGLE_SHEETS_JSON"))
-CREDS = Credentials.from_service_account_info(
-    GS_JSON, scopes=["https://www.googleapis.com/auth/spreadsheets"]
-)
-GC = gspread.authorize(CREDS)
-SHEET = GC.open_by_key(SPREADSHEET_ID).sheet1
-
-# ======================
-# Mapear tickers a Yahoo Finance
-# ======================
-def map_ticker_yf(ticker):
-    t = ticker.upper()
-    if t == "MES": return "^GSPC"
-    if t == "MNQ": return "^NDX"
-    if t == "MYM": return "^DJI"
-    if t == "M2K": return "^RUT"
-    if t == "BTCUSD": return "BTC-USD"
-    if t == "ETHUSD": return "ETH-USD"
-    if t == "SOLUSD": return "SOL-USD"
-    if t == "ADAUSD": return "ADA-USD"
-    if t == "XRPUSD": return "XRP-USD"
-    return t
+SHEETS = SheetsClient(os.getenv("GOOGLE_SHEETS_JSON"), SPREADSHEET_ID,
+                      scopes=["https://www.googleapis.com/auth/spreadsheets"])
+DEBUG = BufferedSheet(LazyWorksheet(SHEETS, "debug", ["Fecha","Mensaje"]), lossy=True)
 
 # ======================
 # Indicadores técnicos
 # ======================
-def ema(series, span): 
-    return series.ewm(span=span, adjust=False).mean()
+def ema(series, span):
+    return pd.Series(ema_np(series, span), index=series.index)
 
 def rsi(series, period=14):
-    delta = series.diff().squeeze()
-    up = np.where(delta > 0, delta, 0.0)
-    down = np.where(delta < 0, -delta, 0.0)
-    roll_up = pd.Series(up, index=series.index).rolling(period).mean()
-    roll_down = pd.Series(down, index=series.index).rolling(period).mean()
-    rs = roll_up / (roll_down + 1e-9)
-    return 100 - (100/(1+rs))
+    return pd.Series(rsi_np(series, period), index=series.index)
 
 def macd(series, fast=12, slow=26, signal=9):
-    exp1 = series.ewm(span=fast, adjust=False).mean()
-    exp2 = series.ewm(span=slow, adjust=False).mean()
-    macd_line = exp1 - exp2
-    signal_line = macd_line.ewm(span=signal, adjust=False).mean()
-    return macd_line, signal_line
+    macd_line, signal_line = macd_np(series, fast, slow, signal)
+    return pd.Series(macd_line, index=series.index), pd.Series(signal_line, index=series.index)
 
 # ======================
 # Recalibración avanzada
 # ======================
-def recalibrate():
+def recalibrate(sweep=None, samples=50, workers=None):
     try:
-        vals = SHEET.get_all_records()
-        if not vals:
-            log_debug("⚠️ No hay datos en la hoja para recalibrar.")
-            return
-
-        df = pd.DataFrame(vals)
-        df = df[df["Resultado"].isin(["Win","Loss"])]
-
-        if df.empty:
+        # Walk-forward incremental: solo las operaciones cerradas desde la marca de agua
+        cal = Calibrator.load()
+        added = cal.update(SHEETS.sheet1)
+        cal.save()
+        stats = cal.summary()
+        if not stats["n"]:
             log_debug("⚠️ No hay suficientes resultados para recalibrar.")
             return
+        log_debug(f"🧭 Walk-forward: +{added} operaciones (total {stats['n']}) | "
+                  f"Brier {stats['brier']} (ProbFinal crudo {stats['brier_raw']})")
 
-        # Métricas
-        total = len(df)
-        wins = (df["Resultado"] == "Win").sum()
-        losses = (df["Resultado"] == "Loss").sum()
-        winrate = round((wins / total) * 100, 2)
-
-        avg_win_prob = df[df["Resultado"]=="Win"]["ProbFinal"].mean()
-        avg_loss_prob = df[df["Resultado"]=="Loss"]["ProbFinal"].mean()
+        # Métricas con decaimiento (regímenes recientes pesan más)
+        winrate = stats["winrate"]
+        avg_win_prob = stats["avg_win_prob"] or 70
+        df = cal.trades()       # ventana reciente, para el barrido
 
         sniper_hits, sniper_miss = 0, 0
-        for tkr in df["Ticker"].unique():
+        symbols = {tkr: map_ticker_yf(tkr) for tkr in cal.tickers}
+        bars = BarStore().get_many(list(symbols.values()), period="5d", interval="5m")
+        for tkr, sym in symbols.items():
             try:
-                data = yf.download(map_ticker_yf(tkr), period="5d", interval="5m", progress=False)
-                if data.empty: continue
+                data = bars.get(sym)
+                if data is None or data.empty: continue
                 close = data["Close"]
                 e8, e21 = ema(close, 8), ema(close, 21)
                 r = rsi(close).iloc[-1]
                 macd_line, signal_line = macd(close)
-                sniper_ok = ((e8.iloc[-1] > e21.iloc[-1]) and (r > 50) and (macd_line.iloc[-1] > signal_line.iloc[-1]))
-                if sniper_ok: sniper_hits += 1
+                if sniper_ok(e8.iloc[-1], e21.iloc[-1], r, macd_line.iloc[-1], signal_line.iloc[-1]):
+                    sniper_hits += 1
                 else: sniper_miss += 1
             except Exception as e:
                 log_debug(f"⚠️ Error analizando {tkr}: {e}")
@@ -99,18 +76,41 @@ def recalibrate():
         sniper_rate = round((sniper_hits / (sniper_hits + sniper_miss + 1e-6)) * 100, 2)
         new_threshold = max(70, min(90, int(avg_win_prob)))
 
+        # Barrido de parámetros (grid / random) sobre velas en caché
+        best = {}
+        if sweep:
+            hist = BarStore().get_many(list(symbols.values()), period="60d", interval="5m")
+            outcomes = outcomes_to_bars(df.assign(Symbol=df["Ticker"].astype(str).str.upper().map(symbols)), hist)
+            ranking = run_sweep(hist, outcomes, mode=sweep,
+                                samples=samples, workers=workers)
+            if ranking:
+                best = ranking[0]
+                log_debug(f"🔬 Sweep {sweep}: {len(ranking)} conjuntos → mejor {best}")
+
+        # Pesos del motor de puntaje: logística sobre los resultados simulados
+        # de cada vela (mismos parámetros que usará el bot)
+        params = {**DEFAULT_PARAMS, **{k: best[k] for k in ("ema_fast","ema_slow","rsi","macd") if k in best}}
+        X, y = training_set(hist if sweep else bars, params)
+        weights = fit_weights(X, y)
+        log_debug(f"🧮 Pesos ({len(y)} velas): {weights}")
+
         # Guardar resultados en hoja calibration
         try:
-            try:
-                sheet2 = GC.open_by_key(SPREADSHEET_ID).worksheet("calibration")
-            except gspread.WorksheetNotFound:
-                sheet2 = GC.open_by_key(SPREADSHEET_ID).add_worksheet("calibration", rows=100, cols=5)
-
-            sheet2.update("A1:E1", [["Fecha","Winrate","AvgWinProb","SniperRate","NuevoThreshold"]])
+            sheet2 = SHEETS.worksheet("calibration", CALIBRATION_HEADERS)
+            if sheet2.col_count < len(CALIBRATION_HEADERS):
+                sheet2.add_cols(len(CALIBRATION_HEADERS) - sheet2.col_count)
+            sheet2.update("A1:P1", [CALIBRATION_HEADERS])
             sheet2.append_row([
                 dt.datetime.now().isoformat(),
-                winrate, round(avg_win_prob,1), sniper_rate, new_threshold
+                winrate, round(avg_win_prob,1), sniper_rate, new_threshold,
+                best.get("ema_fast","-"), best.get("ema_slow","-"), best.get("rsi","-"),
+                "/".join(map(str, best["macd"])) if best else "-", best.get("Score","-"),
+                weights["bias"], *(weights[k] for k in FEATURES)
             ])
+            # Curva de confiabilidad ProbFinal → winrate realizado (una sola escritura)
+            curve = cal.reliability().round(3)
+            rel = SHEETS.worksheet("reliability", RELIABILITY_HEADERS)
+            rel.update(f"A1:I{len(curve) + 1}", [RELIABILITY_HEADERS] + curve.values.tolist())
             log_debug("✅ Recalibración completada y guardada.")
         except Exception as e:
             log_debug(f"⚠️ No se pudo guardar calibración: {e}")
@@ -122,15 +122,16 @@ def recalibrate():
 # Log de ejecución
 # ======================
 def log_debug(message):
+    # En buffer: un solo append_rows al final (flush_all en atexit)
     try:
-        try:
-            dbg = GC.open_by_key(SPREADSHEET_ID).worksheet("debug")
-        except gspread.WorksheetNotFound:
-            dbg = GC.open_by_key(SPREADSHEET_ID).add_worksheet("debug", rows=1000, cols=2)
-            dbg.update("A1:B1", [["Fecha","Mensaje"]])
-        dbg.append_row([dt.datetime.now().isoformat(), message])
+        DEBUG.append_row([dt.datetime.now().isoformat(), message])
     except Exception as e:
         print("⚠️ Error guardando log:", e)
 
 if __name__ == "__main__":
-    recalibrate()
+    ap = argparse.ArgumentParser(description="Recalibración del bot")
+    ap.add_argument("--sweep", choices=["grid", "random"], help="barrido de EMA/RSI/MACD")
+    ap.add_argument("--samples", type=int, default=50, help="conjuntos en modo random")
+    ap.add_argument("--workers", type=int, help="procesos (por defecto: núcleos)")
+    a = ap.parse_args()
+    recalibrate(sweep=a.sweep, samples=a.samples, workers=a.workers)
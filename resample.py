@@ -0,0 +1,97 @@
+# ==========================================================
+# 🕯️ MULTI-TIMEFRAME — 5m / 15m / 1h desde una sola descarga 1m
+# ==========================================================
+# ✅ Agregación OHLCV vectorizada (np.*.reduceat, sin groupby)
+# ✅ Incremental: solo se recalculan los buckets desde la última
+#    vela parcial de cada timeframe; el resto queda en memoria
+# ✅ Una descarga del intervalo base → los cuatro timeframes
+# ==========================================================
+import threading
+import numpy as np
+import pandas as pd
+
+TIMEFRAMES = {"1m": 60, "5m": 300, "15m": 900, "1h": 3600}   # segundos por vela
+COLUMNS = ["Open","High","Low","Close","Volume"]
+
+def _arrays(df):
+    """DataFrame OHLCV → (ns int64, valores n×5)."""
+    vals = df.to_numpy(float) if list(df.columns) == COLUMNS else df[COLUMNS].to_numpy(float)
+    return df.index.as_unit("ns").asi8, vals
+
+def _aggregate(ns, vals, step):
+    """Núcleo vectorizado: (ns, n×5) → (bucket, m×5) con bucket = ns // step."""
+    if not len(ns):
+        return ns[:0], vals[:0]
+    keys = ns // step
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)] - 1
+    out = np.empty((len(starts), 5))
+    out[:, 0] = vals[starts, 0]
+    out[:, 1] = np.maximum.reduceat(vals[:, 1], starts)
+    out[:, 2] = np.minimum.reduceat(vals[:, 2], starts)
+    out[:, 3] = vals[ends, 3]
+    out[:, 4] = np.add.reduceat(np.nan_to_num(vals[:, 4]), starts)
+    return keys[starts], out
+
+def _frame(keys, vals, step):
+    return pd.DataFrame(vals, columns=COLUMNS, index=pd.DatetimeIndex(keys * step, tz="UTC"))
+
+def aggregate(df, seconds):
+    """Velas base (índice UTC ordenado) → velas de `seconds` alineadas a época."""
+    step = seconds * 10**9
+    ns, vals = _arrays(df)
+    return _frame(*_aggregate(ns, vals, step), step)
+
+class Resampler:
+    """Timeframes derivados por ticker, actualizados al llegar velas base nuevas."""
+
+    def __init__(self, timeframes=TIMEFRAMES, base="1m"):
+        self.base = base
+        self.timeframes = {tf: s for tf, s in timeframes.items() if s >= timeframes[base]}
+        self._state = {}     # (ticker, tf) → (buckets, valores)
+        self._lock = threading.Lock()
+
+    def update(self, ticker, base_df):
+        """Ventana de velas base de un ticker → {tf: DataFrame} (incluye la base)."""
+        ns, vals = _arrays(base_df)
+        out = {self.base: base_df}
+        with self._lock:
+            for tf, seconds in self.timeframes.items():
+                if tf == self.base:
+                    continue
+                step = seconds * 10**9
+                keys, agg = self._update_tf(self._state.get((ticker, tf)), ns, vals, step)
+                self._state[(ticker, tf)] = (keys, agg)
+                out[tf] = _frame(keys, agg, step)
+        return out
+
+    @staticmethod
+    def _update_tf(old, ns, vals, step):
+        if not len(ns):
+            return _aggregate(ns, vals, step)
+        first, last = ns[0] // step, ns[-1] // step
+        # Solo ventanas que avanzan reutilizan el estado; si empieza antes del
+        # estado o termina antes de su última vela → agregación completa
+        if (old is None or not len(old[0]) or old[0][-1] < first
+                or first < old[0][0] or last < old[0][-1]):
+            return _aggregate(ns, vals, step)
+        keys, agg = old
+        cut = keys[-1]
+        # Desde el bucket de la última vela (posiblemente parcial) en adelante
+        i = np.searchsorted(ns, cut * step)
+        parts = [_aggregate(ns[i:], vals[i:], step)]
+        # Buckets intermedios intactos; el primero de la ventana se rehace
+        a, b = np.searchsorted(keys, first, side="right"), len(keys) - 1
+        parts.insert(0, (keys[a:b], agg[a:b]))
+        if first < cut:
+            j = np.searchsorted(ns, (first + 1) * step)
+            parts.insert(0, _aggregate(ns[:j], vals[:j], step))
+        return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+    def update_many(self, bars):
+        """{ticker: velas base} → {tf: {ticker: DataFrame}} (forma de score_timeframes)."""
+        by_tf = {tf: {} for tf in self.timeframes}
+        for tk, df in bars.items():
+            for tf, frame in self.update(tk, df).items():
+                by_tf[tf][tk] = frame
+        return by_tf
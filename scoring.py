@@ -0,0 +1,216 @@
+# ==========================================================
+# 🧮 MOTOR DE PUNTAJE — todos los tickers a la vez (tickers × velas)
+# ==========================================================
+# ✅ Velas de la WATCHLIST apiladas en matrices NumPy
+# ✅ Features con signo de la tendencia: EMA, RSI, MACD, S/R, patrón
+# ✅ Prob por timeframe = logística(pesos · features), determinista
+# ✅ ProbFinal = combinación de timeframes en la dirección base
+# ✅ Pesos ajustados por recalibrate.py (hoja calibration)
+# ==========================================================
+import os
+import numpy as np
+import pandas as pd
+from indicators import ema_np, rsi_np, macd_np, atr_np
+from strategy import trend_sign, sl_tp
+from backtest import DEFAULT_PARAMS
+
+LOOKBACK  = int(os.getenv("SCORE_LOOKBACK", "300"))   # velas por ticker
+MIN_BARS  = 35                                         # mínimo para puntuar
+SR_WINDOW = 48                                         # rango soporte/resistencia
+FEATURES  = ("ema", "rsi", "macd", "sr", "pat")
+DEFAULT_WEIGHTS = {"bias": -0.2, "ema": 0.6, "rsi": 0.8, "macd": 0.6, "sr": 0.3, "pat": 0.4}
+TF_WEIGHTS = {"1m": 0.1, "5m": 0.4, "15m": 0.3, "1h": 0.2}
+
+CALIBRATION_HEADERS = ["Fecha","Winrate","AvgWinProb","SniperRate","NuevoThreshold",
+                       "EMAFast","EMASlow","RSIPeriod","MACD","SweepScore",
+                       "W_bias","W_ema","W_rsi","W_macd","W_sr","W_pat"]
+
+PATTERNS = np.array(["-", "bull_engulfing", "bear_engulfing", "hammer", "shooting_star"], dtype=object)
+PATTERN_SIGN = np.array([0, 1, -1, 1, -1])
+
+# ----------------------------------------------------------
+# 🧱 Matrices
+# ----------------------------------------------------------
+def stack_bars(frames, lookback=LOOKBACK):
+    """{ticker: OHLC} → (tickers, O, H, L, C, válidas) con forma tickers × velas.
+
+    Las series cortas se rellenan a la izquierda con su primer valor: la EMA
+    de un tramo constante no cambia, así que los valores finales son exactos.
+    """
+    tickers = [tk for tk, df in frames.items() if df is not None and len(df)]
+    if not tickers:
+        return [], *(np.empty((0, 0)) for _ in range(4)), np.zeros(0, int)
+    n = min(lookback, max(len(frames[tk]) for tk in tickers))
+    mats = np.empty((4, len(tickers), n))
+    valid = np.zeros(len(tickers), int)
+    for i, tk in enumerate(tickers):
+        df = frames[tk]
+        if list(df.columns[:4]) == ["Open", "High", "Low", "Close"]:
+            v = df.to_numpy(float)[-n:, :4].T
+        else:
+            v = np.array([df[k].to_numpy(float)[-n:] for k in ("Open", "High", "Low", "Close")])
+        valid[i] = v.shape[1]
+        mats[:, i, n - v.shape[1]:] = v
+        mats[:, i, :n - v.shape[1]] = v[:, :1]
+    return tickers, mats[0], mats[1], mats[2], mats[3], valid
+
+def _rolling(a, window, how):
+    df = pd.DataFrame(a.T).rolling(window, min_periods=1)
+    return (df.max() if how == "max" else df.min()).to_numpy().T
+
+def candle_patterns(o, h, l, c):
+    """Código de patrón por vela (índice en PATTERNS)."""
+    body = c - o
+    pb, po, pc = np.roll(body, 1, -1), np.roll(o, 1, -1), np.roll(c, 1, -1)
+    upper = h - np.maximum(o, c)
+    lower = np.minimum(o, c) - l
+    size = np.abs(body)
+    code = np.zeros(c.shape, int)
+    code[(size > 0) & (upper >= 2 * size) & (lower <= 0.5 * size)] = 4
+    code[(size > 0) & (lower >= 2 * size) & (upper <= 0.5 * size)] = 3
+    code[(pb > 0) & (body < 0) & (o >= pc) & (c <= po)] = 2
+    code[(pb < 0) & (body > 0) & (o <= pc) & (c >= po)] = 1
+    code[..., 0] = 0
+    return code
+
+# ----------------------------------------------------------
+# 📐 Features y probabilidad
+# ----------------------------------------------------------
+def features(o, h, l, c, params=DEFAULT_PARAMS):
+    """Indicadores y features (todas tickers × velas) con signo de la tendencia."""
+    ef, es = ema_np(c, params["ema_fast"]), ema_np(c, params["ema_slow"])
+    r = rsi_np(c, params["rsi"])
+    line, sig = macd_np(c, *params["macd"])
+    atr = atr_np(h, l, c, params.get("atr", 14))
+    s = trend_sign(ef, es)
+    hi, lo = _rolling(h, SR_WINDOW, "max"), _rolling(l, SR_WINDOW, "min")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pos = np.where(hi > lo, (c - lo) / (hi - lo), 0.5)
+        f = {"ema":  (ef - es) / atr * s,
+             "rsi":  (r - 50) / 50 * s,
+             "macd": (line - sig) / atr * s,
+             "sr":   (1 - 2 * pos) * s}
+    code = candle_patterns(o, h, l, c)
+    f["pat"] = PATTERN_SIGN[code] * s
+    f = {k: np.clip(np.nan_to_num(v, nan=0.0), -3, 3) for k, v in f.items()}
+    return {"f": f, "sign": s, "rsi": r, "atr": atr, "macd_val": line - sig,
+            "pattern": code, "close": c}
+
+def probability(f, weights=DEFAULT_WEIGHTS):
+    """Prob (0–100) de que la operación en la dirección de la tendencia gane."""
+    z = weights.get("bias", 0.0) + sum(weights.get(k, 0.0) * f[k] for k in FEATURES)
+    return 100.0 / (1.0 + np.exp(-z))
+
+# ----------------------------------------------------------
+# 🎯 Puntaje de la última vela
+# ----------------------------------------------------------
+def score_frames(frames, weights=DEFAULT_WEIGHTS, params=DEFAULT_PARAMS, lookback=LOOKBACK):
+    """{ticker: OHLC} de un timeframe → {ticker: valores de la última vela}."""
+    tickers, o, h, l, c, valid = stack_bars(frames, lookback)
+    if not tickers:
+        return {}
+    x = features(o, h, l, c, params)
+    prob = probability({k: v[:, -1] for k, v in x["f"].items()}, weights)
+    out = {}
+    for i, tk in enumerate(tickers):
+        if valid[i] < MIN_BARS or not np.isfinite(x["atr"][i, -1]):
+            continue
+        out[tk] = {"sign": int(x["sign"][i, -1]), "prob": float(prob[i]),
+                   "rsi": float(x["rsi"][i, -1]), "atr": float(x["atr"][i, -1]),
+                   "entry": float(x["close"][i, -1]), "macd_val": float(x["macd_val"][i, -1]),
+                   "sr_score": float(x["f"]["sr"][i, -1]), "pat_score": int(x["f"]["pat"][i, -1]),
+                   "pattern": PATTERNS[x["pattern"][i, -1]]}
+    return out
+
+def score_timeframes(frames_by_tf, weights=DEFAULT_WEIGHTS, params=DEFAULT_PARAMS, base="5m"):
+    """{tf: {ticker: OHLC}} → {ticker: columnas de la hoja signals}.
+
+    Dirección, niveles y features salen del timeframe base; cada Prob_tf se
+    expresa en esa dirección y ProbFinal las combina con TF_WEIGHTS.
+    """
+    by_tf = {tf: score_frames(frames, weights, params) for tf, frames in frames_by_tf.items()}
+    out = {}
+    for tk, b in by_tf.get(base, {}).items():
+        sl, tp = sl_tp(b["entry"], b["atr"], b["sign"])
+        row = {"side": "up" if b["sign"] > 0 else "down", "rsi": round(b["rsi"], 2),
+               "atr": round(b["atr"], 4), "SL": round(sl, 4), "TP": round(tp, 4),
+               "macd_val": round(b["macd_val"], 4), "sr_score": round(b["sr_score"], 3),
+               "pat_score": b["pat_score"], "pattern": b["pattern"]}
+        num = den = 0.0
+        for tf, scores in by_tf.items():
+            s = scores.get(tk)
+            if s is None:
+                continue
+            p = s["prob"] if s["sign"] == b["sign"] else 100.0 - s["prob"]
+            row[f"Prob_{tf}"] = round(p, 2)
+            num += TF_WEIGHTS.get(tf, 0.0) * p
+            den += TF_WEIGHTS.get(tf, 0.0)
+        row["ProbFinal"] = round(num / den, 2) if den else row.get(f"Prob_{base}", 0.0)
+        out[tk] = row
+    return out
+
+# ----------------------------------------------------------
+# 🔧 Calibración (pesos ↔ hoja calibration)
+# ----------------------------------------------------------
+def _num(v, default):
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return default
+
+def load_calibration(values):
+    """Filas de la hoja calibration → (pesos, parámetros) de la última fila."""
+    weights, params = dict(DEFAULT_WEIGHTS), dict(DEFAULT_PARAMS)
+    if not values or len(values) < 2:
+        return weights, params
+    row = dict(zip(values[0], values[-1]))
+    for k in weights:
+        weights[k] = _num(row.get(f"W_{k}"), weights[k])
+    for col, key in (("EMAFast", "ema_fast"), ("EMASlow", "ema_slow"), ("RSIPeriod", "rsi")):
+        v = _num(row.get(col), None)
+        if v:
+            params[key] = int(v)
+    macd = str(row.get("MACD", "")).split("/")
+    if len(macd) == 3 and all(p.isdigit() for p in macd):
+        params["macd"] = tuple(int(p) for p in macd)
+    if params["ema_fast"] >= params["ema_slow"]:
+        params["ema_fast"], params["ema_slow"] = DEFAULT_PARAMS["ema_fast"], DEFAULT_PARAMS["ema_slow"]
+    return weights, params
+
+def training_set(frames, params=DEFAULT_PARAMS, horizon=48):
+    """Features de cada vela + resultado Win/Loss del backtest (BE descartado)."""
+    from backtest import simulate
+    X, y = [], []
+    for tk, df in frames.items():
+        if df is None or len(df) < MIN_BARS + horizon:
+            continue
+        o, h, l, c = (df[k].to_numpy(float)[None, :] for k in ("Open", "High", "Low", "Close"))
+        x = features(o, h, l, c, params)
+        idx = np.flatnonzero(np.isfinite(x["atr"][0]))
+        res = simulate(h[0], l[0], c[0], idx, x["sign"][0, idx], x["atr"][0], horizon)
+        if not len(res):
+            continue
+        keep = res["Resultado"].isin(["Win", "Loss"]).to_numpy()
+        bars = res["idx"].to_numpy()[keep]
+        X.append(np.column_stack([x["f"][k][0, bars] for k in FEATURES]))
+        y.append((res["Resultado"].to_numpy()[keep] == "Win").astype(float))
+    if not X:
+        return np.empty((0, len(FEATURES))), np.empty(0)
+    return np.vstack(X), np.concatenate(y)
+
+def fit_weights(X, y, l2=1.0, iters=25):
+    """Regresión logística (Newton/IRLS con ridge) → pesos por feature."""
+    if len(y) < 50 or y.min() == y.max():
+        return dict(DEFAULT_WEIGHTS)
+    A = np.column_stack([np.ones(len(y)), X])
+    w = np.zeros(A.shape[1])
+    reg = l2 * np.eye(A.shape[1]); reg[0, 0] = 0.0
+    for _ in range(iters):
+        p = 1.0 / (1.0 + np.exp(-A @ w))
+        grad = A.T @ (p - y) + reg @ w
+        hess = (A * (p * (1 - p))[:, None]).T @ A + reg
+        step = np.linalg.solve(hess, grad)
+        w -= step
+        if np.abs(step).max() < 1e-6:
+            break
+    return dict(zip(("bias",) + FEATURES, (round(float(v), 4) for v in w)))
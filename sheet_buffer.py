@@ -0,0 +1,208 @@
+# ==========================================================
+# 🧺 BUFFER DE ESCRITURA — Google Sheets (write-behind)
+# ==========================================================
+# ✅ Acumula filas en memoria → un solo append_rows por hoja
+# ✅ Agrupa update_cell/update en un único batch_update por hoja
+# ✅ Flush al final del ciclo, por umbral de tamaño o al salir
+# ✅ Reintento con backoff ante 429/5xx; tras un flush fallido la hoja
+#    espera una ventana creciente antes de reintentar (sin bloquear
+#    cada append durante una caída de Sheets)
+# ✅ Memoria acotada: sobre el tope, las hojas lossy (debug) descartan
+#    lo más viejo (METRICS) y los ledgers lo pasan a un archivo local
+#    que se envía primero en el próximo flush exitoso
+# ==========================================================
+import os, json, time, atexit, threading
+from collections import deque
+from transport import RETRY
+from metrics import METRICS
+
+FLUSH_THRESHOLD = int(os.getenv("SHEETS_FLUSH_ROWS", "50"))
+MAX_BUFFER_ROWS = int(os.getenv("SHEETS_MAX_BUFFER", "5000"))
+FLUSH_COOLDOWN  = float(os.getenv("SHEETS_FLUSH_COOLDOWN", "30"))   # s tras el 1er fallo (se duplica)
+COOLDOWN_CAP    = float(os.getenv("SHEETS_FLUSH_COOLDOWN_CAP", "600"))
+SPILL_DIR       = os.getenv("SHEETS_SPILL_DIR", ".sheets_spill")
+
+_BUFFERS = []
+
+# ----------------------------------------------------------
+# 🔁 Reintento con backoff exponencial (política de transport)
+# ----------------------------------------------------------
+def with_backoff(fn, *args, **kwargs):
+    """Ejecuta fn con la política compartida (429/5xx, espera exponencial + jitter)."""
+    return RETRY.call(fn, *args, **kwargs)
+
+# ----------------------------------------------------------
+# 🧺 Hoja con buffer
+# ----------------------------------------------------------
+class BufferedSheet:
+    """Envuelve un worksheet: las escrituras se acumulan y se envían en lote.
+
+    Cualquier otra llamada (lecturas, clear, etc.) vacía antes el buffer,
+    de modo que el orden observable de operaciones se conserva.
+    register=False → buffer privado: flush_all() no lo toca (lo vacía su dueño).
+    lossy=True → con Sheets caído y el buffer lleno se descartan las filas más
+    viejas (solo para logs); si no, el excedente va a SPILL_DIR y se envía en
+    orden, antes que lo que quedó en memoria (filas con número fijo).
+    """
+
+    def __init__(self, ws, threshold=FLUSH_THRESHOLD, max_rows=MAX_BUFFER_ROWS, register=True, lossy=False):
+        self._ws = ws
+        self._threshold = threshold
+        self._max_rows = max_rows
+        self._lossy = lossy
+        self._rows = deque()
+        self._updates = {}
+        self._lock = threading.RLock()      # solo el estado del buffer
+        self._send = threading.Lock()       # un envío a la vez (fuera de _lock)
+        self._sending = False
+        self._failures = 0
+        self._retry_at = 0.0                # monotonic: antes no hay flush automático
+        self._spill_path = None
+        self._spill_rows = self._spill_offset = 0
+        self.dropped = 0
+        self.reported = 0
+        if register:
+            _BUFFERS.append(self)
+
+    # === Escrituras diferidas ===
+    def append_row(self, row, **kwargs):
+        self.append_rows([row])
+
+    def append_rows(self, rows, **kwargs):
+        with self._lock:
+            self._rows.extend(list(r) for r in rows)
+            self._cap()
+            full = len(self._rows) + self._spill_rows >= self._threshold
+        if full:
+            self._autoflush()
+
+    def update_cell(self, row, col, value):
+        from gspread.utils import rowcol_to_a1
+        self.update(rowcol_to_a1(row, col), [[value]])
+
+    def update(self, range_name, values):
+        """Mismo orden de argumentos que usa el bot: (rango, valores)."""
+        with self._lock:
+            self._updates.pop(range_name, None)
+            self._updates[range_name] = values
+            full = len(self._updates) >= self._threshold
+        if full:
+            self._autoflush()
+
+    def cooling(self):
+        """¿Dentro de la ventana de espera tras un flush fallido?"""
+        return time.monotonic() < self._retry_at
+
+    def _autoflush(self):
+        """Flush por umbral: las filas ya se aceptaron, un fallo no se propaga."""
+        if self.cooling():
+            return
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"⚠️ flush {self!r} (reintento en {self._retry_at - time.monotonic():.0f}s):", e)
+
+    # === Tope de memoria (con _lock) ===
+    def _cap(self):
+        over = len(self._rows) - self._max_rows
+        if over <= 0 or self._sending:
+            return
+        old = [self._rows.popleft() for _ in range(over)]
+        if self._lossy:
+            self.dropped += over
+            METRICS.incr("sheets.dropped", over)
+        else:
+            self._spill(old)
+            METRICS.incr("sheets.spilled", over)
+
+    def _spill(self, rows):
+        if self._spill_path is None:
+            os.makedirs(SPILL_DIR, exist_ok=True)
+            title = getattr(self._ws, "title", "sheet")
+            self._spill_path = os.path.join(SPILL_DIR, f"{title}.{os.getpid()}.{id(self):x}.jsonl")
+        with open(self._spill_path, "ab") as fh:
+            fh.writelines((json.dumps(r, default=str) + "\n").encode() for r in rows)
+        self._spill_rows += len(rows)
+
+    def _drain_spill(self):
+        """Envía el archivo en bloques de max_rows (lo más viejo primero)."""
+        while self._spill_rows:
+            with open(self._spill_path, "rb") as fh:
+                fh.seek(self._spill_offset)
+                chunk = [json.loads(fh.readline()) for _ in range(min(self._max_rows, self._spill_rows))]
+                end = fh.tell()
+            with_backoff(self._ws.append_rows, chunk)
+            with self._lock:
+                self._spill_offset, self._spill_rows = end, self._spill_rows - len(chunk)
+        if self._spill_offset:
+            os.remove(self._spill_path)
+            self._spill_offset = 0
+
+    def pending(self):
+        return len(self._rows) + self._spill_rows + len(self._updates)
+
+    # === Envío ===
+    def flush(self):
+        """Envía filas pendientes (archivo, luego memoria) y luego celdas (batch_update).
+
+        La red va fuera de _lock: los append concurrentes no esperan el envío.
+        """
+        with self._send:
+            with self._lock:
+                rows, self._rows = list(self._rows), deque()
+                updates, self._updates = self._updates, {}
+                self._sending = True
+            try:
+                self._drain_spill()
+                if rows:
+                    with_backoff(self._ws.append_rows, rows)
+                    rows = []
+                if updates:
+                    with_backoff(self._ws.batch_update,
+                                 [{"range": k, "values": v} for k, v in updates.items()])
+                    updates = {}
+                self._failures, self._retry_at = 0, 0.0
+            except Exception:
+                self._failures += 1
+                self._retry_at = time.monotonic() + min(COOLDOWN_CAP, FLUSH_COOLDOWN * 2 ** (self._failures - 1))
+                METRICS.incr("sheets.flush_error")
+                raise
+            finally:
+                # Lo no enviado vuelve delante de lo agregado mientras tanto
+                with self._lock:
+                    self._sending = False
+                    self._rows.extendleft(reversed(rows))
+                    for k, v in updates.items():
+                        self._updates.setdefault(k, v)
+                    self._cap()
+
+    def __getattr__(self, name):
+        attr = getattr(self._ws, name)
+        if callable(attr):
+            self.flush()
+        return attr
+
+    def __repr__(self):
+        return f"<BufferedSheet {getattr(self._ws, 'title', '?')} pending={self.pending()}>"
+
+def take_dropped():
+    """{hoja: filas descartadas desde la última consulta} (para log_debug)."""
+    out = {}
+    for buf in _BUFFERS:
+        if buf.dropped > buf.reported:
+            out[getattr(buf._ws, "title", "?")] = buf.dropped - buf.reported
+            buf.reported = buf.dropped
+    return out
+
+def flush_all(force=False):
+    """Vacía todos los buffers (fin de ciclo); los que están en espera tras un
+    fallo se saltan salvo force=True (salida del intérprete)."""
+    for buf in _BUFFERS:
+        if buf.cooling() and not force:
+            continue
+        try:
+            buf.flush()
+        except Exception as e:
+            print(f"⚠️ flush {buf!r}:", e)
+
+atexit.register(flush_all, force=True)
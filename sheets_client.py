@@ -0,0 +1,226 @@
+# ==========================================================
+# 🔌 CLIENTE DE HOJAS — conexión perezosa + backend local
+# ==========================================================
+# ✅ Importar bot_config ya no autentica ni lee hojas
+# ✅ Conecta a Google en el primer uso real
+# ✅ Encabezados verificados con una sola lectura A1:Z1
+# ✅ Handles de worksheet en caché (llamadas medidas en metrics)
+# ✅ Conexión y reintentos vía transport (pool + backoff 429/5xx)
+# ✅ Backend en memoria con la misma interfaz (SHEETS_BACKEND=memory)
+# ✅ gspread se importa al usarse (importar el módulo no lo carga)
+# ==========================================================
+import os, threading
+from metrics import METRICS, TimedWorksheet
+from transport import RETRY, Retrying, open_spreadsheet
+
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive"
+]
+
+# ----------------------------------------------------------
+# ☁️ Google Sheets (perezoso)
+# ----------------------------------------------------------
+class SheetsClient:
+    """Autentica y abre la planilla solo cuando se necesita."""
+
+    def __init__(self, creds_json=None, spreadsheet_id=None, scopes=SCOPES):
+        self.creds_json = creds_json if creds_json is not None else os.getenv("GOOGLE_CREDS_JSON")
+        self.spreadsheet_id = spreadsheet_id if spreadsheet_id is not None else os.getenv("SPREADSHEET_ID")
+        self.scopes = scopes
+        self._ss = None
+        self._ws = {}
+        self._lock = threading.RLock()
+
+    @property
+    def spreadsheet(self):
+        with self._lock:
+            if self._ss is None:
+                self._ss = self._connect()
+            return self._ss
+
+    def _connect(self):
+        try:
+            ss = open_spreadsheet(self.creds_json, self.spreadsheet_id, self.scopes)
+        except ValueError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"❌ Error al conectar con Google Sheets: {e}")
+        print("✅ Google Sheets conectado correctamente.")
+        return ss
+
+    @property
+    def sheet1(self):
+        """Primera hoja de la planilla (handle en caché)."""
+        with self._lock:
+            if None not in self._ws:
+                self._ws[None] = TimedWorksheet(Retrying(RETRY.call(lambda: self.spreadsheet.sheet1)))
+            return self._ws[None]
+
+    def worksheet(self, title, headers=None):
+        """Crea la hoja si no existe y garantiza los encabezados (una lectura A1:Z1)."""
+        with self._lock:
+            if title in self._ws:
+                return self._ws[title]
+            import gspread
+            ss = self.spreadsheet
+            try:
+                with METRICS.span("sheets.open", title):
+                    ws = Retrying(RETRY.call(ss.worksheet, title))
+                if headers and not any(v for row in ws.get("A1:Z1") for v in row):
+                    ws.update("A1", [headers])
+                    print(f"📄 Hoja inicializada: {title}")
+            except gspread.WorksheetNotFound:
+                ws = Retrying(RETRY.call(ss.add_worksheet, title=title, rows=1000,
+                                         cols=len(headers or []) or 26))
+                if headers:
+                    ws.update("A1", [headers])
+                print(f"🆕 Hoja creada: {title}")
+            # Cada llamada a la API queda medida (sheets.<método>, por hoja)
+            ws = TimedWorksheet(ws)
+            self._ws[title] = ws
+            return ws
+
+# ----------------------------------------------------------
+# 🧠 Backend en memoria (pruebas offline / desarrollo)
+# ----------------------------------------------------------
+def _grid(range_name):
+    from gspread.utils import a1_range_to_grid_range
+    g = a1_range_to_grid_range(range_name)
+    return (g.get("startRowIndex", 0), g.get("endRowIndex"),
+            g.get("startColumnIndex", 0), g.get("endColumnIndex"))
+
+class MemoryWorksheet:
+    """Subconjunto de gspread.Worksheet que usa el bot, guardado en listas."""
+
+    def __init__(self, title, headers=None):
+        self.title = title
+        self.rows = [list(headers)] if headers else []
+        self._lock = threading.RLock()
+
+    @property
+    def row_count(self):
+        return max(len(self.rows), 1000)
+
+    @property
+    def col_count(self):
+        return max([len(r) for r in self.rows] + [26])
+
+    def add_cols(self, n):
+        pass
+
+    # === Lecturas ===
+    def get_all_values(self):
+        with self._lock:
+            return [list(r) for r in self.rows]
+
+    def get_all_records(self):
+        with self._lock:
+            if not self.rows:
+                return []
+            head = self.rows[0]
+            return [dict(zip(head, list(r) + [""] * (len(head) - len(r)))) for r in self.rows[1:]]
+
+    def get(self, range_name, **kwargs):
+        r0, r1, c0, c1 = _grid(range_name)
+        with self._lock:
+            return [list(r[c0:c1]) for r in self.rows[r0:r1]]
+
+    def row_values(self, row):
+        with self._lock:
+            return list(self.rows[row-1]) if row <= len(self.rows) else []
+
+    def col_values(self, col):
+        with self._lock:
+            vals = [r[col-1] if len(r) >= col else "" for r in self.rows]
+        while vals and vals[-1] == "":
+            vals.pop()
+        return vals
+
+    # === Escrituras ===
+    def append_row(self, row, **kwargs):
+        self.append_rows([row])
+
+    def append_rows(self, rows, **kwargs):
+        with self._lock:
+            self.rows.extend(list(r) for r in rows)
+
+    def _write(self, range_name, values):
+        r0, _, c0, _ = _grid(range_name)
+        for i, vals in enumerate(values):
+            while len(self.rows) <= r0 + i:
+                self.rows.append([])
+            row = self.rows[r0 + i]
+            row.extend([""] * (c0 + len(vals) - len(row)))
+            row[c0:c0+len(vals)] = list(vals)
+
+    def update(self, range_name, values=None, **kwargs):
+        if not isinstance(range_name, str):
+            range_name, values = values, range_name
+        with self._lock:
+            self._write(range_name, values)
+
+    def update_cell(self, row, col, value):
+        from gspread.utils import rowcol_to_a1
+        self.update(rowcol_to_a1(row, col), [[value]])
+
+    def batch_update(self, data, **kwargs):
+        with self._lock:
+            for d in data:
+                self._write(d["range"], d["values"])
+
+    def clear(self):
+        with self._lock:
+            self.rows = []
+
+    def delete_rows(self, start_index, end_index=None):
+        with self._lock:
+            del self.rows[start_index-1:(end_index or start_index)]
+
+class MemoryBackend:
+    """Misma interfaz que SheetsClient, sin red ni credenciales."""
+
+    def __init__(self):
+        self._ws = {}
+        self._lock = threading.Lock()
+
+    def worksheet(self, title, headers=None):
+        with self._lock:
+            if title not in self._ws:
+                self._ws[title] = MemoryWorksheet(title, headers)
+            return self._ws[title]
+
+# ----------------------------------------------------------
+# 💤 Worksheet perezoso
+# ----------------------------------------------------------
+class LazyWorksheet:
+    """Resuelve la hoja en el backend en el primer acceso real."""
+
+    def __init__(self, backend, title, headers=None):
+        self.title = title
+        self._backend = backend
+        self._headers = headers
+        self._ws = None
+
+    def resolve(self):
+        if self._ws is None:
+            self._ws = self._backend.worksheet(self.title, self._headers)
+        return self._ws
+
+    def __getattr__(self, name):
+        return getattr(self.resolve(), name)
+
+    def __repr__(self):
+        return f"<LazyWorksheet {self.title} {'ready' if self._ws is not None else 'pending'}>"
+
+def make_backend(kind=None):
+    """SHEETS_BACKEND: gsheets (por defecto) | memory | sqlite | mirror (SQLite + réplica a Sheets)."""
+    kind = (kind or os.getenv("SHEETS_BACKEND", "gsheets")).lower()
+    if kind == "memory":
+        return MemoryBackend()
+    if kind == "gsheets":
+        return SheetsClient()
+    if kind in ("sqlite", "mirror"):
+        from storage import SQLiteBackend, MirroredBackend
+        return SQLiteBackend() if kind == "sqlite" else MirroredBackend()
+    raise ValueError(f"❌ SHEETS_BACKEND desconocido: {kind}")
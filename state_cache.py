@@ -0,0 +1,73 @@
+# ==========================================================
+# 🗝️ CACHÉ DE ESTADO — hoja state como dict con posiciones
+# ==========================================================
+# ✅ Una lectura al inicio; lecturas posteriores desde memoria
+# ✅ Escrituras repetidas de la misma clave → una sola (coalescidas)
+# ✅ Todas las claves en un único batch de rangos B:C + un append
+# ✅ Antes de escribir se releen las columnas A:B (una lectura):
+#    posiciones y valores se actualizan si otro proceso modificó la hoja
+# ==========================================================
+import threading
+
+class StateCache:
+    """Estado clave/valor con escrituras diferidas y coalescidas."""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self._lock = threading.RLock()
+        self._loaded = False
+        self.pending = {}
+
+    def load(self):
+        with self._lock:
+            self._index(self.ws.get_all_values())
+            self._loaded = True
+
+    def _index(self, vals):
+        self.rows, self.values = {}, {}
+        for row_num, r in enumerate(vals[1:], start=2):
+            if r and r[0]:
+                self.rows[r[0]] = row_num
+                self.values[r[0]] = r[1] if len(r) > 1 else ""
+        self.n_rows = max(len(vals), 1)
+
+    def _ensure(self):
+        if not self._loaded:
+            self.load()
+
+    def snapshot(self):
+        """{clave: valor} incluyendo cambios aún no enviados."""
+        with self._lock:
+            self._ensure()
+            return {**self.values, **{k: v for k, (v, _) in self.pending.items()}}
+
+    def set(self, kv, ts):
+        with self._lock:
+            self._ensure()
+            for k, v in kv.items():
+                self.pending[k] = (v, ts)
+
+    def _refresh(self):
+        """Relee claves y valores (A:B): posiciones y valores quedan al día juntos."""
+        self._index(self.ws.get("A:B"))
+
+    def flush(self):
+        """Envía todas las claves pendientes: un batch de rangos + un append."""
+        with self._lock:
+            if not self.pending:
+                return
+            self._ensure()
+            self._refresh()
+            pending, self.pending = self.pending, {}
+            new_rows = []
+            for k, (v, ts) in pending.items():
+                row = self.rows.get(k)
+                if row:
+                    self.ws.update(f"B{row}:C{row}", [[v, ts]])
+                else:
+                    new_rows.append([k, v, ts])
+                    self.n_rows += 1
+                    self.rows[k] = self.n_rows
+                self.values[k] = v
+            if new_rows:
+                self.ws.append_rows(new_rows)
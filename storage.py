@@ -0,0 +1,380 @@
+# ==========================================================
+# 🗄️ STORAGE — SQLite local (WAL) + espejo asíncrono a Sheets
+# ==========================================================
+# ✅ SQLite como sistema primario: lecturas locales (sin red)
+# ✅ Misma interfaz que gspread.Worksheet (drop-in para WS_*)
+# ✅ Hilo espejo: reenvía las escrituras a Google Sheets en lote
+# ✅ Para hosts persistentes (daemon): la base sobrevive entre corridas.
+#    En runners efímeros (GitHub Actions) usar gsheets: cada arranque
+#    sembraría todas las hojas y otros jobs escriben fuera del espejo
+# ✅ Arranque: si la tabla local está vacía se siembra desde Sheets
+#    (si la lectura falla, la hoja no se usa); filas local = remoto
+#    antes de replicar escrituras por posición, si no → espejo apagado
+# ==========================================================
+import os, queue, sqlite3, threading, atexit, time
+from sheet_buffer import BufferedSheet, flush_all
+from sheets_client import SheetsClient, _grid
+from metrics import METRICS
+
+SQLITE_PATH     = os.getenv("SQLITE_PATH", "trading_bot.db")
+MIRROR_INTERVAL = float(os.getenv("MIRROR_INTERVAL", "5"))
+
+def _q(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+# ----------------------------------------------------------
+# 🗃️ Hoja respaldada por una tabla SQLite
+# ----------------------------------------------------------
+class SQLiteWorksheet:
+    """Tabla con una fila por fila de la hoja (rownum = número de fila, encabezado = 1)."""
+
+    def __init__(self, store, title, headers=None):
+        self.store, self.title = store, title
+        self.table = _q(f"ws_{title}")
+        self._lock = store.lock
+        with self._lock, store.conn:
+            store.conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table} (rownum INTEGER PRIMARY KEY)")
+        self._ncols = len(self._columns())
+        if headers and not self.row_values(1):
+            self.update("A1", [headers])
+
+    # === Esquema ===
+    def _columns(self):
+        cur = self.store.conn.execute(f"PRAGMA table_info({self.table})")
+        return [r[1] for r in cur.fetchall() if r[1] != "rownum"]
+
+    def _widen(self, n):
+        while self._ncols < n:
+            self._ncols += 1
+            self.store.conn.execute(f"ALTER TABLE {self.table} ADD COLUMN c{self._ncols}")
+
+    def _cols(self):
+        return ", ".join(f"c{i}" for i in range(1, self._ncols + 1)) or "NULL"
+
+    @staticmethod
+    def _trim(row):
+        row = ["" if v is None else v for v in row]
+        while row and row[-1] == "":
+            row.pop()
+        return row
+
+    # === Lecturas ===
+    def _rows(self, where="", params=()):
+        cur = self.store.conn.execute(
+            f"SELECT rownum, {self._cols()} FROM {self.table} {where} ORDER BY rownum", params)
+        return cur.fetchall()
+
+    def get_all_values(self):
+        with self._lock:
+            rows = self._rows()
+        out, expected = [], 1
+        for r in rows:
+            out.extend([] for _ in range(r[0] - expected))
+            out.append(self._trim(r[1:]))
+            expected = r[0] + 1
+        return out
+
+    def get_all_records(self):
+        vals = self.get_all_values()
+        if not vals:
+            return []
+        head = vals[0]
+        return [dict(zip(head, r + [""] * (len(head) - len(r)))) for r in vals[1:]]
+
+    def get(self, range_name, **kwargs):
+        r0, r1, c0, c1 = _grid(range_name)
+        vals = self.get_all_values()
+        return [r[c0:c1] for r in vals[r0:r1]]
+
+    def row_values(self, row):
+        with self._lock:
+            r = self._rows("WHERE rownum = ?", (row,))
+        return self._trim(r[0][1:]) if r else []
+
+    def col_values(self, col):
+        if col > self._ncols:
+            return []
+        vals = [r[col-1] if len(r) >= col else "" for r in self.get_all_values()]
+        while vals and vals[-1] == "":
+            vals.pop()
+        return vals
+
+    def last_row(self):
+        """Número de la última fila con datos (0 si la tabla está vacía)."""
+        with self._lock:
+            return self.store.conn.execute(f"SELECT COALESCE(MAX(rownum), 0) FROM {self.table}").fetchone()[0]
+
+    @property
+    def row_count(self):
+        with self._lock:
+            return max(self.store.conn.execute(f"SELECT COALESCE(MAX(rownum), 0) FROM {self.table}").fetchone()[0], 1000)
+
+    @property
+    def col_count(self):
+        return max(self._ncols, 26)
+
+    def add_cols(self, n):
+        pass
+
+    # === Escrituras ===
+    def append_row(self, row, **kwargs):
+        self.append_rows([row])
+
+    def append_rows(self, rows, **kwargs):
+        rows = [list(r) for r in rows]
+        if not rows:
+            return
+        with self._lock, self.store.conn:
+            self._widen(max(len(r) for r in rows))
+            start = self.store.conn.execute(f"SELECT COALESCE(MAX(rownum), 0) FROM {self.table}").fetchone()[0] + 1
+            marks = ", ".join("?" * (self._ncols + 1))
+            self.store.conn.executemany(
+                f"INSERT INTO {self.table} (rownum, {self._cols()}) VALUES ({marks})",
+                [[start + i] + r + [""] * (self._ncols - len(r)) for i, r in enumerate(rows)])
+
+    def _write(self, range_name, values):
+        r0, _, c0, _ = _grid(range_name)
+        self._widen(c0 + max((len(v) for v in values), default=0))
+        for i, vals in enumerate(values):
+            rownum = r0 + i + 1
+            self.store.conn.execute(f"INSERT OR IGNORE INTO {self.table} (rownum) VALUES (?)", (rownum,))
+            sets = ", ".join(f"c{c0 + j + 1} = ?" for j in range(len(vals)))
+            if sets:
+                self.store.conn.execute(f"UPDATE {self.table} SET {sets} WHERE rownum = ?", list(vals) + [rownum])
+
+    def update(self, range_name, values=None, **kwargs):
+        if not isinstance(range_name, str):
+            range_name, values = values, range_name
+        with self._lock, self.store.conn:
+            self._write(range_name, values)
+
+    def update_cell(self, row, col, value):
+        from gspread.utils import rowcol_to_a1
+        self.update(rowcol_to_a1(row, col), [[value]])
+
+    def batch_update(self, data, **kwargs):
+        with self._lock, self.store.conn:
+            for d in data:
+                self._write(d["range"], d["values"])
+
+    def clear(self):
+        with self._lock, self.store.conn:
+            self.store.conn.execute(f"DELETE FROM {self.table}")
+
+    def delete_rows(self, start_index, end_index=None):
+        end_index = end_index or start_index
+        k = end_index - start_index + 1
+        with self._lock, self.store.conn:
+            c = self.store.conn
+            c.execute(f"DELETE FROM {self.table} WHERE rownum BETWEEN ? AND ?", (start_index, end_index))
+            # Renumerar en dos pasos para no chocar con la clave primaria
+            c.execute(f"UPDATE {self.table} SET rownum = -(rownum - ?) WHERE rownum > ?", (k, end_index))
+            c.execute(f"UPDATE {self.table} SET rownum = -rownum WHERE rownum < 0")
+
+class SQLiteBackend:
+    """Backend local: una base SQLite en modo WAL con una tabla por hoja."""
+
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.isolation_level = "DEFERRED"
+        self.lock = threading.RLock()
+        self._ws = {}
+
+    def worksheet(self, title, headers=None):
+        with self.lock:
+            if title not in self._ws:
+                self._ws[title] = SQLiteWorksheet(self, title, headers)
+            return self._ws[title]
+
+# ----------------------------------------------------------
+# 🪞 Espejo asíncrono a Google Sheets
+# ----------------------------------------------------------
+def _rows_after(n, op, args):
+    """Filas de la hoja tras aplicar op (mismo criterio en local y remoto)."""
+    if op == "append_row":
+        return n + 1
+    if op == "append_rows":
+        return n + len(args[0])
+    if op == "clear":
+        return 0
+    if op == "delete_rows":
+        start, end = args[0], (args[1] if len(args) > 1 and args[1] else args[0])
+        return n - max(0, min(end, n) - start + 1)
+    if op == "update_cell":
+        return max(n, args[0])
+    if op == "update":
+        rng, vals = args if isinstance(args[0], str) else (args[1], args[0])
+        return max(n, _grid(rng)[0] + len(vals))
+    if op == "batch_update":
+        return max([n] + [_grid(d["range"])[0] + len(d["values"]) for d in args[0]])
+    return n
+
+class SheetsMirror(threading.Thread):
+    """Hilo que replica en Sheets las escrituras hechas en el store local."""
+
+    # Escrituras por número de fila: solo se replican si local y remoto coinciden
+    ROW_OPS = {"update", "update_cell", "batch_update", "delete_rows"}
+
+    def __init__(self, remote, interval=MIRROR_INTERVAL):
+        super().__init__(name="sheets-mirror", daemon=True)
+        self.remote, self.interval = remote, interval
+        self.ops = queue.Queue()
+        self._bufs = {}
+        self.rows = {}          # hoja → filas remotas esperadas
+        self.off = set()        # hojas con el espejo apagado (desincronizadas)
+        self._halt = threading.Event()
+        self.errors = 0
+
+    def buffer(self, title, headers=None):
+        # Privados (fuera de flush_all): solo este hilo los vacía
+        if title not in self._bufs:
+            self._bufs[title] = BufferedSheet(self.remote.worksheet(title, headers),
+                                              threshold=500, register=False)
+        return self._bufs[title]
+
+    def track(self, title, rows):
+        self.rows[title] = rows
+
+    def disable(self, title, reason):
+        self.off.add(title)
+        METRICS.incr("mirror.disabled")
+        print(f"⚠️ mirror {title} apagado: {reason}")
+
+    def submit(self, title, headers, op, args, local_rows):
+        """local_rows: filas locales antes de op (para verificar escrituras por posición)."""
+        self.ops.put((title, headers, op, args, local_rows))
+
+    def _apply(self, title, headers, op, args, local_rows):
+        if title in self.off:
+            return
+        remote_rows = self.rows.get(title, local_rows)
+        if op in self.ROW_OPS and remote_rows != local_rows:
+            self.disable(title, f"{op} con {local_rows} filas locales y {remote_rows} remotas")
+            return
+        buf = self.buffer(title, headers)
+        getattr(buf, op)(*args)
+        self.rows[title] = _rows_after(remote_rows, op, args)
+
+    def _flush(self):
+        for buf in self._bufs.values():
+            buf.flush()
+
+    def drain(self):
+        """Aplica todo lo pendiente y vacía los buffers remotos."""
+        while True:
+            try:
+                item = self.ops.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                continue
+            try:
+                self._apply(*item)
+            except Exception as e:
+                self.errors += 1
+                print("⚠️ mirror:", e)
+        try:
+            self._flush()
+        except Exception as e:
+            self.errors += 1
+            print("⚠️ mirror flush:", e)
+
+    def run(self):
+        last = time.monotonic()
+        while not self._halt.is_set():
+            try:
+                item = self.ops.get(timeout=self.interval)
+                if item is None:
+                    break
+                self._apply(*item)
+            except queue.Empty:
+                pass
+            except Exception as e:
+                self.errors += 1
+                print("⚠️ mirror:", e)
+            if time.monotonic() - last >= self.interval:
+                self.drain()
+                last = time.monotonic()
+
+    def stop(self):
+        """Vacía los buffers del bot, detiene el hilo y replica lo pendiente."""
+        flush_all()
+        self._halt.set()
+        self.ops.put(None)
+        if self.is_alive():
+            self.join(timeout=30)
+        if not self.is_alive():     # el hilo terminó: nadie más toca los buffers
+            self.drain()
+
+class MirroredWorksheet:
+    """Lecturas locales; cada escritura se aplica local y se encola al espejo."""
+
+    WRITES = ("append_row", "append_rows", "update", "update_cell", "batch_update", "clear", "delete_rows")
+
+    def __init__(self, local, mirror, headers=None):
+        self.local, self.mirror, self.headers = local, mirror, headers
+        self.title = local.title
+
+    def __getattr__(self, name):
+        attr = getattr(self.local, name)
+        if name not in self.WRITES:
+            return attr
+        def write(*args, **kwargs):
+            # Bajo el lock local: el orden de la cola es el orden aplicado
+            with self.local._lock:
+                rows = self.local.last_row()
+                result = attr(*args, **kwargs)
+                self.mirror.submit(self.title, self.headers, name, args, rows)
+            return result
+        return write
+
+class MirroredBackend:
+    """SQLite primario + réplica asíncrona en Google Sheets."""
+
+    def __init__(self, path=SQLITE_PATH, remote=None):
+        self.local = SQLiteBackend(path)
+        self.remote = remote or SheetsClient()
+        self.mirror = SheetsMirror(self.remote)
+        self.mirror.start()
+        atexit.register(self.mirror.stop)
+        self._ws = {}
+        self._lock = threading.Lock()
+
+    def worksheet(self, title, headers=None):
+        with self._lock:
+            if title not in self._ws:
+                local = self.local.worksheet(title, headers)
+                if local.last_row() <= 1:
+                    self._seed(local, title, headers)
+                else:
+                    self._verify(local, title, headers)
+                self._ws[title] = MirroredWorksheet(local, self.mirror, headers)
+            return self._ws[title]
+
+    def _seed(self, local, title, headers):
+        """Primera vez: copia la hoja remota al store local (una lectura).
+
+        Si la lectura falla se propaga: la hoja no se usa hasta poder sembrarla
+        (una tabla vacía desplazaría todas las escrituras por fila en el remoto).
+        """
+        try:
+            vals = self.remote.worksheet(title, headers).get_all_values()
+        except Exception as e:
+            raise RuntimeError(f"❌ seed {title}: {e}") from e
+        if len(vals) > 1:
+            local.clear()
+            local.append_rows(vals)
+        self.mirror.track(title, local.last_row())
+
+    def _verify(self, local, title, headers):
+        """Store local existente: mismo número de filas que el remoto o espejo apagado."""
+        try:
+            remote_rows = len(self.remote.worksheet(title, headers).col_values(1))
+        except Exception as e:
+            raise RuntimeError(f"❌ verify {title}: {e}") from e
+        self.mirror.track(title, remote_rows)
+        if remote_rows != local.last_row():
+            self.mirror.disable(title, f"{local.last_row()} filas locales y {remote_rows} remotas")
@@ -0,0 +1,34 @@
+# ==========================================================
+# 🎯 REGLAS DE DECISIÓN — compartidas por bot y backtest
+# ==========================================================
+# ✅ Tendencia EMA rápida vs lenta (up/down)
+# ✅ Condición "sniper": EMA + RSI > 50 + MACD > señal
+# ✅ Niveles SL/TP a partir del ATR
+# Todas las funciones aceptan escalares o arrays NumPy.
+# ==========================================================
+import os
+import numpy as np
+
+SL_ATR_MULT = float(os.getenv("SL_ATR_MULT", "1.5"))
+TP_ATR_MULT = float(os.getenv("TP_ATR_MULT", "2.0"))
+
+def trend_sign(ema_fast, ema_slow):
+    """+1 si la EMA rápida está sobre la lenta, −1 en otro caso."""
+    return np.where(np.asarray(ema_fast) > np.asarray(ema_slow), 1, -1)
+
+def trend_side(ema_fast, ema_slow):
+    side = np.where(trend_sign(ema_fast, ema_slow) > 0, "up", "down")
+    return str(side) if side.ndim == 0 else side
+
+def sniper_ok(ema_fast, ema_slow, rsi, macd, macd_signal):
+    ok = (np.asarray(ema_fast) > np.asarray(ema_slow)) & (np.asarray(rsi) > 50) \
+         & (np.asarray(macd) > np.asarray(macd_signal))
+    return bool(ok) if ok.ndim == 0 else ok
+
+def sl_tp(entry, atr, sign, sl_mult=SL_ATR_MULT, tp_mult=TP_ATR_MULT):
+    """Stop y objetivo según dirección (+1 largo / −1 corto)."""
+    entry, atr, sign = np.asarray(entry, float), np.asarray(atr, float), np.asarray(sign)
+    sl, tp = entry - sign * sl_mult * atr, entry + sign * tp_mult * atr
+    if sl.ndim == 0:
+        return float(sl), float(tp)
+    return sl, tp
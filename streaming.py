@@ -0,0 +1,435 @@
+# ==========================================================
+# 📡 INGESTA EN STREAMING — ticks / velas → ring buffers → señal
+# ==========================================================
+# ✅ Fuentes enchufables: archivo de replay (CSV / JSONL), socket
+#    (líneas JSON, stand-in de un feed) y sondeo en vivo vía BarStore
+# ✅ Ticks agregados en velas del intervalo base; al cerrar cada vela
+#    se actualiza IndicatorSet en O(1) y se evalúan EMA/RSI/MACD
+# ✅ Ring buffer NumPy de tamaño fijo por ticker: memoria constante
+# ✅ Backpressure con cola acotada: coalesce (mismo ticker y vela se
+#    fusionan; llena → descarta la más vieja) o drop (descarta la nueva)
+#
+#   python streaming.py --source replay:ticks.csv
+#   python streaming.py --source socket:127.0.0.1:9009
+#   python streaming.py --source poll            (por defecto)
+# ==========================================================
+import os, csv, json, time, socket, argparse, threading
+from collections import OrderedDict, namedtuple
+import numpy as np
+import pandas as pd
+from indicators import IndicatorSet
+from strategy import trend_side, sniper_ok
+from resample import TIMEFRAMES, COLUMNS
+from metrics import METRICS
+
+STREAM_CAPACITY     = int(os.getenv("STREAM_CAPACITY", "500"))       # velas por ticker
+STREAM_QUEUE        = int(os.getenv("STREAM_QUEUE", "10000"))        # actualizaciones en espera
+STREAM_BACKPRESSURE = os.getenv("STREAM_BACKPRESSURE", "coalesce")   # coalesce | drop
+STREAM_GRACE        = float(os.getenv("STREAM_CLOSE_GRACE", "2"))    # s tras el fin de la vela
+STREAM_POLL_SECONDS = float(os.getenv("STREAM_POLL_SECONDS", "60"))
+STREAM_IDLE_SECONDS = float(os.getenv("STREAM_IDLE_SECONDS", "5"))   # on_idle (p. ej. flush de hojas)
+
+Update = namedtuple("Update", "ticker ts open high low close volume")
+
+def tick(ticker, ts, price, volume=0.0):
+    """Un trade/quote como actualización OHLCV de un solo precio."""
+    return Update(ticker, float(ts), price, price, price, price, float(volume))
+
+def merge(a, b):
+    """Fusiona b (posterior) sobre a dentro de la misma vela."""
+    return Update(a.ticker, a.ts, a.open, max(a.high, b.high), min(a.low, b.low),
+                  b.close, a.volume + b.volume)
+
+def _epoch(v):
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        ts = pd.Timestamp(v)
+        return (ts if ts.tzinfo else ts.tz_localize("UTC")).timestamp()
+
+def to_update(d):
+    """dict con ticker, ts y price (tick) u open/high/low/close (vela) → Update."""
+    tk, ts = str(d["ticker"]).upper(), _epoch(d["ts"])
+    if d.get("close") not in (None, ""):
+        c = float(d["close"])
+        o, h, l = (float(d.get(k) or c) for k in ("open", "high", "low"))
+        return Update(tk, ts, o, h, l, c, float(d.get("volume") or 0))
+    return tick(tk, ts, float(d["price"]), float(d.get("volume") or 0))
+
+# ----------------------------------------------------------
+# 🧱 Ring buffer
+# ----------------------------------------------------------
+class RingBuffer:
+    """Últimas `capacity` velas (ts + OHLCV) en un bloque NumPy fijo."""
+    __slots__ = ("data", "size", "pos")
+
+    def __init__(self, capacity=STREAM_CAPACITY):
+        self.data = np.full((capacity, 6), np.nan)
+        self.size = self.pos = 0
+
+    def push(self, row):
+        self.data[self.pos] = row
+        self.pos = (self.pos + 1) % len(self.data)
+        self.size = min(self.size + 1, len(self.data))
+
+    def extend(self, rows):
+        rows = np.asarray(rows, float)[-len(self.data):]
+        idx = (self.pos + np.arange(len(rows))) % len(self.data)
+        self.data[idx] = rows
+        self.pos = (self.pos + len(rows)) % len(self.data)
+        self.size = min(self.size + len(rows), len(self.data))
+
+    def view(self):
+        """Copia en orden cronológico (tamaño × 6)."""
+        if self.size < len(self.data):
+            return self.data[:self.size].copy()
+        return np.concatenate([self.data[self.pos:], self.data[:self.pos]])
+
+    def last_ts(self):
+        return self.data[(self.pos - 1) % len(self.data), 0] if self.size else -np.inf
+
+    def frame(self):
+        """DataFrame OHLCV con índice UTC (forma de BarStore)."""
+        v = self.view()
+        return pd.DataFrame(v[:, 1:], columns=COLUMNS,
+                            index=pd.DatetimeIndex(pd.to_datetime(v[:, 0], unit="s", utc=True)))
+
+    def __len__(self):
+        return self.size
+
+# ----------------------------------------------------------
+# 🚦 Cola acotada (backpressure)
+# ----------------------------------------------------------
+class UpdateQueue:
+    """Fuente → motor. coalesce: fusiona por (ticker, vela); drop: FIFO que descarta al llenarse."""
+
+    def __init__(self, maxsize=STREAM_QUEUE, policy=STREAM_BACKPRESSURE, step=60):
+        if policy not in ("coalesce", "drop"):
+            raise ValueError(f"❌ STREAM_BACKPRESSURE desconocido: {policy}")
+        self.maxsize, self.policy, self.step = maxsize, policy, step
+        self._items = OrderedDict()
+        self._seq = 0
+        self._cond = threading.Condition()
+        self.dropped = self.coalesced = 0
+
+    def put(self, u):
+        with self._cond:
+            if self.policy == "coalesce":
+                key = (u.ticker, int(u.ts // self.step))
+                if key in self._items:
+                    self._items[key] = merge(self._items[key], u)
+                    self.coalesced += 1
+                    return True
+                if len(self._items) >= self.maxsize:
+                    self._items.popitem(last=False)
+                    self.dropped += 1
+                    METRICS.incr("stream.dropped")
+            else:
+                if len(self._items) >= self.maxsize:
+                    self.dropped += 1
+                    METRICS.incr("stream.dropped")
+                    return False
+                self._seq += 1
+                key = self._seq
+            self._items[key] = u
+            self._cond.notify()
+            return True
+
+    def get(self, timeout=None):
+        with self._cond:
+            if not self._items:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            return self._items.popitem(last=False)[1]
+
+    def __len__(self):
+        return len(self._items)
+
+# ----------------------------------------------------------
+# 🔌 Fuentes
+# ----------------------------------------------------------
+class ReplaySource:
+    """Archivo local CSV o JSONL (una actualización por fila), en orden de ts.
+
+    speed=0 → lo más rápido posible; speed=1 → tiempo real; 60 → 1 min por s.
+    """
+
+    def __init__(self, path, speed=0.0):
+        self.path, self.speed = path, speed
+        self._stop = threading.Event()
+
+    def _rows(self, fh):
+        if self.path.endswith((".jsonl", ".ndjson", ".json")):
+            return (json.loads(line) for line in fh if line.strip())
+        return csv.DictReader(fh)
+
+    def __iter__(self):
+        prev = None
+        with open(self.path, newline="") as fh:
+            for d in self._rows(fh):
+                if self._stop.is_set():
+                    return
+                u = to_update(d)
+                if self.speed and prev is not None and u.ts > prev:
+                    self._stop.wait((u.ts - prev) / self.speed)
+                prev = u.ts
+                yield u
+
+    def clock(self):
+        return None     # reloj de los datos (lo lleva el motor)
+
+    def close(self):
+        self._stop.set()
+
+class SocketSource:
+    """Cliente TCP de líneas JSON (stand-in de un feed en vivo / pruebas locales)."""
+
+    def __init__(self, host, port, timeout=1.0):
+        self.host, self.port, self.timeout = host, int(port), timeout
+        self._stop = threading.Event()
+        self._sock = None
+
+    def __iter__(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        buf = b""
+        while not self._stop.is_set():
+            try:
+                chunk = self._sock.recv(65536)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            if not chunk:
+                return
+            buf += chunk
+            *lines, buf = buf.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    try:
+                        yield to_update(json.loads(line))
+                    except (ValueError, KeyError):
+                        METRICS.incr("stream.bad_message")
+
+    def clock(self):
+        return time.time()
+
+    def close(self):
+        self._stop.set()
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+
+class PollingSource:
+    """En vivo sin feed: sondea BarStore y entrega solo velas cerradas aún no vistas."""
+
+    def __init__(self, store, tickers, interval="1m", every=STREAM_POLL_SECONDS, period="1d"):
+        self.store, self.tickers = store, list(tickers)
+        self.interval, self.every, self.period = interval, every, period
+        self.step = TIMEFRAMES[interval]
+        self.seen = {}
+        self._stop = threading.Event()
+
+    def __iter__(self):
+        while not self._stop.is_set():
+            now = time.time()
+            try:
+                bars = self.store.get_many(self.tickers, period=self.period, interval=self.interval)
+            except Exception:
+                METRICS.incr("stream.poll_error")
+                bars = {}
+            for tk, df in bars.items():
+                if df is None or not len(df):
+                    continue
+                ts = df.index.as_unit("s").asi8.astype(float)
+                vals = df[COLUMNS].to_numpy(float)
+                new = (ts > self.seen.get(tk, -np.inf)) & (ts + self.step <= now)
+                for t, (o, h, l, c, v) in zip(ts[new], vals[new]):
+                    yield Update(tk.upper(), t, o, h, l, c, v)
+                if new.any():
+                    self.seen[tk] = ts[new][-1]
+            self._stop.wait(self.every)
+
+    def clock(self):
+        return time.time()
+
+    def close(self):
+        self._stop.set()
+
+def make_source(spec, store=None, tickers=(), interval="1m"):
+    """replay:RUTA[@velocidad] | socket:HOST:PUERTO | poll"""
+    kind, _, arg = spec.partition(":")
+    if kind == "replay":
+        path, _, speed = arg.partition("@")
+        return ReplaySource(path, float(speed or 0))
+    if kind == "socket":
+        host, _, port = arg.rpartition(":")
+        return SocketSource(host or "127.0.0.1", port)
+    if kind == "poll":
+        return PollingSource(store, tickers, interval)
+    raise ValueError(f"❌ Fuente de streaming desconocida: {spec}")
+
+# ----------------------------------------------------------
+# ⚙️ Motor
+# ----------------------------------------------------------
+class StreamEngine:
+    """Velas por ticker en ring buffers; indicadores y chequeo al cerrar cada vela.
+
+    on_signal(ticker, side, snapshot, ring) se llama cuando cambia la dirección
+    EMA de un ticker al cierre de una vela (snapshot["sniper"]: condición sniper).
+    """
+
+    def __init__(self, interval="1m", capacity=STREAM_CAPACITY, params=None,
+                 on_signal=None, grace=STREAM_GRACE):
+        p = params or {}
+        self.interval, self.step, self.grace = interval, TIMEFRAMES[interval], grace
+        self.capacity = capacity
+        self._ind_args = (p.get("ema_fast", 8), p.get("ema_slow", 21), p.get("rsi", 14),
+                          tuple(p.get("macd", (12, 26, 9))))
+        self.on_signal = on_signal
+        self.rings, self.ind, self.open, self.state = {}, {}, {}, {}
+        self.clock = -np.inf        # mayor ts procesado (reloj de datos)
+        self.bars = self.signals = self.late = 0
+
+    def _ticker(self, tk):
+        if tk not in self.rings:
+            self.rings[tk] = RingBuffer(self.capacity)
+            self.ind[tk] = IndicatorSet(*self._ind_args)
+        return self.rings[tk], self.ind[tk]
+
+    @staticmethod
+    def _check(snap):
+        """Chequeos EMA/RSI/MACD de analyze_ticker sobre el snapshot incremental."""
+        snap["sniper"] = bool(np.isfinite(snap["rsi"])) and sniper_ok(
+            snap["ema_fast"], snap["ema_slow"], snap["rsi"], snap["macd"], snap["macd_signal"])
+        return trend_side(snap["ema_fast"], snap["ema_slow"])
+
+    def warm(self, bars, now=None):
+        """Historia {ticker: OHLCV} → ring buffers + indicadores, sin emitir señales.
+
+        Solo velas cerradas a `now`: la que aún se forma la completa el stream.
+        """
+        now = time.time() if now is None else now
+        for tk, df in bars.items():
+            if df is None or not len(df):
+                continue
+            ts = df.index.as_unit("s").asi8.astype(float)
+            done = ts + self.step <= now
+            if not done.any():
+                continue
+            ts, vals = ts[done], df[COLUMNS].to_numpy(float)[done]
+            ring, ind = self._ticker(tk.upper())
+            ring.extend(np.column_stack([ts, vals]))
+            ind.warm(vals[:, 3], ts[-1])
+            self.state[tk.upper()] = self._check(ind.snapshot())
+        return self
+
+    # === Ingesta ===
+    def process(self, u):
+        tk = u.ticker.upper()
+        bucket = u.ts - u.ts % self.step
+        self.clock = max(self.clock, u.ts)
+        cur = self.open.get(tk)
+        if cur is None:
+            if bucket <= self._ticker(tk)[0].last_ts():
+                self.late += 1          # vela ya cerrada
+                return
+            self.open[tk] = u._replace(ticker=tk, ts=bucket)
+        elif bucket == cur.ts:
+            self.open[tk] = merge(cur, u)
+        elif bucket > cur.ts:
+            self._close(tk, cur)
+            self.open[tk] = u._replace(ticker=tk, ts=bucket)
+        else:
+            self.late += 1
+
+    def flush_due(self, now=None, grace=None):
+        """Cierra las velas cuyo intervalo terminó (ticker sin actualizaciones nuevas)."""
+        now = self.clock if now is None else now
+        grace = self.grace if grace is None else grace
+        for tk, cur in list(self.open.items()):
+            if cur.ts + self.step + grace <= now:
+                del self.open[tk]
+                self._close(tk, cur)
+
+    def _close(self, tk, bar):
+        t0 = time.perf_counter()
+        ring, ind = self._ticker(tk)
+        ring.push((bar.ts, bar.open, bar.high, bar.low, bar.close, bar.volume))
+        snap = ind.update(bar.close, bar.ts)
+        self.bars += 1
+        side = self._check(snap)
+        prev, self.state[tk] = self.state.get(tk), side
+        METRICS.observe("stream.bar", time.perf_counter() - t0, tk)
+        warm = len(ring) >= self._ind_args[1]      # EMA lenta con historia suficiente
+        if warm and prev is not None and prev != side and self.on_signal is not None:
+            self.signals += 1
+            self.on_signal(tk, side, snap, ring)
+            METRICS.observe("stream.signal", time.perf_counter() - t0, tk)
+
+    # === Bucle ===
+    def run(self, source, stop=None, queue=None, on_idle=None, idle_every=STREAM_IDLE_SECONDS):
+        """Fuente (hilo productor) → cola acotada → motor (este hilo) hasta agotar o `stop`."""
+        stop = stop or threading.Event()
+        q = queue or UpdateQueue(step=self.step)
+        done = threading.Event()
+        source_clock = getattr(source, "clock", lambda: None)
+
+        def produce():
+            try:
+                for u in source:
+                    if stop.is_set():
+                        break
+                    q.put(u)
+            except Exception:
+                METRICS.incr("stream.source_error")
+            finally:
+                done.set()
+
+        threading.Thread(target=produce, name="stream-source", daemon=True).start()
+        last_flush = last_idle = time.monotonic()
+        try:
+            while not stop.is_set():
+                u = q.get(timeout=0.25)
+                if u is not None:
+                    self.process(u)
+                elif done.is_set():
+                    break
+                mono = time.monotonic()
+                if u is None or mono - last_flush >= 0.25:
+                    self.flush_due(source_clock())
+                    last_flush = mono
+                if on_idle is not None and mono - last_idle >= idle_every:
+                    on_idle()
+                    last_idle = mono
+        finally:
+            getattr(source, "close", lambda: None)()
+        # Replay agotado: los datos terminaron, se cierran todas las velas.
+        # Stop o feed en vivo: solo las que terminaron; las parciales se descartan
+        now = source_clock()
+        if now is None and not stop.is_set():
+            now = np.inf
+        self.flush_due(now, grace=0)
+        if on_idle is not None:
+            on_idle()
+        return {"bars": self.bars, "signals": self.signals, "late": self.late,
+                "dropped": q.dropped, "coalesced": q.coalesced}
+
+# ----------------------------------------------------------
+# 🚀 Ejecución (integra con bot: hojas, modelo y registro de señales)
+# ----------------------------------------------------------
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Trading Bot 2025 — modo streaming")
+    ap.add_argument("--source", default=os.getenv("STREAM_SOURCE", "poll"),
+                    help="replay:RUTA[@velocidad] | socket:HOST:PUERTO | poll")
+    a = ap.parse_args()
+    import signal
+    import bot
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stop.set())
+    print(f"📡 Trading Bot 2025 — streaming ({a.source})")
+    source = make_source(a.source, bot.BARS, bot.WATCHLIST, bot.BASE_INTERVAL)
+    print("✅ Streaming detenido:", bot.run_stream(source, stop=stop))
@@ -0,0 +1,140 @@
+# ==========================================================
+# 🔬 BARRIDO DE PARÁMETROS — pool de procesos + memoria compartida
+# ==========================================================
+# ✅ Grid o búsqueda aleatoria de EMA / RSI / MACD
+# ✅ Velas en un bloque SharedMemory (solo lectura, sin pickle)
+# ✅ Puntaje = expectativa del backtest trend + sniper (en múltiplos de ATR)
+#    + acuerdo con los resultados registrados (Win/Loss)
+# ==========================================================
+import os, itertools, random
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from backtest import compute_signals, entry_points, simulate
+
+GRID = {
+    "ema_fast": [5, 8, 13],
+    "ema_slow": [21, 34, 55],
+    "rsi":      [9, 14, 21],
+    "macd":     [(12, 26, 9), (8, 21, 5), (5, 35, 5)],
+}
+OUTCOME_WEIGHT = 1.0
+
+# ----------------------------------------------------------
+# 🎛️ Conjuntos de parámetros
+# ----------------------------------------------------------
+def param_sets(mode="grid", samples=50, seed=0, grid=GRID):
+    keys = list(grid)
+    combos = [dict(zip(keys, v)) for v in itertools.product(*grid.values())]
+    combos = [c for c in combos if c["ema_fast"] < c["ema_slow"]]
+    if mode == "random" and samples < len(combos):
+        combos = random.Random(seed).sample(combos, samples)
+    return combos
+
+def outcomes_to_bars(df, bars, tz="US/Eastern"):
+    """Resultados Win/Loss registrados → (índice de vela, lado ±1, ganó) por símbolo.
+
+    `df` necesita FechaISO, HoraRegistro, Side, Resultado y una columna Symbol
+    con el símbolo de `bars`.
+    """
+    need = {"FechaISO", "HoraRegistro", "Side", "Resultado", "Symbol"}
+    if df is None or not need.issubset(df.columns):
+        return {}
+    out = {}
+    for sym, g in df.groupby("Symbol"):
+        idx = bars.get(sym)
+        if idx is None or not len(idx):
+            continue
+        ts = pd.to_datetime(g["FechaISO"].astype(str) + " " + g["HoraRegistro"].astype(str), errors="coerce")
+        ok = ts.notna().to_numpy()
+        ts = pd.DatetimeIndex(ts[ok]).tz_localize(tz, ambiguous="NaT", nonexistent="NaT").tz_convert("UTC")
+        pos = idx.index.searchsorted(ts, side="right") - 1
+        valid = (pos >= 0) & ~pd.isna(ts)
+        side = g["Side"].astype(str).str.lower().isin(["up", "buy", "long"]).to_numpy()[ok][valid]
+        won = (g["Resultado"] == "Win").to_numpy()[ok][valid]
+        out[sym] = (pos[valid], np.where(side, 1, -1), won)
+    return out
+
+# ----------------------------------------------------------
+# 🧠 Memoria compartida (velas de todos los tickers)
+# ----------------------------------------------------------
+def pack_bars(bars):
+    """Copia High/Low/Close de cada ticker a un único bloque compartido.
+
+    Devuelve (shm, layout) con layout = {ticker: (inicio, fin)}.
+    """
+    layout, pos = {}, 0
+    for tk, df in bars.items():
+        layout[tk] = (pos, pos + len(df))
+        pos += len(df)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, 3 * pos * 8))
+    arr = np.ndarray((3, pos), dtype=np.float64, buffer=shm.buf)
+    for tk, df in bars.items():
+        a, b = layout[tk]
+        arr[:, a:b] = df[["High", "Low", "Close"]].to_numpy(float).T
+    return shm, layout
+
+_SHARED = {}
+
+def _attach(name, n, layout, outcomes):
+    shm = shared_memory.SharedMemory(name=name)
+    arr = np.ndarray((3, n), dtype=np.float64, buffer=shm.buf)
+    arr.flags.writeable = False
+    _SHARED.update(shm=shm, arr=arr, layout=layout, outcomes=outcomes)
+
+# ----------------------------------------------------------
+# 📏 Evaluación de un conjunto (corre en el worker)
+# ----------------------------------------------------------
+def evaluate(params, horizon=48):
+    arr, layout, outcomes = _SHARED["arr"], _SHARED["layout"], _SHARED["outcomes"]
+    r_sum, trades, wins, losses, agree, judged = 0.0, 0, 0, 0, 0, 0
+    for tk, (a, b) in layout.items():
+        high, low, close = arr[0, a:b], arr[1, a:b], arr[2, a:b]
+        sig = compute_signals(close, high, low, params)
+        # Regla de tendencia (EMA) + regla sniper (EMA + RSI + MACD)
+        for mode in ("trend", "sniper"):
+            idx, sign = entry_points(sig, mode)
+            res = simulate(high, low, close, idx, sign, sig["atr"], horizon)
+            if len(res):
+                r_sum += float((res["PnL"] / res["atr"]).sum())
+                trades += len(res)
+                wins += int((res["Resultado"] == "Win").sum())
+                losses += int((res["Resultado"] == "Loss").sum())
+        # Resultados reales: ¿la regla habría elegido el lado ganador?
+        o = outcomes.get(tk)
+        if o is not None and len(o[0]):
+            bar_idx, side_sign, won = o
+            pick = sig["sign"][bar_idx]
+            agree += int(((pick == side_sign) == won).sum())
+            judged += len(bar_idx)
+    expectancy = r_sum / trades if trades else 0.0
+    agreement = agree / judged if judged else 0.5
+    return {**params, "Trades": trades,
+            "Winrate": round(wins / (wins + losses) * 100, 2) if wins + losses else 0.0,
+            "ExpectancyR": round(expectancy, 4), "Agreement": round(agreement, 4),
+            "Score": round(expectancy + OUTCOME_WEIGHT * (agreement - 0.5), 4)}
+
+# ----------------------------------------------------------
+# 🚀 Barrido paralelo
+# ----------------------------------------------------------
+def run_sweep(bars, outcomes=None, mode="grid", samples=50, workers=None, horizon=48):
+    """Evalúa todos los conjuntos en paralelo y devuelve la lista ordenada por Score."""
+    bars = {tk: df for tk, df in bars.items() if len(df)}
+    sets = param_sets(mode, samples)
+    if not bars or not sets:
+        return []
+    shm, layout = pack_bars(bars)
+    n = layout[list(layout)[-1]][1]
+    init = (shm.name, n, layout, outcomes or {})
+    ctx = mp.get_context("fork") if "fork" in mp.get_all_start_methods() else None
+    try:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=ctx,
+                                 initializer=_attach, initargs=init) as pool:
+            results = list(pool.map(evaluate, sets, [horizon] * len(sets),
+                                    chunksize=max(1, len(sets) // (4 * (workers or os.cpu_count() or 1)))))
+    finally:
+        shm.close()
+        shm.unlink()
+    return sorted(results, key=lambda r: r["Score"], reverse=True)
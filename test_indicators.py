@@ -0,0 +1,82 @@
+# ==========================================================
+# 🧪 Indicadores: batch (NumPy) vs incremental vs referencia
+# ==========================================================
+import numpy as np
+import pandas as pd
+from indicators import ema_np, rsi_np, macd_np, atr_np, EMA, RSI, MACD, IndicatorSet
+
+TOL = dict(rtol=1e-9, atol=1e-9, equal_nan=True)
+
+def _close(n=20000, seed=7):
+    rng = np.random.default_rng(seed)
+    return 100 + np.cumsum(rng.normal(0, 0.5, n))
+
+def _ohlc(n=5000, seed=7):
+    rng = np.random.default_rng(seed)
+    close = _close(n, seed)
+    spread = rng.uniform(0.05, 1.0, (2, n))
+    return close + spread[0], close - spread[1], close
+
+def _stream(ind, xs, warm=5000):
+    ind.warm(xs[:warm])
+    return [ind.update(v) for v in xs[warm:]]
+
+def test_ema_incremental_matches_batch_and_pandas():
+    close = _close()
+    for span in (8, 21):
+        ref = pd.Series(close).ewm(span=span, adjust=False).mean().to_numpy()
+        assert np.allclose(ema_np(close, span), ref, **TOL)
+        assert np.allclose(_stream(EMA(span), close), ref[5000:], **TOL)
+
+def test_rsi_incremental_matches_batch():
+    close = _close()
+    assert np.allclose(_stream(RSI(14), close), rsi_np(close)[5000:], **TOL)
+    # Arranque en frío: NaN hasta completar la ventana
+    rsi = RSI(14)
+    got = [rsi.update(v) for v in close[:200]]
+    assert np.allclose(got, rsi_np(close[:200]), **TOL)
+
+def test_rsi_monotone_and_flat_series():
+    up, flat = np.arange(50.0), np.full(50, 10.0)
+    assert rsi_np(up)[-1] == 100.0 and RSI(14).warm(up).value == 100.0
+    assert rsi_np(flat)[-1] == 50.0 and RSI(14).warm(flat).value == 50.0
+
+def test_macd_incremental_matches_batch():
+    close = _close()
+    line, sig = macd_np(close)
+    got = np.array(_stream(MACD(), close))
+    assert np.allclose(got[:, 0], line[5000:], **TOL)
+    assert np.allclose(got[:, 1], sig[5000:], **TOL)
+
+def test_atr_matches_loop_reference():
+    high, low, close = _ohlc()
+    ref = np.full(len(close), np.nan)
+    tr = [max(high[i] - low[i], abs(high[i] - close[i-1]), abs(low[i] - close[i-1]))
+          for i in range(1, len(close))]
+    for i in range(14, len(close)):
+        ref[i] = np.mean(tr[i-14:i])
+    assert np.allclose(atr_np(high, low, close), ref, **TOL)
+
+def test_indicator_set_warm_then_update_matches_batch():
+    close = _close()
+    line, sig = macd_np(close)
+    batch = {"ema_fast": ema_np(close, 8), "ema_slow": ema_np(close, 21),
+             "rsi": rsi_np(close), "macd": line, "macd_signal": sig}
+    rows = _stream(IndicatorSet(), close)
+    for k, ref in batch.items():
+        assert np.allclose([r[k] for r in rows], ref[5000:], **TOL), k
+
+def test_peek_does_not_change_state():
+    close = _close(500)
+    ind = IndicatorSet().warm(close[:-1])
+    before = ind.snapshot()
+    peeked = ind.peek(close[-1])
+    assert ind.snapshot() == before
+    assert ind.update(close[-1]) == peeked
+
+def test_matrix_matches_row_by_row():
+    close = _close()
+    mat = np.vstack([close[:3000], close[3000:6000][::-1]])
+    for fn in (lambda v: ema_np(v, 21), rsi_np, lambda v: macd_np(v)[1],
+               lambda v: atr_np(v + 1, v - 1, v)):
+        assert np.allclose(fn(mat), np.vstack([fn(row) for row in mat]), equal_nan=True)
@@ -0,0 +1,44 @@
+# ==========================================================
+# 🧪 Resampler incremental vs pandas.resample
+# ==========================================================
+import numpy as np
+import pandas as pd
+from resample import Resampler, TIMEFRAMES
+
+def _bars(n=10000, seed=0):
+    rng = np.random.default_rng(seed)
+    idx = pd.date_range("2026-01-05", periods=n, freq="1min", tz="UTC")
+    close = 100 + rng.normal(0, 0.1, n).cumsum()
+    opn = np.r_[close[0], close[:-1]]
+    return pd.DataFrame({"Open": opn, "High": np.maximum(opn, close) + 0.05,
+                         "Low": np.minimum(opn, close) - 0.05, "Close": close,
+                         "Volume": rng.integers(1, 100, n).astype(float)}, index=idx)
+
+def _expected(df, tf):
+    rule = f"{TIMEFRAMES[tf] // 60}min"
+    out = df.resample(rule).agg({"Open": "first", "High": "max", "Low": "min",
+                                 "Close": "last", "Volume": "sum"}).dropna()
+    out.index = out.index.as_unit("ns")
+    return out
+
+def _check(out, window):
+    for tf in ("5m", "15m", "1h"):
+        pd.testing.assert_frame_equal(out[tf], _expected(window, tf), check_freq=False)
+
+def test_forward_windows_match_pandas():
+    df, r = _bars(), Resampler()
+    for k in range(60):
+        window = df[k * 37: 2000 + k * 53]
+        _check(r.update("X", window), window)
+
+def test_window_starting_before_state_is_rebuilt():
+    df, r = _bars(), Resampler()
+    r.update("X", df[9000:9500])
+    out = r.update("X", df[:9501])
+    assert len(out["5m"]) == len(_expected(df[:9501], "5m"))
+    _check(out, df[:9501])
+
+def test_window_ending_before_state_is_rebuilt():
+    df, r = _bars(), Resampler()
+    r.update("X", df[:5000])
+    _check(r.update("X", df[1000:3000]), df[1000:3000])
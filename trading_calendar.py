@@ -0,0 +1,240 @@
+# ==========================================================
+# 🗓️ CALENDARIO DE MERCADO — sesiones por instrumento
+# ==========================================================
+# ✅ Globex (futuros CME): domingo 18:00 → viernes 17:00 ET,
+#    pausa diaria 17:00–18:00, cierre/halt en feriados
+# ✅ NYSE: 9:30–16:00 ET, feriados y cierres anticipados (13:00)
+# ✅ Cripto 24/7 (símbolos -USD de map_ticker_yf)
+# ✅ Intervalos precalculados (época UTC) por sesión → consulta
+#    vectorizada con searchsorted: N tickers abiertos + próxima apertura
+# ==========================================================
+import os, threading
+from datetime import date, datetime, timedelta
+import numpy as np
+import pytz
+
+TZ_ET = pytz.timezone("US/Eastern")
+HORIZON_DAYS = int(os.getenv("CALENDAR_HORIZON_DAYS", "400"))   # días precalculados hacia adelante
+SESSIONS = ("Globex", "NYSE", "Crypto")
+
+# Futuros de índices CME (incluye micros); cualquier símbolo "=F" también es Globex
+FUTURES = {"ES", "NQ", "YM", "RTY", "MES", "MNQ", "MYM", "M2K"}
+
+# ----------------------------------------------------------
+# 🔤 Símbolos
+# ----------------------------------------------------------
+def map_ticker_yf(ticker):
+    t = ticker.upper()
+    if t == "MES": return "^GSPC"
+    if t == "MNQ": return "^NDX"
+    if t == "MYM": return "^DJI"
+    if t == "M2K": return "^RUT"
+    if t == "BTCUSD": return "BTC-USD"
+    if t == "ETHUSD": return "ETH-USD"
+    if t == "SOLUSD": return "SOL-USD"
+    if t == "ADAUSD": return "ADA-USD"
+    if t == "XRPUSD": return "XRP-USD"
+    return t
+
+def session_of(ticker):
+    """Sesión que rige al instrumento: Globex | NYSE | Crypto."""
+    t = str(ticker).upper()
+    if t in FUTURES or t.endswith("=F"):
+        return "Globex"
+    if map_ticker_yf(t).endswith("-USD"):
+        return "Crypto"
+    return "NYSE"
+
+# ----------------------------------------------------------
+# 🎌 Feriados (reglas NYSE, sin dependencias externas)
+# ----------------------------------------------------------
+def _nth_weekday(year, month, weekday, n):
+    d = date(year, month, 1)
+    d += timedelta(days=(weekday - d.weekday()) % 7)
+    return d + timedelta(weeks=n - 1)
+
+def _last_weekday(year, month, weekday):
+    d = date(year, month + 1, 1) - timedelta(days=1) if month < 12 else date(year, 12, 31)
+    return d - timedelta(days=(d.weekday() - weekday) % 7)
+
+def _easter(year):
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    j, k = c // 4, c % 4
+    m = (a + 11 * h) // 319
+    r = (2 * e + 2 * j - k - h + m + 32) % 7
+    month = (h - m + r + 90) // 25
+    return date(year, month, (h - m + r + month + 19) % 32)
+
+def _observed(d):
+    """Sábado → viernes, domingo → lunes."""
+    if d.weekday() == 5:
+        return d - timedelta(days=1)
+    if d.weekday() == 6:
+        return d + timedelta(days=1)
+    return d
+
+def holidays(year):
+    """{fecha observada: nombre} de los feriados NYSE del año."""
+    out = {}
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:            # 1/1 en sábado no se traslada al viernes
+        out[_observed(new_year)] = "NewYear"
+    out[_nth_weekday(year, 1, 0, 3)] = "MLK"
+    out[_nth_weekday(year, 2, 0, 3)] = "Presidents"
+    out[_easter(year) - timedelta(days=2)] = "GoodFriday"
+    out[_last_weekday(year, 5, 0)] = "Memorial"
+    if year >= 2022:
+        out[_observed(date(year, 6, 19))] = "Juneteenth"
+    out[_observed(date(year, 7, 4))] = "Independence"
+    out[_nth_weekday(year, 9, 0, 1)] = "Labor"
+    out[_nth_weekday(year, 11, 3, 4)] = "Thanksgiving"
+    out[_observed(date(year, 12, 25))] = "Christmas"
+    return out
+
+def early_closes(year):
+    """Días NYSE con cierre a las 13:00 ET."""
+    out = set()
+    july4 = date(year, 7, 4)
+    if july4.weekday() in (1, 2, 3, 4):
+        out.add(july4 - timedelta(days=1))
+    out.add(_nth_weekday(year, 11, 3, 4) + timedelta(days=1))
+    xmas_eve = date(year, 12, 24)
+    if xmas_eve.weekday() < 5 and date(year, 12, 25).weekday() < 5:
+        out.add(xmas_eve)
+    return out
+
+# Globex (índices CME): cerrado todo el día en estos feriados;
+# en el resto de feriados NYSE opera hasta las 13:00 y reabre a las 18:00
+GLOBEX_CLOSED = {"NewYear", "GoodFriday", "Christmas"}
+
+# ----------------------------------------------------------
+# 🧱 Intervalos [apertura, cierre) en segundos de época
+# ----------------------------------------------------------
+def _ts(d, hour, minute=0):
+    return TZ_ET.localize(datetime(d.year, d.month, d.day, hour, minute)).timestamp()
+
+def _days(start, end):
+    d = start
+    while d <= end:
+        yield d
+        d += timedelta(days=1)
+
+def build_intervals(session, start, end):
+    """(aperturas, cierres) ordenados de `session` para los días hábiles start..end."""
+    if session == "Crypto":
+        return np.array([_ts(start, 0)]), np.array([_ts(end + timedelta(days=1), 0)])
+    hol = {}
+    for year in range(start.year, end.year + 1):
+        hol.update(holidays(year))
+    early = set().union(*(early_closes(y) for y in range(start.year, end.year + 1)))
+    opens, closes = [], []
+    for d in _days(start, end):
+        if d.weekday() >= 5:
+            continue
+        name = hol.get(d)
+        if session == "NYSE":
+            if name:
+                continue
+            opens.append(_ts(d, 9, 30))
+            closes.append(_ts(d, 13) if d in early else _ts(d, 16))
+        else:
+            # Sesión del día d: abre a las 18:00 del día anterior (domingo para el lunes)
+            if name in GLOBEX_CLOSED:
+                continue
+            opens.append(_ts(d - timedelta(days=1), 18))
+            closes.append(_ts(d, 13) if name else _ts(d, 17))
+    return np.array(opens, float), np.array(closes, float)
+
+# ----------------------------------------------------------
+# 🗓️ Calendario
+# ----------------------------------------------------------
+class TradingCalendar:
+    """Estado de sesión de muchos tickers a la vez sobre intervalos precalculados."""
+
+    def __init__(self, horizon_days=HORIZON_DAYS, overrides=None):
+        self.horizon_days = horizon_days
+        self.overrides = {str(k).upper(): v for k, v in (overrides or {}).items()}
+        self._index = {}        # sesión → (aperturas, cierres)
+        self._range = None      # (primer día, último día) precalculado
+        self._codes = {}        # tupla de tickers → códigos de sesión
+        self._lock = threading.Lock()
+
+    def assign(self, mapping):
+        """Fija la sesión de tickers concretos ({ticker: "Globex"|"NYSE"|"Crypto"})."""
+        with self._lock:
+            self.overrides.update({str(k).upper(): v for k, v in mapping.items()})
+            self._codes.clear()
+
+    def session(self, ticker):
+        return self.overrides.get(str(ticker).upper()) or session_of(ticker)
+
+    # === Índice ===
+    def _ensure(self, t):
+        day = datetime.fromtimestamp(float(np.max(t)), TZ_ET).date()
+        lo = datetime.fromtimestamp(float(np.min(t)), TZ_ET).date()
+        with self._lock:
+            if self._range and self._range[0] <= lo and day + timedelta(days=7) <= self._range[1]:
+                return self._index
+            start = lo - timedelta(days=7)
+            end = max(day, lo) + timedelta(days=self.horizon_days)
+            self._index = {s: build_intervals(s, start, end) for s in SESSIONS}
+            self._range = (start, end)
+            return self._index
+
+    def _codes_for(self, tickers):
+        key = tuple(tickers)
+        with self._lock:
+            codes = self._codes.get(key)
+            if codes is None:
+                codes = np.array([SESSIONS.index(self.session(tk)) for tk in key], int)
+                self._codes[key] = codes
+            return codes
+
+    @staticmethod
+    def _lookup(opens, closes, t):
+        """Vectorizado sobre t: (abierto, próxima apertura, cierre vigente)."""
+        i = np.searchsorted(opens, t, side="right") - 1
+        j = np.clip(i, 0, len(opens) - 1)
+        is_open = (i >= 0) & (t < closes[j])
+        nxt = np.where(i + 1 < len(opens), opens[np.clip(i + 1, 0, len(opens) - 1)], np.nan)
+        return is_open, nxt, np.where(is_open, closes[j], np.nan)
+
+    # === Consultas ===
+    def status(self, tickers, now=None):
+        """{"open", "session", "next_open", "close_at"} como arrays alineados a tickers.
+
+        next_open: próxima apertura posterior a `now` (época s; NaN si no hay);
+        close_at: fin de la sesión vigente para los abiertos (NaN si cerrado).
+        """
+        t = float((now or datetime.now(TZ_ET)).timestamp())
+        index = self._ensure(t)
+        codes = self._codes_for(tickers)
+        per = [self._lookup(*index[s], t) for s in SESSIONS]      # una búsqueda por sesión
+        is_open, nxt, close_at = (np.array([p[k] for p in per]) for k in range(3))
+        return {"open": is_open[codes].astype(bool), "session": np.array(SESSIONS, object)[codes],
+                "next_open": nxt[codes], "close_at": close_at[codes]}
+
+    def open_tickers(self, tickers, now=None):
+        st = self.status(tickers, now)
+        return [tk for tk, o in zip(tickers, st["open"]) if o]
+
+    def market_status(self, ticker, now=None):
+        """("open"|"closed", sesión) de un ticker."""
+        st = self.status([ticker], now)
+        return ("open" if st["open"][0] else "closed"), st["session"][0]
+
+    def next_open(self, ticker, now=None):
+        """Próxima apertura del ticker en hora ET (None si no hay en el horizonte)."""
+        ts = self.status([ticker], now)["next_open"][0]
+        return None if np.isnan(ts) else datetime.fromtimestamp(ts, TZ_ET)
+
+    def is_open_at(self, ticker, times):
+        """Vectorizado sobre instantes (época s): ¿sesión abierta en cada uno?"""
+        t = np.asarray(times, float)
+        if not t.size:
+            return np.zeros(0, bool)
+        index = self._ensure(t)
+        return self._lookup(*index[self.session(ticker)], t)[0]
@@ -0,0 +1,144 @@
+# ==========================================================
+# 🌐 TRANSPORTE COMPARTIDO — sesiones HTTP + política de reintento
+# ==========================================================
+# ✅ Sesiones requests con pool keep-alive (Alpha Vantage y Google)
+# ✅ Planillas en caché: una autenticación + open_by_key por proceso
+# ✅ Una sola política de reintento para todo el bot:
+#    backoff exponencial + jitter, solo ante 429 / 5xx / red,
+#    respeta Retry-After; llamadas anidadas no multiplican intentos
+# ✅ La usan bot, recalibrate y update_results
+# ==========================================================
+import os, json, time, random, threading
+import requests
+from requests.adapters import HTTPAdapter
+from metrics import METRICS
+
+POOL_SIZE    = int(os.getenv("HTTP_POOL_SIZE", "16"))       # conexiones por host
+RETRIES      = int(os.getenv("HTTP_RETRIES", "5"))
+BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "1.0"))  # s
+BACKOFF_CAP  = float(os.getenv("HTTP_BACKOFF_CAP", "32"))    # s máximo por espera
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# ----------------------------------------------------------
+# 🔁 Política de reintento
+# ----------------------------------------------------------
+def status_code(e):
+    resp = getattr(e, "response", None)
+    code = getattr(resp, "status_code", None)
+    return code if code is not None else getattr(e, "code", None)
+
+def retryable(e):
+    """429 / 5xx de gspread o requests, o error de red/timeout."""
+    code = status_code(e)
+    if isinstance(code, int):
+        return code in RETRY_STATUS
+    return isinstance(e, (requests.ConnectionError, requests.Timeout))
+
+class RetryPolicy:
+    """Reintenta fn ante errores transitorios con espera exponencial + jitter."""
+
+    def __init__(self, retries=RETRIES, base=BACKOFF_BASE, cap=BACKOFF_CAP, sleep=time.sleep):
+        self.retries, self.base, self.cap, self.sleep = retries, base, cap, sleep
+        self._local = threading.local()
+
+    def delay(self, attempt, error=None):
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        try:
+            hint = float(headers.get("Retry-After", ""))
+        except (TypeError, ValueError):
+            hint = 0.0
+        wait = min(self.cap, self.base * 2**attempt)
+        return max(hint, wait / 2 + random.uniform(0, wait / 2))
+
+    def call(self, fn, *args, **kwargs):
+        # Dentro de otra llamada con reintento: el nivel externo ya reintenta
+        if getattr(self._local, "active", False):
+            return fn(*args, **kwargs)
+        self._local.active = True
+        try:
+            for attempt in range(self.retries):
+                try:
+                    return fn(*args, **kwargs)
+                except Exception as e:
+                    if not retryable(e) or attempt == self.retries - 1:
+                        raise
+                    METRICS.incr(f"retry.{status_code(e) or type(e).__name__}")
+                    self.sleep(self.delay(attempt, e))
+        finally:
+            self._local.active = False
+
+RETRY = RetryPolicy()
+
+class Retrying:
+    """Proxy: cada método del objeto envuelto pasa por la política."""
+
+    def __init__(self, obj, policy=RETRY):
+        self._obj, self._policy = obj, policy
+
+    def __getattr__(self, name):
+        attr = getattr(self._obj, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            return self._policy.call(attr, *args, **kwargs)
+        return call
+
+    def __repr__(self):
+        return f"<Retrying {self._obj!r}>"
+
+# ----------------------------------------------------------
+# 🔌 Sesiones con pool keep-alive
+# ----------------------------------------------------------
+_SESSIONS = {}
+_LOCK = threading.Lock()
+
+def _mount(session, size=POOL_SIZE):
+    adapter = HTTPAdapter(pool_connections=size, pool_maxsize=size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def session(name="default"):
+    """requests.Session compartida por nombre (una por servicio y proceso)."""
+    with _LOCK:
+        if name not in _SESSIONS:
+            _SESSIONS[name] = _mount(requests.Session())
+        return _SESSIONS[name]
+
+# ----------------------------------------------------------
+# ☁️ Google Sheets: credenciales → planilla (en caché)
+# ----------------------------------------------------------
+_SPREADSHEETS = {}
+
+def _credentials(creds_json, scopes):
+    from google.oauth2.service_account import Credentials
+    # ✅ Carga segura del JSON (sin eval)
+    try:
+        data = json.loads(creds_json) if isinstance(creds_json, str) else dict(creds_json)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"❌ Error al decodificar credenciales de Google: {e}")
+    # ✅ Auto-fix del private_key (corrige \\n rotos en GitHub Secrets)
+    if "\\n" in data.get("private_key", ""):
+        data["private_key"] = data["private_key"].replace("\\n", "\n")
+    return Credentials.from_service_account_info(data, scopes=scopes)
+
+def open_spreadsheet(creds_json, spreadsheet_id, scopes):
+    """Autentica y abre la planilla una sola vez por (id, scopes)."""
+    import gspread
+    key = (spreadsheet_id, tuple(scopes))
+    with _LOCK:
+        if key in _SPREADSHEETS:
+            return _SPREADSHEETS[key]
+    if not creds_json or not spreadsheet_id:
+        raise ValueError("❌ Falta credencial o ID de hoja")
+    creds = _credentials(creds_json, scopes)
+    try:
+        from google.auth.transport.requests import AuthorizedSession
+        http = _mount(AuthorizedSession(creds))
+    except ImportError:
+        http = None
+    gc = gspread.authorize(creds, session=http)
+    ss = RETRY.call(gc.open_by_key, spreadsheet_id)
+    with _LOCK:
+        return _SPREADSHEETS.setdefault(key, ss)
@@ -1,37 +1,38 @@
 # ==========================================================
 # 🔄 UPDATE & NOTIFY RESULTS — v4.3 (auto-retry)
 # ==========================================================
-# ✅ Lee hojas con tolerancia a errores (500 API)
-# ✅ Reintenta automáticamente hasta 3 veces
+# ✅ Lee hojas con tolerancia a errores (429 / 5xx API)
+# ✅ Reintentos con la política compartida de transport (backoff + jitter)
+# ✅ Conteos y resumen desde el snapshot PERF (una lectura de performance)
 # ✅ Actualiza resultados y notifica estado
 # ==========================================================
 
-import time, pandas as pd
 from bot_config import *
+from transport import RETRY
 
 # ----------------------------------------------------------
-# 🔁 Función segura para leer una hoja con reintento
+# 🔁 Lectura segura (política de reintento compartida)
 # ----------------------------------------------------------
-def safe_get_values(ws, max_retries=3, delay=5):
-    for attempt in range(max_retries):
-        try:
-            vals = ws.get_all_values()
-            if vals:
-                return vals
-        except Exception as e:
-            log_debug("safe_get_values", f"Intento {attempt+1} falló: {e}")
-            time.sleep(delay)
-    raise RuntimeError(f"❌ No se pudo leer la hoja {ws.title} después de {max_retries} intentos")
+def safe_call(fn, *args, what="lectura"):
+    try:
+        return RETRY.call(fn, *args)
+    except Exception as e:
+        log_debug("safe_get_values", f"{what}: {e}")
+        raise RuntimeError(f"❌ {what} falló tras los reintentos: {e}")
+
+def safe_get_values(ws):
+    return safe_call(ws.get_all_values, what=f"hoja {ws.title}")
 
 # ----------------------------------------------------------
 # 📊 Obtener último estado del mercado
 # ----------------------------------------------------------
 def get_last_status(ws):
-    vals = safe_get_values(ws)
-    if not vals or len(vals) < 2:
+    """Encabezado + última fila: columna A para ubicarla, sin leer la hoja entera."""
+    keys = safe_call(ws.col_values, 1, what=f"hoja {ws.title}")
+    if len(keys) < 2:
         return {}
-    last_row = vals[-1]
-    headers = vals[0]
+    headers = safe_call(ws.row_values, 1, what=f"hoja {ws.title}")
+    last_row = safe_call(ws.row_values, len(keys), what=f"hoja {ws.title}")
     return dict(zip(headers, last_row))
 
 # ----------------------------------------------------------
@@ -39,14 +40,15 @@ def get_last_status(ws):
 # ----------------------------------------------------------
 def update_results(ws_perf):
     try:
-        df = pd.DataFrame(ws_perf.get_all_records())
-        if df.empty:
+        perf = PERF if ws_perf is WS_PERFORMANCE else PerfSnapshot(ws_perf)
+        counts = perf.counts()
+        if not counts:
             log_debug("update_results", "Sin datos en performance.")
             return
-        wins = (df["Resultado"] == "Win").sum()
-        loss = (df["Resultado"] == "Loss").sum()
-        be   = (df["Resultado"] == "BE").sum()
-        canc = (df["Resultado"] == "Cancel").sum()
+        wins = counts.get("Win", 0)
+        loss = counts.get("Loss", 0)
+        be   = counts.get("BE", 0)
+        canc = counts.get("Cancel", 0)
         log_debug("update_results",
                   f"Performance total → Win:{wins} Loss:{loss} BE:{be} Cancel:{canc}")
     except Exception as e:
@@ -57,22 +59,14 @@ def update_results(ws_perf):
 # ----------------------------------------------------------
 def notify_summary():
     try:
-        df = pd.DataFrame(WS_PERFORMANCE.get_all_records())
-        if df.empty:
-            send_mail_many("📈 Daily Summary", "Sin operaciones registradas hoy.", [ALERT_DEFAULT])
-            return
         today = now_et().strftime("%Y-%m-%d")
-        dft = df[df["FechaISO"] == today]
-        if dft.empty:
+        s = PERF.summary(FechaISO=today)
+        if not s["Total"]:
             send_mail_many("📈 Daily Summary", "Sin operaciones del día actual.", [ALERT_DEFAULT])
             return
 
-        total = len(dft)
-        wins = (dft["Resultado"] == "Win").sum()
-        loss = (dft["Resultado"] == "Loss").sum()
-        pnl_series = pd.to_numeric(dft.get("PnL", pd.Series(dtype=float)), errors="coerce").dropna()
-        pnl_total = round(pnl_series.sum(), 2) if not pnl_series.empty else 0
-        body = f"Operaciones de hoy ({today}):\nTotal:{total} | Win:{wins} | Loss:{loss} | PnL:{pnl_total}"
+        body = (f"Operaciones de hoy ({today}):\nTotal:{s['Total']} | Win:{s['Win']} | Loss:{s['Loss']} | "
+                f"PnL:{s['PnL']}\nWinrate:{s['Winrate']}% | Max DD:{s['MaxDD']}")
         send_mail_many("📈 Resumen Diario — Trading Bot 2025", body, [ALERT_DEFAULT])
     except Exception as e:
         log_debug("notify_summary_error", str(e))